@@ -9,10 +9,52 @@ Tests for `utools` module.
 """
 
 import os
+import sys
+import json
+import gzip
+import time
+import shutil
+import subprocess
+import tempfile
 import unittest
+from xml.etree import ElementTree
 
+import six
 
 from utools.maya import validation
+from utools.maya import validation_cache
+from utools.maya import validation_profile
+from utools.maya import validation_batch
+from utools.maya import validation_fix
+from utools.maya import validation_mesh
+from utools.maya import validation_uv
+from utools.maya import validation_costs
+from utools.maya import validation_remote
+from utools.maya import validation_history
+from utools.maya import validation_sample
+from utools.maya import validation_report
+from utools.maya import validation_bench
+from utools.maya import tracing
+
+
+def hasModule(name):
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+
+    return True
+
+
+# -- Timings depend on the machine and its load, they only run when asked for
+benchmark = unittest.skipUnless(os.environ.get('UTOOLS_BENCHMARKS'), 'set UTOOLS_BENCHMARKS=1 to run timing benchmarks')
+
+
+def makeValidator(name, run, **attrs):
+    """Creates a Validator instance"""
+    attrs['run'] = run
+
+    return type(name, (validation.Validator,), attrs)()
 
 
 class TestUtools(unittest.TestCase):
@@ -30,15 +72,1087 @@ class TestUtools(unittest.TestCase):
 class TestValidation(unittest.TestCase):
     def test_runner(self):
         runner = validation.Runner()
-        runner.discover([os.path.dirname(os.path.abspath(__file__))])
+        runner.discover([os.path.dirname(os.path.abspath(__file__))], validation.Manifest())
         self.assertEqual(len(runner.validators), 1)
         list(runner.start())
 
-        self.assertEqual(len(runner.errors), 1)
-        self.assertEqual(runner.errors[0].node, None)
-        self.assertEqual(runner.errors[0].message, 'loop error')
+        errors = runner.validators[0].errors
+        self.assertEqual(runner.errors, 1)
+        self.assertEqual(errors[0].node, None)
+        self.assertEqual(errors[0].message, 'loop error')
         self.assertTrue(runner.duration > 0.9)
 
+    def test_failed_run(self):
+        def run(validator, *args):
+            yield
+            raise RuntimeError('crashed')
+
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Crashes', run)]
+        with self.assertRaises(validation.ValidatorError):
+            list(runner.start())
+
+        self.assertFalse(runner.running)
+        self.assertGreaterEqual(runner.duration, 0.0)
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = validation_cache.ResultCache(os.path.join(self.tempdir, 'cache.db'), maxentries=2)
+        self.calls = []
+
+        def run(validator, *args):
+            self.calls.append(validator)
+            validator._errors.append(validation.Validator.Result('|pCube1', 'bad'))
+            yield
+
+        self.validator = makeValidator('Cached', run, digest=lambda v, *args: 'abc')
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tempdir)
+
+    def scope(self, *nodes):
+        return validation.Scope(query=lambda *args: [(node, 'mesh') for node in nodes])
+
+    def test_restore(self):
+        runner = validation.Runner()
+        runner.validators = [self.validator]
+        list(runner.start(cache=self.cache, scope=self.scope('|a', '|b')))
+        list(runner.start(cache=self.cache, scope=self.scope('|b', '|a')))
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.validator.errors, [('|pCube1', 'bad')])
+        self.assertEqual(self.cache.stats(), [('Cached', 1, 1)])
+
+    def test_scope(self):
+        runner = validation.Runner()
+        runner.validators = [self.validator]
+        list(runner.start(cache=self.cache, scope=self.scope('|a', '|b')))
+        list(runner.start(cache=self.cache, scope=self.scope('|a')))
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_digest_error(self):
+        def digest(validator, *args):
+            raise RuntimeError('no digest')
+
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Broken', lambda v, *args: iter(()), digest=digest)]
+        with self.assertRaises(validation.ValidatorError):
+            list(runner.start(cache=self.cache, scope=self.scope('|a')))
+        self.assertEqual(str(runner.validator), 'Broken')
+
+    def test_evict(self):
+        for digest in ('a', 'b', 'c'):
+            self.cache.put(self.validator, digest, [], [])
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(self.validator, 'a'))
+        self.assertEqual(self.cache.get(self.validator, 'c'), ([], []))
+
+    def test_source_hash(self):
+        filename = os.path.join(self.tempdir, 'hashed.py')
+        hashes = []
+        for limit in (1, 10):
+            with open(filename, 'w') as fh:
+                fh.write(
+                    'from utools.maya.validation import Validator\n'
+                    'LIMIT = {}\n'
+                    'class Hashed(Validator):\n'
+                    '    pass\n'.format(limit)
+                )
+            module = validation.loadModule('hashed', filename)
+            hashes.append(validation_cache.sourceHash(module.Hashed()))
+        sys.modules.pop('hashed')
+
+        self.assertNotEqual(hashes[0], hashes[1])
+
+class TestEvents(unittest.TestCase):
+    def test_streaming(self):
+        def run(validator, *args):
+            for i in range(3):
+                validator._errors.append(validation.Validator.Result('|node{}'.format(i), 'error'))
+                yield
+            validator._warnings.append(validation.Validator.Result(None, 'warning'))
+
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Streaming', run)]
+        events = list(runner.start())
+
+        self.assertEqual(
+            [e.type for e in events],
+            [validation.EVENT_START] + [validation.EVENT_STEP] * 3 + [validation.EVENT_FINISH]
+        )
+        self.assertEqual([[r.node for r in e.errors] for e in events], [[], ['|node0'], ['|node1'], ['|node2'], []])
+        self.assertEqual([r.message for r in events[-1].warnings], ['warning'])
+
+    def test_time_slice(self):
+        def run(validator, *args):
+            for i in range(5):
+                time.sleep(0.01)
+                yield
+
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Sliced', run)]
+        events = runner.start()
+        batches = []
+        done = False
+        while not done:
+            batch, done = validation.timeSlice(events, 0.015)
+            batches.append(len(batch))
+
+        self.assertEqual(sum(batches), 7)
+        self.assertTrue(all(batches[:-1]))
+        self.assertGreater(len(batches), 2)
+
+    @benchmark
+    def test_yield_overhead(self):
+        self.assertLess(validation.yieldOverhead(20000), 20e-6)
+
+
+class TestResultStore(unittest.TestCase):
+    def test_ranges(self):
+        store = validation.ResultStore()
+        for i in range(10000):
+            store.append(validation.Result('|mesh|meshShape.f[{}]'.format(i), 'Bad face'))
+        store.append(('|mesh|meshShape.f[10002]', 'Bad face'))
+        store.append(('|mesh|meshShape.f[10003]', 'Other'))
+        store.append(('|other', 'Bad face'))
+        store.append((None, 'No node'))
+
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.strings, 6)
+        self.assertEqual(store[0], ('|mesh|meshShape.f[0:9999]', 'Bad face'))
+        self.assertEqual(store[-1].node, None)
+        self.assertEqual([r.node for r in store[1:3]], ['|mesh|meshShape.f[10002]', '|mesh|meshShape.f[10003]'])
+        self.assertEqual(store.nodes(), ['|mesh|meshShape.f[0:9999]', '|mesh|meshShape.f[10002]', '|mesh|meshShape.f[10003]', '|other'])
+        self.assertEqual(validation.ResultStore(store), store)
+
+    def test_streaming(self):
+        def run(validator, *args):
+            for i in range(3):
+                validator._errors.appendRange('|mesh', 'f', i, i, 'error')
+                yield
+            validator._errors.append(('|mesh.vtx[0]', 'error'))
+            yield
+
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Ranges', run)]
+        events = list(runner.start())
+
+        self.assertEqual([[r.node for r in e.errors] for e in events], [[], [], [], [], ['|mesh.f[0:2]'], ['|mesh.vtx[0]']])
+
+    def test_discard(self):
+        store = validation.ResultStore([('|a', 'one'), ('|b', 'two'), ('|c.f[0]', 'three')])
+        store.discard(2)
+        store.append(('|c.f[1]', 'three'))
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.discarded, 2)
+        self.assertEqual(store.strings, 3)
+        self.assertEqual(store[2], ('|c.f[0:1]', 'three'))
+        self.assertEqual(store[0:3], [('|c.f[0:1]', 'three')])
+        self.assertRaises(IndexError, lambda: store[0])
+
+
+class TestStats(unittest.TestCase):
+    def test_stats(self):
+        def run(validator, *args):
+            for i in range(5):
+                yield
+
+        validator = makeValidator('Counted', run)
+        runner = validation.Runner()
+        runner.validators = [validator]
+        list(runner.start())
+
+        stats = runner.stats[validator]
+        self.assertEqual(stats.yields, 5)
+        self.assertFalse(stats.timedout)
+        self.assertTrue(stats.wall >= 0.0)
+
+    def test_budget(self):
+        def run(validator, *args):
+            for i in range(100):
+                time.sleep(0.01)
+                yield
+
+        validator = makeValidator('Slow', run, BUDGET=0.05)
+        runner = validation.Runner()
+        runner.validators = [validator]
+        list(runner.start())
+
+        self.assertTrue(runner.stats[validator].timedout)
+        self.assertLess(runner.stats[validator].yields, 100)
+        self.assertEqual(len(validator.errors), 1)
+
+    def test_checkpoint(self):
+        def run(validator, *args):
+            while True:
+                time.sleep(0.01)
+                validator.checkpoint()
+            yield
+
+        after = makeValidator('After', lambda v, *args: iter([None]))
+        validator = makeValidator('Stuck', run, BUDGET=0.05)
+        runner = validation.Runner()
+        runner.validators = [validator, after]
+        list(runner.start())
+
+        self.assertTrue(runner.stats[validator].timedout)
+        self.assertEqual(runner.stats[after].yields, 1)
+
+    def test_budget_own_time(self):
+        def run(validator, *args):
+            for i in range(5):
+                validator.checkpoint()
+                yield
+
+        validator = makeValidator('Quick', run, BUDGET=0.05)
+        runner = validation.Runner()
+        runner.validators = [validator]
+        for event in runner.start():
+            time.sleep(0.02)
+
+        self.assertFalse(runner.stats[validator].timedout)
+        self.assertEqual(len(validator.errors), 0)
+
+
+def busyWork(count):
+    return sum(i * i for i in range(count))
+
+
+class TestCosts(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'costs.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_predict(self):
+        costs = validation_costs.CostModel(self.filename)
+        for size in (100, 200, 400):
+            costs.record('Linear', size, 0.5 + size * 0.01, False)
+        costs.record('Failing', 100, 2.0, True)
+        costs.save()
+
+        costs = validation_costs.CostModel(self.filename)
+        self.assertAlmostEqual(costs.predict('Linear', 1000), 10.5)
+        self.assertAlmostEqual(costs.predict('Failing', 1000), 2.0)
+        self.assertEqual(costs.predict('Unknown', 1000), None)
+        self.assertGreater(costs.failureRate('Failing'), costs.failureRate('Linear'))
+        self.assertEqual(costs.order(['Linear', 'Failing', 'Unknown'], 1000), ['Unknown', 'Failing', 'Linear'])
+        self.assertEqual(costs.order(['Linear', 'Failing'], 1000, validation_costs.ORDER_FAILING), ['Failing', 'Linear'])
+
+    def test_runner(self):
+        def passing(validator, *args):
+            yield
+
+        def failing(validator, *args):
+            validator._errors.append((None, 'error'))
+            yield
+
+        costs = validation_costs.CostModel(None)
+        costs.record('Passing', 3, 0.5, False)
+        costs.record('Failing', 3, 0.6, True)
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Passing', passing), makeValidator('Failing', failing)]
+        scope = validation.Scope(query=lambda *args: [('|a', 'transform')] * 3)
+
+        etas = [runner.eta for event in runner.start(scope=scope, costs=costs, order=validation_costs.ORDER_FAILING, failfast=True)]
+
+        self.assertEqual([str(v) for v in runner.queue], ['Failing', 'Passing'])
+        self.assertEqual(list(runner.stats), [runner.queue[0]])
+        self.assertAlmostEqual(etas[0], 1.1, 2)
+        self.assertAlmostEqual(costs.failureRate('Failing'), (1.95 + 1) / (1.95 + 2))
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.history = validation_history.History(os.path.join(self.tempdir, 'history.db'))
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.tempdir)
+
+    def record(self, nodes, scene='a.mb', delay=0.0, others=(), failfast=False):
+        def run(validator, *args):
+            time.sleep(delay)
+            for node in nodes:
+                validator._errors.append((node, 'bad'))
+            yield
+
+        def runOthers(validator, *args):
+            for node in others:
+                validator._errors.append((node, 'other'))
+            yield
+
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Nodes', run)] + ([makeValidator('Others', runOthers)] if others else [])
+        list(runner.start(failfast=failfast))
+
+        return self.history.record(runner, scene)
+
+    def test_diff(self):
+        first = self.record(['|a', '|b'])
+        self.record(['|z'], scene='other.mb')
+        second = self.record(['|b', '|c.f[0:9]'])
+
+        self.assertEqual(self.history.previous(second), first)
+        self.assertEqual(self.history.previous(first), None)
+        diff = self.history.diff(first, second)
+        self.assertEqual([i.node for i in diff.new], ['|c.f[0:9]'])
+        self.assertEqual([i.node for i in diff.fixed], ['|a'])
+        self.assertEqual([i.node for i in diff.persisting], ['|b'])
+        self.assertEqual([r.id for r in self.history.runs('a.mb')], [second, first])
+
+    def test_partial(self):
+        first = self.record(['|a'], others=['|o'])
+        second = self.record(['|a', '|b'], others=['|o'], failfast=True)
+
+        diff = self.history.diff(first, second)
+        self.assertEqual([i.node for i in diff.new], ['|b'])
+        self.assertEqual(diff.fixed, [])
+        self.assertEqual([i.node for i in diff.persisting], ['|a'])
+
+    def test_regressions(self):
+        for i in range(3):
+            self.record([])
+        run = self.record([], delay=0.05)
+
+        self.assertEqual([r.validator for r in self.history.regressions(run)], ['Nodes'])
+        self.assertEqual(len(self.history.timings('Nodes')), 4)
+
+
+def multiplesOfSeven(chunk):
+    return [validation.Result('|n{}'.format(i), 'multiple of 7') for i in chunk if not i % 7], []
+
+
+class _Sevens(validation.Validator):
+    WORKERS = 4
+
+    def partition(self, scope):
+        return [range(i, i + 10) for i in range(1, 100, 10)]
+
+    map = staticmethod(multiplesOfSeven)
+
+
+class _SevensInProcesses(_Sevens):
+    WORKERS = 2
+    PROCESSES = True
+
+
+class TestMapReduce(unittest.TestCase):
+    def run_(self, validator):
+        runner = validation.Runner()
+        runner.validators = [validator]
+        events = list(runner.start())
+
+        self.assertEqual(validator.count, 10)
+        self.assertEqual([e.type for e in events].count(validation.EVENT_STEP), 10)
+        self.assertEqual([r.node for r in validator.errors], ['|n{}'.format(i) for i in range(7, 101, 7)])
+
+    def test_threads(self):
+        self.run_(_Sevens())
+
+    def test_processes(self):
+        self.run_(_SevensInProcesses())
+
+
+class TestSample(unittest.TestCase):
+    PAIRS = [('|m{}'.format(i), 'mesh') for i in range(300)] + [('|c{}'.format(i), 'nurbsCurve') for i in range(30)]
+
+    def test_stratify(self):
+        strata = {'mesh': range(100), 'curve': ['c{}'.format(i) for i in range(10)]}
+        nodes = validation_sample.stratify(strata, validation_sample.random.Random(1))
+
+        self.assertEqual(len(nodes), 110)
+        for size in (11, 55, 110):
+            curves = len([n for n in nodes[:size] if isinstance(n, str)])
+            self.assertLessEqual(abs(curves - size / 11.0), 1)
+
+    def test_estimate(self):
+        strata = {'mesh': ['a', 'b', 'c', 'd'], 'curve': ['e', 'f']}
+        counts = {'a': 2, 'b': 0, 'e': 1}
+
+        exact = validation_sample.estimate(strata, 'abcdef', counts)
+        self.assertEqual(exact, (3.0, 3.0, 3.0))
+        partial = validation_sample.estimate(strata, 'abe', counts)
+        self.assertEqual(partial.value, 6.0)
+        self.assertEqual(partial.low, 3.0)
+        self.assertGreater(partial.high, 6.0)
+        self.assertEqual(validation_sample.estimate(strata, 'ab', counts).high, float('inf'))
+
+    def test_runner(self):
+        def sample(validator, nodes):
+            for node in nodes:
+                if node.startswith('|m'):
+                    validator._errors.append(validation.Result(node + '.f[0]', 'error'))
+                time.sleep(0.001)
+                yield
+
+        def run(validator, *args):
+            validator._errors.append(validation.Result('|m0', 'error'))
+            yield
+
+        sampled = makeValidator('Sampled', run, sample=sample)
+        full = makeValidator('Full', run)
+        runner = validation.Runner()
+        runner.validators = [sampled, full]
+        sampler = validation_sample.Sampler(0.05, seed=1)
+        scope = validation.Scope(query=lambda *args: self.PAIRS)
+        list(runner.start(scope=scope, sampler=sampler))
+
+        estimate = sampler.estimates[sampled]
+        self.assertTrue(0 < estimate.checked < 330)
+        self.assertEqual(estimate.population, 330)
+        self.assertEqual(estimate.errors, (300.0, 300.0, 300.0))
+        self.assertLess(len(sampled.errors), 300)
+        self.assertEqual(len(full.errors), 1)
+        self.assertNotIn(full, sampler.estimates)
+
+    def test_builtin(self):
+        runner = validation.Runner()
+        runner.discover([validation.BUILTIN_DIR], validation.Manifest())
+        pairs = [('|m{}'.format(i), 'mesh') for i in range(3)]
+        scope = validation.Scope(query=lambda *args: pairs)
+        for mesh, nodetype in pairs:
+            scope.cache[('MeshData', mesh)] = validation_mesh.grid(100)
+            scope.cache[('UVData', mesh)] = validation_uv.layout(10, overlapping=0.2)
+            scope.cache[('LockedNormals', mesh)] = validation_mesh.np.ones(121, dtype=bool)
+        sampler = validation_sample.Sampler(1.0, seed=1)
+        list(runner.start(scope=scope, sampler=sampler))
+
+        self.assertTrue(runner.complete)
+        self.assertIn('UnlockedNormals', [str(v) for v in runner.validators])
+        self.assertEqual(set(str(v) for v in sampler.estimates), set(str(v) for v in runner.validators))
+        self.assertTrue(all(e.checked == 3 for e in sampler.estimates.values()))
+
+
+class TestReport(unittest.TestCase):
+    def run_(self, run):
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Many', run)]
+        jsonl, junit = six.StringIO(), six.StringIO()
+        reporters = [validation_report.JsonLinesReporter(jsonl), validation_report.JUnitReporter(junit)]
+        retained = []
+        try:
+            for event in validation_report.report(runner, runner.start(retain=False), reporters):
+                retained.append(len(list(runner.validators[0].errors)))
+        except validation.ValidatorError:
+            pass
+
+        return runner, [json.loads(line) for line in jsonl.getvalue().splitlines()], ElementTree.fromstring(junit.getvalue()), retained
+
+    def test_streaming(self):
+        def run(validator, *args):
+            for i in range(100):
+                for j in range(100):
+                    validator._errors.append(('|n{}_{}'.format(i, j), 'error'))
+                yield
+
+        runner, lines, xml, retained = self.run_(run)
+
+        self.assertEqual(len(runner.validators[0].errors), 10000)
+        self.assertLessEqual(max(retained), 100)
+        self.assertEqual(len([line for line in lines if line.get('severity') == 'error']), 10000)
+        self.assertEqual(lines[-2]['errors'], 10000)
+        self.assertEqual(len(xml.findall('testcase/failure')), 10000)
+
+    def test_crash(self):
+        def run(validator, *args):
+            validator._errors.append(('|n', 'error'))
+            validator._errors.append(('|m', None))
+            yield
+            raise RuntimeError('crashed')
+
+        runner, lines, xml, retained = self.run_(run)
+
+        self.assertEqual(lines[0]['node'], '|n')
+        self.assertEqual([f.text for f in xml.findall('testcase/failure')], ['|n', '|m'])
+        error, = xml.findall('testcase/error')
+        self.assertIn('crashed', error.get('message'))
+        self.assertEqual(error.get('type'), 'ValidatorError')
+
+
+class TestBench(unittest.TestCase):
+    def test_suite(self):
+        cases = validation_bench.suite(sizes=(10, 1000))
+
+        self.assertEqual(sorted((c.yields, c.results) for c in cases), [(10, 0), (10, 10), (10, 1000), (1000, 0)])
+        self.assertEqual(set(c.target for c in cases), set(['runner']))
+        cost, = validation_bench.costs(cases)
+        self.assertEqual(cost.target, 'runner')
+        self.assertLess(cost.perYield, 1e-4)
+
+        slower = [c._replace(overhead=c.overhead + 1.0) for c in cases]
+        self.assertEqual(validation_bench.compare(cases, cases), [])
+        self.assertEqual(len(validation_bench.compare(slower, cases)), 4)
+
+    def test_old_baseline(self):
+        filename = os.path.join(tempfile.mkdtemp(), 'baseline.json')
+        with open(filename, 'w') as fh:
+            json.dump([{'target': 'runner', 'yields': 10, 'results': 0, 'seconds': 0.1, 'overhead': 0.01}], fh)
+
+        case, = validation_bench.load(filename)
+        shutil.rmtree(os.path.dirname(filename))
+        self.assertEqual((case.paints, case.strips, case.paint), (0, 0, 0.0))
+
+    @unittest.skipUnless(hasModule('PySide'), 'needs PySide')
+    def test_window(self):
+        case = validation_bench.windowCase(1000, 0)
+
+        # -- Progress is shown at most once per frame and only repaints the strip
+        self.assertGreater(case.strips, 0)
+        self.assertLess(case.paints, 1000)
+        self.assertLess(case.paints - case.strips, 20)
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        tracing.disable()
+        shutil.rmtree(self.tempdir)
+
+    def test_disabled(self):
+        span = tracing.begin('nothing')
+        tracing.end(span)
+
+        self.assertEqual(span, None)
+        self.assertFalse(tracing.enabled())
+
+    def test_runner(self):
+        def run(validator, *args):
+            for i in range(3):
+                validator._errors.append(('|n{}'.format(i), 'error'))
+                yield
+
+        tracer = tracing.enable(size=100)
+        runner = validation.Runner()
+        runner.validators = [makeValidator('Traced', run)]
+        list(runner.start())
+        filename = os.path.join(self.tempdir, 'trace.json.gz')
+        tracing.save(filename)
+
+        with gzip.open(filename) as fh:
+            events = json.loads(fh.read().decode('utf-8'))['traceEvents']
+        self.assertEqual([(e['name'], e['cat']) for e in events], [('Traced', 'step')] * 4 + [('Traced', 'validator')])
+        self.assertEqual(events[-1]['args'], {'yields': 3, 'errors': 3, 'warnings': 0})
+        self.assertTrue(all(e['ph'] == 'X' and e['dur'] >= 0 for e in events))
+
+        for i in range(200):
+            tracing.end(tracing.begin('span', args={'i': i}))
+        self.assertEqual(len(tracer), 100)
+        self.assertEqual(tracer.events()[0]['args'], {'i': 100})
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_profile(self):
+        def run(validator, *args):
+            for i in range(3):
+                busyWork(20000)
+                yield
+
+        validator = makeValidator('Profiled', run)
+        profiler = validation_profile.Profiler(self.tempdir)
+        runner = validation.Runner()
+        runner.validators = [validator]
+        list(runner.start(profiler=profiler))
+
+        self.assertIn('busyWork', [spot.function.split(':')[-1] for spot in profiler.hotspots(validator)])
+        self.assertTrue(os.path.isfile(os.path.join(self.tempdir, 'Profiled.pstats')))
+        with open(os.path.join(self.tempdir, 'Profiled.folded')) as fh:
+            stacks = fh.read()
+        self.assertIn(':busyWork', stacks)
+
+
+def fakeLoader(filename):
+    """Stands in for opening a scene, the scene is a text file of node names"""
+    if 'crash' in filename:
+        os._exit(3)
+    with open(filename) as fh:
+        os.environ['UTOOLS_TEST_SCENE'] = fh.read()
+
+
+class TestBatch(unittest.TestCase):
+    VALIDATOR = (
+        'import os\n'
+        'from utools.maya.validation import Validator\n'
+        'class BadNodes(Validator):\n'
+        '    def run(self, *args):\n'
+        '        for node in os.environ["UTOOLS_TEST_SCENE"].split():\n'
+        '            if node.startswith("bad"):\n'
+        '                self._errors.append(Validator.Result(node, "bad node"))\n'
+        '            yield\n'
+    )
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.validators = os.path.join(self.tempdir, 'validators')
+        os.mkdir(self.validators)
+        with open(os.path.join(self.validators, 'badnodes.py'), 'w') as fh:
+            fh.write(self.VALIDATOR)
+
+        self.scenes = []
+        for i in range(6):
+            scene = os.path.join(self.tempdir, 'scene{}.txt'.format(i))
+            with open(scene, 'w') as fh:
+                fh.write('good bad{}'.format(i) if i % 2 else 'good other')
+            self.scenes.append(scene)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_validate(self):
+        report = validation_batch.validate(
+            self.scenes + [os.path.join(self.tempdir, 'missing.txt')],
+            [self.validators],
+            processes=2,
+            loader=fakeLoader,
+            manifest=os.path.join(self.tempdir, 'manifest.json'),
+        )
+
+        self.assertEqual(len(report), 7)
+        self.assertEqual(report.errors, 3)
+        self.assertEqual(len(report.failed), 4)
+        self.assertEqual(report.validatorTimings()['BadNodes']['scenes'], 6)
+        self.assertEqual(len(set(s['pid'] for s in report.scenes)), 2)
+
+    def test_maxtasks(self):
+        report = validation_batch.validate(
+            self.scenes,
+            [self.validators],
+            processes=1,
+            loader=fakeLoader,
+            manifest=os.path.join(self.tempdir, 'manifest.json'),
+            maxtasks=2,
+        )
+
+        self.assertEqual(len(report), 6)
+        self.assertEqual(len(set(s['pid'] for s in report.scenes)), 3)
+
+    def test_crash(self):
+        crash = os.path.join(self.tempdir, 'crash.txt')
+        report = validation_batch.validate(
+            [crash] + self.scenes[:3],
+            [self.validators],
+            processes=2,
+            loader=fakeLoader,
+            manifest=os.path.join(self.tempdir, 'manifest.json'),
+        )
+
+        self.assertEqual(len(report), 4)
+        self.assertEqual(sorted(report.failed), sorted([crash, self.scenes[1]]))
+        self.assertIn('died', [s for s in report.scenes if s['scene'] == crash][0]['error'])
+        # -- Only the crashed worker is replaced
+        self.assertEqual(len(set(s['pid'] for s in report.scenes)), 3)
+
+
+class TestFix(unittest.TestCase):
+    def test_fixable(self):
+        run = lambda v, *args: iter(())
+        self.assertFalse(makeValidator('NoFix', run).fixable)
+        self.assertTrue(makeValidator('Fix', run, fix=lambda v, results: None).fixable)
+        self.assertTrue(makeValidator('Action', run, action=lambda v: None).fixable)
+
+    def test_group(self):
+        Result = validation.Validator.Result
+        results = [
+            Result('|a|aShape.f[0:3]', 'bad'),
+            Result('|b', 'bad'),
+            Result('|a|aShape.e[2]', 'bad'),
+            Result(None, 'scene'),
+        ]
+        types = {'|a|aShape': 'mesh', '|b': 'transform'}
+        calls = []
+
+        def nodeType(node):
+            calls.append(node)
+            return types[node]
+
+        groups = validation_fix.groupResults(results, nodeType)
+
+        self.assertEqual(groups['mesh'], [results[0], results[2]])
+        self.assertEqual(groups['transform'], [results[1]])
+        self.assertEqual(groups[None], [results[3]])
+        self.assertEqual(sorted(calls), ['|a|aShape', '|b'])
+
+    def test_fix(self):
+        Result = validation.Validator.Result
+        results = [Result('|a', 'bad'), Result('|b', 'bad'), Result('|c.f[1]', 'bad')]
+        types = {'|a': 'transform', '|b': 'mesh', '|c': 'nurbsCurve'}
+        calls = []
+
+        def run(validator, *args):
+            validator._errors.extend(results)
+            yield
+
+        action = makeValidator('Action', run, action=lambda v: calls.append('action'))
+        grouped = makeValidator('Grouped', run, fix=lambda v, group: calls.append(len(group)))
+        for validator in (action, grouped):
+            list(validator.run())
+            self.assertEqual(validation_fix.fix(validator, types.get), set(['|a', '|b', '|c']))
+
+        self.assertEqual(calls, ['action', 1, 1, 1])
+
+
+class TestScope(unittest.TestCase):
+    PAIRS = [
+        ('|a', 'transform'),
+        ('|a|aShape', 'mesh'),
+        ('|b', 'transform'),
+        ('|b|bShape', 'mesh'),
+        ('lambert1', 'lambert'),
+    ]
+
+    def test_shared(self):
+        queries = []
+
+        def query(selection, references, nodes):
+            queries.append((selection, references, nodes))
+            return self.PAIRS
+
+        found = []
+
+        def run(validator, *args):
+            found.append(validator.scope.nodes('mesh'))
+            yield
+
+        runner = validation.Runner()
+        runner.validators = [makeValidator('MeshA', run), makeValidator('MeshB', run)]
+        scope = validation.Scope(True, False, query=query)
+        list(runner.start(scope=scope))
+
+        self.assertEqual(queries, [(True, False, None)])
+        self.assertEqual(found, [['|a|aShape', '|b|bShape']] * 2)
+        self.assertEqual(len(scope), 5)
+        self.assertEqual(scope.nodes('transform', 'lambert'), ['|a', '|b', 'lambert1'])
+
+    def test_unused(self):
+        runner = validation.Runner()
+        runner.validators = [makeValidator('NoScope', lambda v, *args: iter([None]))]
+        list(runner.start())
+
+        self.assertFalse(runner.scope.resolved)
+
+
+class TestMeshChecks(unittest.TestCase):
+    def pairs(self, pairs):
+        return sorted(map(tuple, pairs.tolist()))
+
+    def test_from_sequence(self):
+        import array
+
+        values = validation_mesh.fromSequence(array.array('i', [4, 3, 5]))
+        self.assertEqual(values.dtype, validation_mesh.np.int64)
+        self.assertEqual(values.tolist(), [4, 3, 5])
+
+    def test_edges(self):
+        data = validation_mesh.MeshData([3, 3, 3], [0, 1, 2, 1, 0, 3, 0, 1, 4])
+        self.assertEqual(self.pairs(validation_mesh.nonManifoldEdges(data)), [(0, 1)])
+
+        data = validation_mesh.MeshData([4, 4], [0, 1, 4, 3, 1, 2, 5, 4])
+        self.assertEqual(self.pairs(validation_mesh.flippedEdges(data)), [])
+        data = validation_mesh.MeshData([4, 4], [0, 1, 4, 3, 4, 5, 2, 1])
+        self.assertEqual(self.pairs(validation_mesh.flippedEdges(data)), [(1, 4)])
+
+    def test_faces(self):
+        points = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (2, 0, 0), (1, 0, 0), (1, 1, 0), (0, 2, 0), (1, 2, 0)]
+        data = validation_mesh.MeshData([3, 3, 3, 3, 5], [0, 1, 2, 2, 1, 0, 0, 1, 3, 1, 4, 5, 0, 1, 5, 7, 6], points)
+
+        self.assertEqual(validation_mesh.laminaFaces(data).tolist(), [0, 1])
+        self.assertEqual(validation_mesh.zeroAreaFaces(data).tolist(), [2, 3])
+        self.assertEqual(self.pairs(validation_mesh.zeroLengthEdges(data)), [(1, 4)])
+        self.assertEqual(validation_mesh.ngons(data).tolist(), [4])
+        self.assertEqual(validation_mesh.unlockedNormals([True, False, False]).tolist(), [1, 2])
+
+    def test_components(self):
+        self.assertEqual(validation_mesh.ranges([9, 3, 0, 1, 2, 2]), [(0, 3), (9, 9)])
+        self.assertEqual(validation_mesh.components('|m', 'f', []), [])
+        self.assertEqual(validation_mesh.components('|m', 'f', [5, 0, 1]), ['|m.f[0:1]', '|m.f[5]'])
+
+    def test_grid(self):
+        data = validation_mesh.grid(100)
+        for name, check in validation_mesh.CHECKS:
+            self.assertEqual(len(check(data)), 0, name)
+
+    def test_builtin(self):
+        runner = validation.Runner()
+        runner.discover([validation.BUILTIN_DIR], validation.Manifest())
+        names = [str(v) for v in runner.validators]
+        self.assertIn('NGons', names)
+        self.assertFalse([name for name in names if name.startswith('_')])
+
+        runner.validators = [v for v in runner.validators if str(v) == 'NGons']
+        scope = validation.Scope(query=lambda *args: [('|a|aShape', 'mesh')])
+        scope.cache[('MeshData', '|a|aShape')] = validation_mesh.MeshData([4, 5, 6, 3], range(18))
+        list(runner.start(scope=scope))
+
+        self.assertEqual([tuple(r) for r in runner.validators[0].errors], [('|a|aShape.f[1:2]', 'N-gon')])
+
+    def test_empty_scope(self):
+        runner = validation.Runner()
+        runner.discover([validation.BUILTIN_DIR], validation.Manifest())
+        runner.validators = [v for v in runner.validators if str(v) == 'NGons']
+        list(runner.start(scope=validation.Scope(query=lambda *args: [])))
+
+        self.assertTrue(runner.complete)
+        self.assertEqual(runner.errors, 0)
+
+
+class TestUVChecks(unittest.TestCase):
+    def quads(self, corners):
+        """UVData of one quad shell per `(u, v)` lower corner, each 0.1 wide"""
+        u, v = [], []
+        for x, y in corners:
+            u += [x, x + 0.1, x + 0.1, x]
+            v += [y, y, y + 0.1, y + 0.1]
+
+        return validation_uv.UVData([4] * len(corners), range(len(u)), u, v, [i // 4 for i in range(len(u))])
+
+    def test_overlap(self):
+        data = self.quads([(0.0, 0.0), (0.05, 0.05), (0.3, 0.0), (0.5, 0.5)])
+
+        self.assertEqual(validation_uv.overlappingFaces(data).tolist(), [0, 1])
+        self.assertEqual(dict((k, v.tolist()) for k, v in validation_uv.overlappingShells(data).items()), {0: [0], 1: [1]})
+
+    def test_out_of_bounds(self):
+        data = self.quads([(0.0, 0.0), (0.95, 0.5), (-0.5, 0.5), (0.5, 0.5)])
+
+        self.assertEqual(validation_uv.outOfBoundsFaces(data).tolist(), [1, 2])
+        self.assertEqual(validation_uv.overlappingFaces(data).tolist(), [])
+
+    def test_layout(self):
+        data = validation_uv.layout(400, overlapping=0.05)
+        found = validation_uv.overlappingFaces(data)
+
+        self.assertEqual(len(found), 40)
+        self.assertEqual(found.tolist(), list(range(40)))
+
+    def test_empty_scope(self):
+        runner = validation.Runner()
+        runner.discover([validation.BUILTIN_DIR], validation.Manifest())
+        runner.validators = [v for v in runner.validators if str(v) in ('UVOverlap', 'UVOutOfBounds')]
+        list(runner.start(scope=validation.Scope(query=lambda *args: [])))
+
+        self.assertTrue(runner.complete)
+        self.assertEqual(runner.errors, 0)
+
+
+class TestCli(unittest.TestCase):
+    VALIDATOR = (
+        'from utools.maya.validation import Validator\n'
+        'class CliCheck(Validator):\n'
+        '    def run(self, *args):\n'
+        '        self._errors.append(Validator.Result("|pCube1", "cli error"))\n'
+        '        yield\n'
+    )
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tempdir, 'clicheck.py'), 'w') as fh:
+            fh.write(self.VALIDATOR)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_json(self):
+        output = os.path.join(self.tempdir, 'out.json')
+        manifest = os.path.join(self.tempdir, 'manifest.json')
+        code = validation.cli(['--dirs', self.tempdir, '--format', 'json', '--output', output, '--manifest', manifest])
+
+        self.assertEqual(code, 1)
+        with open(output) as fh:
+            lines = [json.loads(line) for line in fh]
+        self.assertIn(
+            {'validator': 'CliCheck', 'severity': 'error', 'node': '|pCube1', 'message': 'cli error'},
+            lines
+        )
+        self.assertTrue(lines[-1]['errors'] >= 1)
+
+
+class TestRemote(unittest.TestCase):
+    VALIDATORS = (
+        'from utools.maya.validation import Validator\n'
+        'class RemoteCheck(Validator):\n'
+        '    def run(self, *args):\n'
+        '        self._count = 2\n'
+        '        print("not part of the protocol")\n'
+        '        self._errors.append(Validator.Result("|snapshot|mesh.f[3]", "remote error"))\n'
+        '        yield\n'
+        '        self._warnings.append(Validator.Result(None, "remote warning"))\n'
+        '        yield\n'
+        'class Skipped(Validator):\n'
+        '    def run(self, *args):\n'
+        '        self._errors.append(Validator.Result(None, "should not run"))\n'
+        '        yield\n'
+    )
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tempdir, 'remotecheck.py'), 'w') as fh:
+            fh.write(self.VALIDATORS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_worker(self):
+        runner = validation_remote.RemoteRunner(
+            [sys.executable, '-m', 'utools.maya.validation_remote'],
+            snapshot=lambda nodes: None,
+            resolve=lambda uuid, node: node.replace('|snapshot', '|live') if node else node,
+        )
+        runner.discover([self.tempdir], validation.Manifest(os.path.join(self.tempdir, 'manifest.json')))
+        check, skipped = runner.validators
+        skipped.enabled = False
+
+        events = [e for e in runner.start() if e.type != validation.EVENT_IDLE]
+
+        # -- Steps without results are coalesced by the worker
+        self.assertEqual([events[0].type, events[-1].type], ['start', 'finish'])
+        self.assertEqual([tuple(r) for r in check.errors], [('|live|mesh.f[3]', 'remote error')])
+        self.assertEqual([r.message for r in check.warnings], ['remote warning'])
+        self.assertEqual(check.count, 2)
+        self.assertEqual(runner.stats[check].yields, 2)
+        self.assertEqual(len(skipped.errors), 0)
+        self.assertFalse(runner.running)
+
+
+class TestManifest(unittest.TestCase):
+    VALIDATORS = (
+        'import os\n'
+        'from utools.maya.validation import Validator\n'
+        'open(os.path.join(os.path.dirname(__file__), "imported"), "w").close()\n'
+        'class Base(Validator):\n'
+        '    """Base checks"""\n'
+        'class Enabled(Base):\n'
+        '    def run(self, *args):\n'
+        '        yield\n'
+        'class Disabled(Validator):\n'
+        '    ENABLED = False\n'
+        'class Helper(object):\n'
+        '    pass\n'
+    )
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.validators = os.path.join(self.tempdir, 'validators')
+        os.mkdir(self.validators)
+        with open(os.path.join(self.validators, 'lazychecks.py'), 'w') as fh:
+            fh.write(self.VALIDATORS)
+        self.manifest = os.path.join(self.tempdir, 'manifest.json')
+
+    def tearDown(self):
+        sys.modules.pop('lazychecks', None)
+        shutil.rmtree(self.tempdir)
+
+    def test_lazy(self):
+        runner = validation.Runner()
+        runner.discover([self.validators], validation.Manifest(self.manifest))
+        imported = os.path.join(self.validators, 'imported')
+
+        self.assertEqual([str(v) for v in runner.validators], ['Base', 'Enabled', 'Disabled'])
+        self.assertEqual(runner.validators[0].doc, 'Base checks')
+        self.assertFalse(runner.validators[2].enabled)
+        self.assertFalse(os.path.exists(imported))
+
+        runner.validators[0].enabled = False
+        list(runner.start())
+
+        self.assertTrue(os.path.exists(imported))
+        self.assertEqual([v.loaded for v in runner.validators], [False, True, False])
+
+    def test_cached(self):
+        validation.Runner().discover([self.validators], validation.Manifest(self.manifest))
+        with open(self.manifest) as fh:
+            data = json.load(fh)
+        for entry in data['files'].values():
+            entry['classes'] = [{'name': 'Cached', 'doc': '', 'bases': ['Validator'], 'attrs': {}}]
+        with open(self.manifest, 'w') as fh:
+            json.dump(data, fh)
+
+        runner = validation.Runner()
+        runner.discover([self.validators], validation.Manifest(self.manifest))
+
+        self.assertEqual([str(v) for v in runner.validators], ['Cached'])
+
+    def test_inherited(self):
+        shared = os.path.join(self.tempdir, 'shared')
+        os.mkdir(shared)
+        with open(os.path.join(shared, 'sharedbase.py'), 'w') as fh:
+            fh.write('from utools.maya.validation import Validator\nclass SharedBase(Validator):\n    ENABLED = False\n')
+        with open(os.path.join(self.validators, 'derived.py'), 'w') as fh:
+            fh.write(
+                'from utools.maya.validation import Validator as Check\n'
+                'from sharedbase import SharedBase\n'
+                'from lazychecks import Disabled\n'
+                'class Aliased(Check):\n'
+                '    pass\n'
+                'class External(SharedBase):\n'
+                '    pass\n'
+                'class Child(Disabled):\n'
+                '    pass\n'
+            )
+        with open(os.path.join(self.validators, 'parsed.py'), 'w') as fh:
+            fh.write('from lazychecks import Disabled\nclass Parsed(Disabled):\n    pass\n')
+        sys.path.insert(0, shared)
+        sys.path.insert(0, self.validators)
+        try:
+            runner = validation.Runner()
+            runner.discover([self.validators], validation.Manifest(self.manifest))
+            self.assertNotIn('parsed', sys.modules)
+        finally:
+            sys.path.remove(shared)
+            sys.path.remove(self.validators)
+            for name in ('sharedbase', 'derived'):
+                sys.modules.pop(name, None)
+
+        enabled = dict((str(v), v.enabled) for v in runner.validators)
+        self.assertEqual(enabled, {
+            'Aliased': True, 'External': False, 'Child': False, 'Base': True, 'Enabled': True, 'Disabled': False,
+            'Parsed': False})
+
+
+class TestImportTime(unittest.TestCase):
+    BUDGET = 0.25
+    HEAVY = ('PySide', 'shiboken', 'pysideuic', 'xml.etree', 'numpy', 'utools.maya.widgets')
+    MODULES = ('utools.maya.validation', 'utools.maya.validation_cache', 'utools.maya.validation_bench', 'utools.maya.tracing')
+
+    def importModule(self, module):
+        code = (
+            'import sys, time, json\n'
+            'start = time.time()\n'
+            'import {}\n'
+            'print(json.dumps([time.time() - start, sorted(sys.modules)]))\n'
+        ).format(module)
+        output = subprocess.check_output([sys.executable, '-c', code])
+
+        return json.loads(output.decode('utf-8'))
+
+    def test_heavy_modules(self):
+        for module in self.MODULES:
+            duration, modules = self.importModule(module)
+            heavy = [m for m in modules if m.startswith(self.HEAVY)]
+            self.assertEqual(heavy, [], '{} imported {}'.format(module, heavy))
+
+    @benchmark
+    def test_budget(self):
+        for module in self.MODULES:
+            duration, modules = self.importModule(module)
+            self.assertLess(duration, self.BUDGET, '{} took {:.3f}s to import'.format(module, duration))
 
 
 if __name__ == '__main__':
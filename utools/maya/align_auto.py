@@ -26,6 +26,11 @@ use the vertex normal and set all selected faces to that normal.
 from maya import OpenMaya as om
 from maya import OpenMayaMPx as omx
 
+try:
+    from utools.maya import tracing
+except ImportError:
+    import tracing
+
 
 class AlignAutoCommand(omx.MPxCommand):
     def __init__(self):
@@ -43,6 +48,7 @@ class AlignAutoCommand(omx.MPxCommand):
         return True
 
     def doIt(self, args):
+        command = tracing.begin('uAlignAuto', 'normals')
         border = []
         facelist = []
         
@@ -52,9 +58,11 @@ class AlignAutoCommand(omx.MPxCommand):
         dag = om.MDagPath()
         comp = om.MObject()
         if selection.length() == 0:
+            tracing.end(command)
             return
 
         ## -- Get last component
+        span = tracing.begin('uAlignAuto.targetNormal', 'normals')
         selection.getDagPath(selection.length() - 1, dag, comp)
         
         if comp.apiType() == om.MFn.kMeshPolygonComponent:
@@ -77,6 +85,7 @@ class AlignAutoCommand(omx.MPxCommand):
             while not vertiter.isDone():
                 vertiter.getNormal(self._normal)
                 vertiter.next()
+        tracing.end(span)
 
         seliter = om.MItSelectionList(selection, om.MFn.kMeshPolygonComponent)
         dag = om.MDagPath()
@@ -91,14 +100,17 @@ class AlignAutoCommand(omx.MPxCommand):
             self._currentlocked = [(n, self._mesh.isNormalLocked(n)) for n in nmlids]
 
             ## -- Get our selected faces
+            span = tracing.begin('uAlignAuto.faces', 'normals')
             faceiter = om.MItMeshPolygon(dag, comp)
             while not faceiter.isDone():
                 facelist.append(faceiter.index())
                 faceiter.next()
 
             faceset = set(facelist)
+            tracing.end(span, {'faces': len(faceset)})
             
             ## -- Find normals of soft edges in selection
+            span = tracing.begin('uAlignAuto.edges', 'normals')
             eiter = om.MItMeshEdge(dag)
             while not eiter.isDone():
                 faces = om.MIntArray(2)
@@ -136,12 +148,15 @@ class AlignAutoCommand(omx.MPxCommand):
                                 self._currentfaceverts.append((faceidx, eiter.index(1), vecb))
                 
                 eiter.next()
+            tracing.end(span, {'vertices': len(self._verts), 'faceVertices': len(self._faceverts)})
         
             seliter.next()
 
         self.redoIt()
+        tracing.end(command)
 
     def undoIt(self):
+        span = tracing.begin('uAlignAuto.undoIt', 'normals')
         verts = []
         for vtx, nml in self._currentverts:
             if vtx in verts:
@@ -164,8 +179,10 @@ class AlignAutoCommand(omx.MPxCommand):
         arr = om.MIntArray()
         util.createIntArrayFromList(unlocked, arr)
         self._mesh.unlockVertexNormals(arr)
+        tracing.end(span)
 
     def redoIt(self):
+        span = tracing.begin('uAlignAuto.redoIt', 'normals')
         for vtx, nml in self._verts:
             nml = nml or self._normal
             self._mesh.setVertexNormal(self._normal, vtx)
@@ -173,6 +190,7 @@ class AlignAutoCommand(omx.MPxCommand):
         for face, vtx, nml in self._faceverts:
             nml = nml or self._normal
             self._mesh.setFaceVertexNormal(nml, face, vtx)
+        tracing.end(span)
 
     @staticmethod
     def creator():
@@ -22,6 +22,11 @@
 from maya import OpenMaya as om
 from maya import OpenMayaMPx as omx
 
+try:
+    from utools.maya import tracing
+except ImportError:
+    import tracing
+
 
 class AlignRoundedCommand(omx.MPxCommand):
     """AlignRounded takes the selected edges and aligns the normals to the added face vectors. 
@@ -41,6 +46,7 @@ class AlignRoundedCommand(omx.MPxCommand):
         return True
 
     def doIt(self, args):
+        command = tracing.begin('uAlignRounded', 'normals')
         self._verts = {}
         self._faceverts = {}
         border = []
@@ -62,6 +68,7 @@ class AlignRoundedCommand(omx.MPxCommand):
             self._currentlocked = [(n, mesh.isNormalLocked(n)) for n in nmlids]
             
             ## -- Get all of our border edges:
+            span = tracing.begin('uAlignRounded.borders', 'normals')
             eiter = om.MItMeshEdge(dag)
             while not eiter.isDone():
                 if eiter.onBoundary():
@@ -69,7 +76,10 @@ class AlignRoundedCommand(omx.MPxCommand):
                 
                 eiter.next()
             
+            tracing.end(span, {'borders': len(border)})
+
             ## -- Find normals of soft edges in selection
+            span = tracing.begin('uAlignRounded.softEdges', 'normals')
             eiter = om.MItMeshEdge(dag, comp)
             while not eiter.isDone():
                 faces = om.MIntArray()
@@ -90,7 +100,10 @@ class AlignRoundedCommand(omx.MPxCommand):
                 
                 eiter.next()
             
+            tracing.end(span, {'vertices': len(self._verts)})
+
             ## -- Find all vertices that are not connected to a hard edge
+            span = tracing.begin('uAlignRounded.hardEdges', 'normals')
             viter = om.MItMeshVertex(dag)
             keys = self._verts.keys()
             
@@ -114,9 +127,11 @@ class AlignRoundedCommand(omx.MPxCommand):
                             break
                 
                 viter.next()
+            tracing.end(span, {'faceVertices': len(self._faceverts)})
         
             seliter.next()
 
+        span = tracing.begin('uAlignRounded.storeNormals', 'normals')
         self._mesh = mesh
         for idx, vec in self._verts.iteritems():
             normal = om.MVector()
@@ -129,11 +144,13 @@ class AlignRoundedCommand(omx.MPxCommand):
                 normal = om.MVector()
                 self._mesh.getFaceVertexNormal(f, idx, normal)
                 self._currentfacenormals.append((f, idx, normal))
-
+        tracing.end(span)
 
         self.redoIt()
+        tracing.end(command)
 
     def undoIt(self):
+        span = tracing.begin('uAlignRounded.undoIt', 'normals')
         for idx, normal in self._currentnormals:
             self._mesh.setVertexNormal(normal, idx)
 
@@ -151,8 +168,10 @@ class AlignRoundedCommand(omx.MPxCommand):
         arr = om.MIntArray()
         util.createIntArrayFromList(unlocked, arr)
         self._mesh.unlockVertexNormals(arr)
+        tracing.end(span)
 
     def redoIt(self):
+        span = tracing.begin('uAlignRounded.redoIt', 'normals')
         for idx, vec in self._verts.iteritems():
             self._mesh.setVertexNormal(vec, idx)
         
@@ -161,6 +180,7 @@ class AlignRoundedCommand(omx.MPxCommand):
             flist = data[1]
             for f in flist:
                 self._mesh.setFaceVertexNormal(normal, f, idx)
+        tracing.end(span)
 
     @staticmethod
     def creator():
@@ -19,15 +19,13 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 ##################################################################################################
 
-import xml.etree.ElementTree as xml
-from cStringIO import StringIO
+"""Common Maya helpers
+
+Qt, shiboken and pysideuic are imported when first needed so importing this module stays cheap.
+"""
 
 from maya import cmds
 from maya import mel
-import maya.OpenMayaUI as apiUI
-import shiboken
-from PySide import QtGui
-import pysideuic
 
 
 def getMayaWindow():
@@ -35,6 +33,10 @@ def getMayaWindow():
     Get the main Maya window as a QtGui.QMainWindow instance
     @return: QtGui.QMainWindow instance of the top level Maya windows
     """
+    import maya.OpenMayaUI as apiUI
+    import shiboken
+    from PySide import QtGui
+
     ptr = apiUI.MQtUtil.mainWindow()
     if ptr is not None:
         return shiboken.wrapInstance(long(ptr), QtGui.QWidget)
@@ -44,6 +46,11 @@ def loadUiType(uiFile):
     Pyside lacks the "loadUiType" command, so we have to convert the ui file to py code in-memory first
     and then execute it in a special frame to retrieve the form_class.
     """
+    import xml.etree.ElementTree as xml
+    from cStringIO import StringIO
+    from PySide import QtGui
+    import pysideuic
+
     parsed = xml.parse(uiFile)
     widget_class = parsed.find('widget').get('class')
     form_class = parsed.find('class').text
@@ -54,7 +61,7 @@ def loadUiType(uiFile):
         
         pysideuic.compileUi(f, o, indent=0)
         pyc = compile(o.getvalue(), '<string>', 'exec')
-        exec pyc in frame
+        exec(pyc, frame)
         
         #Fetch the base_class and form class based on their type in the xml from designer
         form_class = frame['Ui_%s'%form_class]
@@ -63,4 +70,4 @@ def loadUiType(uiFile):
 
 def focusViewport():
     mel.eval('findNewCurrentModelView;')
-    cmds.showWindow('MayaWindow')
\ No newline at end of file
+    cmds.showWindow('MayaWindow')
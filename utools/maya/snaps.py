@@ -107,3 +107,9 @@ def setUVGrid(spacing):
         cmds.optionVar(fv=(var, v))
     
     common.focusViewport()
+
+def main():
+    """Shows the snaps window, Qt is only imported once this is called"""
+    from utools.maya.widgets import snapswindow
+
+    return snapswindow.main()
@@ -0,0 +1,136 @@
+"""Event tracing
+
+An opt-in timeline of the normals commands, validator runs and window
+updates, written as Chrome trace JSON that chrome://tracing and Perfetto open.
+
+>>> from utools.maya import tracing
+>>> tracing.enable()
+>>> cmds.uAlignRounded()
+>>> validation.cli(['--builtin'])
+>>> tracing.save('publish.json.gz')
+
+Instrumented code brackets its work with `begin` and `end`.  While tracing is
+disabled `begin` returns None straight away and `end` ignores it, so the
+calls can stay in hot loops.  Spans are kept as complete events in a ring
+buffer of the latest `DEFAULT_SIZE`, long sessions never grow it and never
+leave an end without its begin.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+DEFAULT_SIZE = 1 << 18
+
+timer = getattr(time, 'perf_counter', time.time)
+
+TRACER = None
+
+
+class Tracer(object):
+    """Ring buffer of complete `(name, category, start, end, thread, args)` spans
+
+    :param size: Number of spans kept, older ones are dropped
+    """
+    def __init__(self, size=DEFAULT_SIZE):
+        self._spans = deque(maxlen=size)
+        self._pid = os.getpid()
+
+    def __repr__(self):
+        return '<Tracer {}/{} spans>'.format(len(self._spans), self._spans.maxlen)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def add(self, name, category, start, end, args=None):
+        self._spans.append((name, category, start, end, threading.current_thread().ident, args))
+
+    def clear(self):
+        self._spans.clear()
+
+    def events(self):
+        """Returns the spans as Chrome trace events, names and args are turned into strings here
+        rather than while tracing
+        """
+        events = []
+        for name, category, start, end, thread, args in list(self._spans):
+            event = {
+                'name': str(name),
+                'cat': category,
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': self._pid,
+                'tid': thread,
+            }
+            if args:
+                event['args'] = dict(
+                    (key, value if isinstance(value, (int, float, bool)) else str(value)) for key, value in args.items())
+            events.append(event)
+
+        return events
+
+    def save(self, filename):
+        """Writes the trace to `filename`, gzipped if it ends with `.gz`"""
+        import json
+        import gzip
+
+        data = json.dumps({'traceEvents': self.events(), 'displayTimeUnit': 'ms'})
+        if filename.endswith('.gz'):
+            with gzip.open(filename, 'wb') as fh:
+                fh.write(data.encode('utf-8'))
+        else:
+            with open(filename, 'w') as fh:
+                fh.write(data)
+
+
+def enable(size=DEFAULT_SIZE):
+    """Starts tracing into a new ring buffer of `size` spans, returns the `Tracer`"""
+    global TRACER
+    TRACER = Tracer(size)
+
+    return TRACER
+
+
+def disable():
+    """Stops tracing, returns the `Tracer` that was recording"""
+    global TRACER
+    tracer, TRACER = TRACER, None
+
+    return tracer
+
+
+def enabled():
+    return TRACER is not None
+
+
+def begin(name, category='', args=None):
+    """Starts a span, pass what it returns to `end`
+
+    :param name: Name of the span, anything with a useful `str`
+    :param args: Dict shown with the span
+    """
+    if TRACER is None:
+        return None
+
+    return name, category, timer(), args
+
+
+def end(span, args=None):
+    """Ends a span started by `begin`, `args` are added to the ones it started with"""
+    if span is None or TRACER is None:
+        return
+
+    name, category, start, first = span
+    if args and first:
+        first = dict(first, **args)
+    TRACER.add(name, category, start, timer(), first or args)
+
+
+def save(filename):
+    """Writes what the current tracer recorded to `filename`"""
+    if TRACER is None:
+        raise RuntimeError('Tracing is not enabled')
+
+    TRACER.save(filename)
@@ -4,76 +4,81 @@
 >>> runner = validation.Runner()
 >>> runner.discover('path/to/tests')
 >>> runner.start()
+
+The runner has no Qt dependency and can be used headless, for example as a
+submission gate on a farm node:
+
+    mayapy -m utools.maya.validation --dirs path/to/tests --scene file.mb --format junit
+
+The window lives in `utools.maya.widgets.validationwindow`.
+
+Discovery parses validator modules instead of importing them and keeps what
+it found in a manifest, modules are only imported once an enabled validator is
+about to run.
+
+The validators shipped with utools live in `BUILTIN_DIR`, discover it along
+with your own directories to use them.
+
+Results of validators implementing `Validator.digest` can be cached on disk, see
+`utools.maya.validation_cache`.  Validators can be profiled individually, see
+`utools.maya.validation_profile`.  Durations are recorded to predict an ETA
+and to order runs, see `utools.maya.validation_costs`.  Validation can run in a
+background mayapy against a snapshot of the scene, see
+`utools.maya.validation_remote`.  Runs can be recorded and diffed against the
+previous run of the scene, see `utools.maya.validation_history`.
+
+Runs can be traced into a Chrome trace along with the normals commands, see
+`utools.maya.tracing`.
+
+Results can be streamed to JSON Lines or JUnit XML as they are reported, see
+`utools.maya.validation_report`.
+
+Validators implementing `Validator.sample` can check a random sample of the
+scope for quick feedback, see `utools.maya.validation_sample`.
+
+Data parallel validators split their work in `Validator.partition`, check the
+chunks in `Validator.map` on a pool of threads or processes and combine them
+in `Validator.reduce`.
 """
 
 from __future__ import print_function
 
+import os
+import re
+import sys
+import ast
+import glob
+import array
 import time
-import imp
+import json
+import hashlib
 import logging
 from collections import namedtuple
 
 import six
-import path
-from PySide import QtGui, QtCore
 
-from utools.maya import common
-from utools.maya.widgets import validator_res
+from utools.maya import tracing
+
+try:
+    import resource
+except ImportError:
+    resource = None
 
 logging.basicConfig()
 LOGGER = logging.getLogger('Validation')
 LOGGER.setLevel(logging.INFO)
-PROGRESS_ROLE = QtCore.Qt.UserRole + 1
-PROGRESS_COLOR = QtGui.QColor('#64b5f6')
-BUTTON_SIZE = 56
-WINDOW = None
-STYLE = """
-QWidget {
-    color: #fff;
-    font-family: Roboto;
-    font-size: 14px;
-}
-QWidget:focus {
-    border: none;
-}
-QAbstractItemView::indicator {
-    width: 24px;
-    height: 24px;
-    background-image: url(':/ui/res/ic_check_box_white_24dp_1x.png');
-}
-QAbstractItemView::indicator:unchecked {
-    background-image: url(':/ui/res/ic_check_box_outline_blank_white_24dp_1x.png');
-}
-QAbstractItemView::branch:open:has-children {
-    image: url(':/ui/res/ic_expand_more_white_24dp_2x.png');
-}
-QAbstractItemView::branch:closed:has-children {
-    image: url(':/ui/res/ic_closed_white_24dp_2x.png');
-}
-#ListValidators {background-color: #373737}
-QFrame {background-color: #303030 }
-#FrameResults QPushButton {
-    border: none;
-    background-color: transparent;
-    background-image: url(':/ui/res/ic_play_arrow_color_24dp_2x.png');
-}
-#FrameResults QPushButton:hover {
-    background-image: url(':/ui/res/ic_play_arrow_color_hover_24dp_2x.png');
-}
-#FrameResults QPushButton:checked {
-    background-image: url(':/ui/res/ic_stop_color_24dp_2x.png');
-}
-#FrameResults QLabel {
-    padding: 12px;
-    font-size: 30px;
-    background-color: #484848;
-}
-#FrameResults QLabel#Timing {
-    font-size: 10px;
-    padding: 0 0 0 20px;
-    background-color: transparent;
-}
-"""
+FORMATS = ('text', 'json', 'junit')
+CACHE_DIR = os.environ.get('UTOOLS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.utools'))
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'manifest.json')
+BUILTIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'validators')
+timer = getattr(time, 'perf_counter', time.time)
+cputime = getattr(time, 'process_time', None) or (lambda: sum(os.times()[:2]))
+_STANDALONE = False
+EVENT_START = 'start'
+EVENT_STEP = 'step'
+EVENT_FINISH = 'finish'
+# -- Yielded by runners waiting on another process, carries no validator
+EVENT_IDLE = 'idle'
 
 
 class ValidatorError(Exception):
@@ -84,22 +89,194 @@ class StopValidating(Exception):
     """Raised to short circuit the Runner generator"""
 
 
+class BudgetExceeded(Exception):
+    """Raised by `Validator.checkpoint` when a validator runs past its `BUDGET`"""
+
+
+Event = namedtuple('Event', ['type', 'validator', 'index', 'errors', 'warnings'])
+Result = namedtuple('Result', ['node', 'message'])
+COMPONENT = re.compile(r'^(.+)\.(\w+)\[(\d+)(?::(\d+))?\]$')
+
+
+class ResultStore(object):
+    """Compact list of `Result` tuples
+
+    Node paths, component types and messages are interned and every row only
+    keeps their ids and the component range in typed arrays.  A component
+    adjacent to the previous row's range with the same message extends that
+    row, so reporting `mesh.f[0]` to `mesh.f[9999]` one by one stores a single
+    `mesh.f[0:9999]` row.
+
+    Indexing and iterating return `Result` tuples like the list it replaces.
+    Rows already reported can be dropped with `discard`, indices and the length
+    keep counting every row ever added.
+    """
+    __slots__ = ('_strings', '_ids', '_nodes', '_kinds', '_messages', '_firsts', '_lasts', '_offset')
+
+    def __init__(self, results=()):
+        self._strings = []
+        self._ids = {}
+        self._nodes = array.array('i')
+        self._kinds = array.array('i')
+        self._messages = array.array('i')
+        self._firsts = array.array('l')
+        self._lasts = array.array('l')
+        self._offset = 0
+        self.extend(results)
+
+    def __repr__(self):
+        return '<ResultStore {} rows, {} strings>'.format(len(self), len(self._strings))
+
+    def __len__(self):
+        return self._offset + len(self._nodes)
+
+    def __iter__(self):
+        for i in range(len(self._nodes)):
+            yield self._result(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._result(i - self._offset) for i in range(*index.indices(len(self))) if i >= self._offset]
+        if index < 0:
+            index += len(self)
+        if not self._offset <= index < len(self):
+            raise IndexError(index)
+
+        return self._result(index - self._offset)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def _intern(self, string):
+        if string is None:
+            return -1
+        id_ = self._ids.get(string)
+        if id_ is None:
+            id_ = self._ids[string] = len(self._strings)
+            self._strings.append(string)
+
+        return id_
+
+    def _result(self, i):
+        node = self._strings[self._nodes[i]] if self._nodes[i] >= 0 else None
+        message = self._strings[self._messages[i]] if self._messages[i] >= 0 else None
+        if self._kinds[i] >= 0:
+            kind = self._strings[self._kinds[i]]
+            first, last = self._firsts[i], self._lasts[i]
+            if first == last:
+                node = '{}.{}[{}]'.format(node, kind, first)
+            else:
+                node = '{}.{}[{}:{}]'.format(node, kind, first, last)
+
+        return Result(node, message)
+
+    @property
+    def strings(self):
+        """Number of distinct node paths, component types and messages"""
+        return len(self._strings)
+
+    @property
+    def closed(self):
+        """Number of rows that can't grow anymore, the last range row may still be extended"""
+        count = len(self)
+        if self._nodes and self._kinds[-1] >= 0:
+            return count - 1
+
+        return count
+
+    @property
+    def discarded(self):
+        """Number of rows dropped by `discard`"""
+        return self._offset
+
+    def discard(self, count):
+        """Drops the rows before index `count` along with the strings only they used"""
+        count -= self._offset
+        if count <= 0:
+            return
+
+        strings = self._strings
+        rows = list(zip(self._nodes[count:], self._kinds[count:], self._firsts[count:], self._lasts[count:], self._messages[count:]))
+        self._strings = []
+        self._ids = {}
+        for values in (self._nodes, self._kinds, self._firsts, self._lasts, self._messages):
+            del values[:]
+        for node, kind, first, last, message in rows:
+            self._append(
+                self._intern(strings[node] if node >= 0 else None),
+                self._intern(strings[kind] if kind >= 0 else None),
+                first, last,
+                self._intern(strings[message] if message >= 0 else None),
+            )
+        self._offset += count
+
+    def append(self, result):
+        """Appends a `Result` or `(node, message)` tuple, parsing components out of the node"""
+        node, message = result
+        match = COMPONENT.match(node) if node else None
+        if match is None:
+            self._append(self._intern(node), -1, -1, -1, self._intern(message))
+            return
+
+        path, kind, first, last = match.groups()
+        first = int(first)
+        self.appendRange(path, kind, first, int(last) if last is not None else first, message)
+
+    def appendRange(self, node, kind, first, last, message):
+        """Appends the components `first` to `last` of `node`, such as `mesh.f[first:last]`"""
+        nodeid, kindid, messageid = self._intern(node), self._intern(kind), self._intern(message)
+        if (
+            self._nodes and self._nodes[-1] == nodeid and self._kinds[-1] == kindid
+            and self._messages[-1] == messageid and self._firsts[-1] <= first <= self._lasts[-1] + 1
+        ):
+            self._lasts[-1] = max(self._lasts[-1], last)
+            return
+
+        self._append(nodeid, kindid, first, last, messageid)
+
+    def _append(self, node, kind, first, last, message):
+        self._nodes.append(node)
+        self._kinds.append(kind)
+        self._firsts.append(first)
+        self._lasts.append(last)
+        self._messages.append(message)
+
+    def extend(self, results):
+        for result in results:
+            self.append(result)
+
+    def nodes(self):
+        """Returns every node and component in the store, for selecting them in one call"""
+        return [r.node for r in self if r.node]
+
+
 class ValidationRegistry(type):
     plugins = {}
     def __init__(cls, name, bases, attrs):
-        if name != 'Validator':
-            ValidationRegistry.plugins[name] = cls()
+        if name != 'Validator' and not name.startswith('_'):
+            ValidationRegistry.plugins[name] = cls
 
 
 class Validator(six.with_metaclass(ValidationRegistry, object)):
-    Result = namedtuple('Result', ['node', 'message'])
+    Result = Result
     ENABLED = True
+    BUDGET = None
+    # -- Partitioned validators, see `partition`
+    WORKERS = None
+    PROCESSES = False
+    # -- Node types `sample` checks, every type in scope if empty
+    SAMPLE_TYPES = ()
 
     def __init__(self):
         self._count = 1
-        self._errors = []
-        self._warnings = []
+        self._errors = ResultStore()
+        self._warnings = ResultStore()
         self._enabled = self.ENABLED
+        self._runner = None
+        self._budget = None
 
     def __repr__(self):
         return self.__class__.__name__
@@ -124,16 +301,615 @@ class Validator(six.with_metaclass(ValidationRegistry, object)):
     def enabled(self, enabled):
         self._enabled = enabled
 
+    @property
+    def scope(self):
+        """The `Scope` of the current run, use it rather than querying the scene again"""
+        return self._runner.scope if self._runner is not None else None
+
     def run(self, selection=False, references=False):
         """Abstract method to be run by the runner and implemented by a subclass"""
 
     def action(self):
         """Abstract method to be run if no object is in an error result"""
 
+    def fix(self, results):
+        """Fixes `results`, all of them from this validator and for nodes of the same type
+
+        Called by `validation_fix.fixAll` once per node type, validators only
+        implementing `action` have it run once instead.
+        """
+        self.action()
+
+    @property
+    def fixable(self):
+        """True if the validator implements `fix` or `action`"""
+        cls = type(self)
+        return (
+            six.get_unbound_function(cls.fix) is not Validator.__dict__['fix']
+            or six.get_unbound_function(cls.action) is not Validator.__dict__['action']
+        )
+
+    @property
+    def fixesResults(self):
+        """True if the validator implements `fix`, rather than only the whole scene `action`"""
+        return six.get_unbound_function(type(self).fix) is not Validator.__dict__['fix']
+
+    def sample(self, nodes):
+        """Checks only `nodes`, a random sample of the scope, yielding after every node
+
+        Implement it to support sampled runs, see `utools.maya.validation_sample`.
+        The Runner stops it once the sampler's budget runs out.
+        """
+        return iter(())
+
+    @property
+    def sampleable(self):
+        """True if the validator implements `sample`"""
+        return six.get_unbound_function(type(self).sample) is not Validator.__dict__['sample']
+
+    def partition(self, scope):
+        """Returns the chunks of work `map` checks in parallel, or None to use `run`
+
+        Chunks are usually lists of nodes from `scope` or component ranges.  They
+        are spread across `WORKERS` threads, or processes if `PROCESSES` is set,
+        and the Runner reports progress per chunk.  Processes are forked from
+        mayapy or a farm's Python, not from an interactive Maya on Windows.
+        """
+        return None
+
+    def map(self, chunk):
+        """Checks one chunk in a worker, returns `(errors, warnings)` lists of results
+
+        Must not touch the validator or the scene.  With `PROCESSES` it has to be a
+        staticmethod so it can be pickled.
+        """
+        return [], []
+
+    def reduce(self, outputs):
+        """Merges the `(errors, warnings)` `map` returned for every chunk, in partition order"""
+        for errors, warnings in outputs:
+            self._errors.extend(errors)
+            self._warnings.extend(warnings)
+
+    def digest(self, selection=False, references=False):
+        """Returns a hash of everything `run` looks at, or None if the results can't be cached
+
+        Caching is opt-in, none of the built-in validators implement it as hashing
+        their meshes would cost about as much as checking them.  `scope` is bound
+        while it's called, the Runner adds its nodes to the key.  See
+        `utools.maya.validation_cache.contentHash`
+        """
+        return None
+
+    def bind(self, runner, budget=None):
+        """Called by the Runner before `run` with the seconds it may spend in `run`"""
+        self._runner = runner
+        self._budget = budget
+
+    def checkpoint(self):
+        """Call from long loops in `run` so a cancelled run or an exceeded `BUDGET` stops
+        the validator without waiting for its next yield
+        """
+        if self._runner is not None and self._runner.canceled:
+            raise StopValidating
+        if self._budget is not None and self._runner.elapsed() > self._budget:
+            raise BudgetExceeded
+
+    def restore(self, errors, warnings):
+        """Restores results from a cache instead of running"""
+        self._errors = ResultStore(errors)
+        self._warnings = ResultStore(warnings)
+
     def reset(self):
         self._count = 1
-        self._errors = []
-        self._warnings = []
+        self._errors = ResultStore()
+        self._warnings = ResultStore()
+
+
+def queryScene(selection=False, references=False, nodes=None):
+    """Returns `(node, type)` pairs of the nodes in scope with a single `ls` query
+
+    :param selection: Only the selection and its DAG descendants
+    :param references: Include referenced nodes
+    :param nodes: Explicit nodes to use instead of the selection, with their descendants
+    """
+    from maya import cmds
+
+    kwargs = {'long': True, 'showType': True}
+    if nodes is not None:
+        if not nodes:
+            return []
+        flat = (cmds.ls(nodes, **kwargs) or []) + (cmds.ls(nodes, dag=True, **kwargs) or [])
+    elif selection:
+        flat = (cmds.ls(selection=True, **kwargs) or []) + (cmds.ls(selection=True, dag=True, **kwargs) or [])
+    else:
+        flat = cmds.ls(**kwargs) or []
+
+    pairs = []
+    seen = set()
+    for node, nodetype in zip(flat[::2], flat[1::2]):
+        if node not in seen:
+            seen.add(node)
+            pairs.append((node, nodetype))
+
+    if not references:
+        referenced = set(cmds.ls(referencedNodes=True, long=True) or [])
+        if referenced:
+            pairs = [pair for pair in pairs if pair[0] not in referenced]
+
+    return pairs
+
+
+class Scope(object):
+    """The nodes a run validates
+
+    Resolved with one scene query the first time a validator asks for it, then
+    shared by every validator in the run as a `type -> nodes` index.
+
+    >>> for mesh in self.scope.nodes('mesh'):
+
+    :param query: Callable with `queryScene`'s signature, for tests
+    """
+    def __init__(self, selection=False, references=False, nodes=None, query=None):
+        self._selection = selection
+        self._references = references
+        self._nodes = list(nodes) if nodes is not None else None
+        self._query = query or queryScene
+        self._index = None
+        self._count = 0
+        self._cache = {}
+
+    def __repr__(self):
+        return '<Scope selection={} references={}>'.format(self._selection, self._references)
+
+    def __len__(self):
+        self.resolve()
+        return self._count
+
+    @property
+    def selection(self):
+        return self._selection
+
+    @property
+    def references(self):
+        return self._references
+
+    @property
+    def resolved(self):
+        return self._index is not None
+
+    @property
+    def cache(self):
+        """Dict for validators to share data derived from the scene during a run"""
+        return self._cache
+
+    def resolve(self):
+        """Queries the scene if that hasn't happened yet, returns the `{type: [nodes]}` index"""
+        if self._index is None:
+            index = {}
+            pairs = self._query(self._selection, self._references, self._nodes)
+            for node, nodetype in pairs:
+                index.setdefault(nodetype, []).append(node)
+            self._index = index
+            self._count = len(pairs)
+
+        return self._index
+
+    def types(self):
+        return list(self.resolve())
+
+    def nodes(self, *types):
+        """Returns the nodes of `types`, or every node in scope if no types are given"""
+        index = self.resolve()
+        if not types:
+            types = index.keys()
+
+        nodes = []
+        for nodetype in types:
+            nodes.extend(index.get(nodetype, ()))
+
+        return nodes
+
+
+def loadModule(name, filename):
+    """Imports the python file `filename` as `name`"""
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        import imp
+        return imp.load_source(name, filename)
+
+    spec = spec_from_file_location(name, filename)
+    module = module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def parseClasses(source, filename='<unknown>'):
+    """Returns the top level classes defined in `source` without importing it
+
+    Each class is a dict with its `name`, `doc`, the names of its `bases` and the
+    literal values of its upper case class attributes in `attrs`.
+    """
+    classes = []
+    for node in ast.parse(source, filename).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+
+        bases = []
+        for base in node.bases:
+            if isinstance(base, ast.Name):
+                bases.append(base.id)
+            elif isinstance(base, ast.Attribute):
+                bases.append(base.attr)
+
+        attrs = {}
+        for stmt in node.body:
+            if not isinstance(stmt, ast.Assign) or len(stmt.targets) != 1:
+                continue
+            target = stmt.targets[0]
+            if isinstance(target, ast.Name) and target.id.isupper():
+                try:
+                    attrs[target.id] = ast.literal_eval(stmt.value)
+                except ValueError:
+                    pass
+
+        classes.append({
+            'name': node.name,
+            'doc': ast.get_docstring(node) or '',
+            'bases': bases,
+            'attrs': attrs,
+        })
+
+    return classes
+
+
+class Manifest(object):
+    """Lists the classes defined in validator modules without importing them
+
+    Files are only parsed again when their mtime or size change and their
+    contents hash differently.
+
+    :param filename: Where the manifest is stored, None keeps it in memory
+    """
+    VERSION = 1
+
+    def __init__(self, filename=None):
+        self._filename = filename
+        self._files = {}
+        self._dirty = False
+
+        if filename and os.path.isfile(filename):
+            try:
+                with open(filename) as fh:
+                    data = json.load(fh)
+                if data.get('version') == self.VERSION:
+                    self._files = data['files']
+            except (IOError, OSError, ValueError, KeyError):
+                LOGGER.warning('Ignoring unreadable manifest %s', filename)
+
+    def __repr__(self):
+        return '<Manifest {}>'.format(self._filename)
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def classes(self, filename):
+        """Returns the classes defined in `filename`, see `parseClasses`"""
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        entry = self._files.get(filename)
+        if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return entry['classes']
+
+        with open(filename, 'rb') as fh:
+            source = fh.read()
+        digest = hashlib.sha1(source).hexdigest()
+        if not entry or entry['hash'] != digest:
+            LOGGER.debug('Parsing %s', filename)
+            entry = {'hash': digest, 'classes': parseClasses(source, filename)}
+
+        entry['mtime'] = stat.st_mtime
+        entry['size'] = stat.st_size
+        self._files[filename] = entry
+        self._dirty = True
+
+        return entry['classes']
+
+    def save(self):
+        """Writes the manifest if anything changed"""
+        if not self._filename or not self._dirty:
+            return
+
+        dirname = os.path.dirname(os.path.abspath(self._filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        temp = '{}.{}.tmp'.format(self._filename, os.getpid())
+        with open(temp, 'w') as fh:
+            json.dump({'version': self.VERSION, 'files': self._files}, fh)
+        if os.path.exists(self._filename):
+            os.remove(self._filename)
+        os.rename(temp, self._filename)
+        self._dirty = False
+
+
+BUILTIN_NAMES = frozenset(dir(six.moves.builtins))
+
+
+def inheritedAttrs(filename, cls, classes, seen=None):
+    """Returns the attrs of the parsed `cls` merged with those of its bases, as Python looks them up
+
+    :param classes: `{name: [(filename, cls)]}` of the parsed classes, bases are looked
+        up in the same file first
+    """
+    seen = seen or set()
+    seen.add((filename, cls['name']))
+    attrs = {}
+    for base in reversed(cls['bases']):
+        candidates = classes.get(base, [])
+        candidates = [c for c in candidates if c[0] == filename] or candidates
+        if candidates and (candidates[0][0], base) not in seen:
+            attrs.update(inheritedAttrs(candidates[0][0], candidates[0][1], classes, seen))
+    attrs.update(cls['attrs'])
+
+    return attrs
+
+
+def importClasses(filename, classes):
+    """Returns the parsed `classes` of `filename` checked by importing it
+
+    Validator subclasses get `Validator` as their only base and the upper case
+    attributes they resolve to, other classes are returned unchanged.  If the
+    module can't be imported its classes are returned as parsed.
+    """
+    modname = os.path.splitext(os.path.basename(filename))[0]
+    try:
+        LOGGER.debug('Importing %s to resolve its bases', filename)
+        module = loadModule(modname, filename)
+    except Exception as err:
+        LOGGER.warning('Could not import %s: %s', filename, err)
+        return classes
+
+    checked = []
+    for cls in classes:
+        obj = getattr(module, cls['name'], None)
+        if isinstance(obj, type) and issubclass(obj, Validator):
+            attrs = dict(
+                (attr, getattr(obj, attr)) for attr in dir(obj)
+                if attr.isupper() and isinstance(getattr(obj, attr), (bool, int, float, six.string_types, tuple, type(None)))
+            )
+            cls = dict(cls, bases=['Validator'], attrs=attrs)
+        checked.append(cls)
+
+    return checked
+
+
+class LazyValidator(object):
+    """Stands in for a Validator found in a manifest
+
+    The module is imported and the validator instantiated the first time
+    anything other than its name, state or results is needed.
+    """
+    def __init__(self, name, filename, doc='', attrs=None):
+        self._name = name
+        self._filename = filename
+        self._doc = doc
+        self._attrs = attrs or {}
+        self._enabled = self._attrs.get('ENABLED', Validator.ENABLED)
+        self._instance = None
+
+    def __repr__(self):
+        return self._name
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+
+        return getattr(self.load(), attr)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def doc(self):
+        return self._doc
+
+    @property
+    def attrs(self):
+        return self._attrs
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled):
+        self._enabled = enabled
+        if self._instance is not None:
+            self._instance.enabled = enabled
+
+    @property
+    def count(self):
+        return self._instance.count if self._instance is not None else 1
+
+    @property
+    def errors(self):
+        return self._instance.errors if self._instance is not None else []
+
+    @property
+    def warnings(self):
+        return self._instance.warnings if self._instance is not None else []
+
+    def reset(self):
+        if self._instance is not None:
+            self._instance.reset()
+
+    def load(self):
+        """Imports the module and returns the Validator instance"""
+        if self._instance is None:
+            modname = os.path.splitext(os.path.basename(self._filename))[0]
+            module = sys.modules.get(modname)
+            try:
+                if os.path.splitext(getattr(module, '__file__', '') or '')[0] != os.path.splitext(self._filename)[0]:
+                    LOGGER.debug('Loading %s from %s', self._name, self._filename)
+                    module = loadModule(modname, self._filename)
+
+                self._instance = getattr(module, self._name)()
+            except Exception as err:
+                raise ValidatorError('Could not load {} from {}: {}'.format(self._name, self._filename, err))
+            self._instance.enabled = self._enabled
+
+        return self._instance
+
+
+class _Yielder(Validator):
+    """Yields `yields` times without doing anything, used to measure the Runner"""
+    def __init__(self, yields):
+        super(_Yielder, self).__init__()
+        self._yields = yields
+
+    def run(self, selection=False, references=False):
+        self._count = self._yields
+        for i in range(self._yields):
+            yield
+
+
+def yieldOverhead(count=100000):
+    """Returns the seconds the Runner adds to each validator yield
+
+    Measured against iterating the same validator's generator directly.
+    """
+    validator = _Yielder(count)
+    timestart = timer()
+    for r in validator.run():
+        pass
+    direct = timer() - timestart
+
+    runner = Runner()
+    runner.validators = [validator]
+    timestart = timer()
+    for event in runner.start():
+        pass
+
+    return max(0.0, (timer() - timestart - direct) / count)
+
+
+def peakMemory():
+    """Returns the peak resident memory of the process in KB, 0 where it isn't available"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class ValidatorStats(object):
+    """Timings of a single validator run
+
+    `wall` and `cpu` only count time spent inside the validator, `memory` is how
+    many KB the validator raised the process's peak memory by.
+    """
+    __slots__ = ('wall', 'cpu', 'yields', 'memory', 'timedout', 'cached')
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.yields = 0
+        self.memory = 0
+        self.timedout = False
+        self.cached = False
+
+    def __repr__(self):
+        return '<ValidatorStats wall={:.3f}s cpu={:.3f}s yields={} memory={}KB>'.format(
+            self.wall, self.cpu, self.yields, self.memory)
+
+
+def _since(results, sent, slot, final=False):
+    """Returns the results added since they were last sent
+
+    Until `final`, a `ResultStore` row that may still be extended is held back.
+    """
+    count = len(results) if final else getattr(results, 'closed', len(results))
+    if count == sent[slot]:
+        return ()
+    new = results[sent[slot]:count]
+    sent[slot] = count
+
+    return new
+
+
+def _mapChunk(args):
+    """Runs in a pool worker"""
+    func, index, chunk = args
+
+    return index, func(chunk)
+
+
+def mapReduce(validator, chunks):
+    """Generator running `validator.map` over `chunks` in a pool, yielding as each chunk
+    completes, then calling `validator.reduce`
+    """
+    if isinstance(validator, LazyValidator):
+        validator = validator.load()
+    validator._count = max(1, len(chunks))
+    if validator.PROCESSES:
+        import multiprocessing
+        pool = multiprocessing.Pool(validator.WORKERS)
+    else:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(validator.WORKERS)
+
+    outputs = [None] * len(chunks)
+    try:
+        for index, output in pool.imap_unordered(_mapChunk, [(validator.map, i, c) for i, c in enumerate(chunks)]):
+            outputs[index] = output
+            yield
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    validator.reduce(outputs)
+
+
+def sampleRun(validator, nodes):
+    """Generator running `validator.sample` over `nodes`"""
+    if isinstance(validator, LazyValidator):
+        validator = validator.load()
+    validator._count = max(1, len(nodes))
+
+    for step in validator.sample(nodes):
+        yield step
+
+
+def timeSlice(events, seconds):
+    """Pulls events from the iterator `events` for about `seconds`
+
+    Returns `(events, done)`, `done` is True once `events` is exhausted.  At least
+    one event is pulled, so a caller driving a run from an event loop always
+    makes progress.
+    """
+    batch = []
+    deadline = timer() + seconds
+    for event in events:
+        batch.append(event)
+        if timer() >= deadline:
+            return batch, False
+
+    return batch, True
 
 
 class Runner(object):
@@ -144,63 +920,285 @@ class Runner(object):
         self._validators = []
         self._validator = None
         self._count = 0
+        self._stats = {}
+        self._finished = set()
+        self._profiler = None
+        self._scope = None
+        self._scopedigest = None
+        self._costs = None
+        self._sampler = None
+        self._sampled = set()
+        self._resumed = None
+        self._size = 0
+        self._queue = []
+        self._position = 0
         self._timestart = 0.0
         self._timeend = 0.0
 
-    def start(self, selection=False, references=False):
-        """Start running tests"""
+    def start(self, selection=False, references=False, cache=None, profiler=None, scope=None, costs=None, order=None, failfast=False, sampler=None, retain=True):
+        """Start running tests
+
+        Yields an `Event` when a validator starts, for every step it yields and when
+        it finishes.  Each event carries the results reported since the previous one
+        so they can be shown while validation continues.
+
+        :param cache: A `validation_cache.ResultCache`, validators with an unchanged `digest`
+            are restored from it instead of being run
+        :param profiler: A `validation_profile.Profiler` to profile each validator with
+        :param scope: The `Scope` to validate, defaults to one built from `selection` and `references`
+        :param costs: A `validation_costs.CostModel` to record durations in and predict them from
+        :param order: Run validators in a `validation_costs.ORDERS` order instead of as listed,
+            needs `costs`
+        :param failfast: Stop after the first validator that reports an error
+        :param sampler: A `validation_sample.Sampler`, validators implementing `Validator.sample`
+            only check a sample of the scope for its budget and their issues are estimated
+        :param retain: Keep every result in the validators, without it results are dropped
+            once their event was handled so memory stays flat, see `utools.maya.validation_report`
+        """
+        self._scope = scope if scope is not None else Scope(selection, references)
+        self._scopedigest = None
+        self._costs = costs
+        self._size = len(self._scope) if costs is not None else 0
+        self._queue = list(self._validators)
+        if order and costs is not None:
+            self._queue = costs.order(self._queue, self._size, order)
+        self._position = 0
+        self._profiler = profiler
+        if profiler is not None:
+            profiler.reset()
+        self._sampler = sampler
+        self._sampled = set()
+        if sampler is not None:
+            sampler.reset()
         self._count = 0
+        self._stats = {}
+        self._finished = set()
         self._timeend = 0.0
-        self._timestart = time.clock()
+        self._timestart = timer()
         self._running = True
         self._canceled = False
         LOGGER.info('Started validations')
 
         try:
-            for validator in self._validators:
+            for position, validator in enumerate(self._queue):
+                self._position = position
                 validator.reset()
                 if not validator.enabled:
                     continue
                 self._validator = validator
+                yield Event(EVENT_START, validator, 0, (), ())
+
+                stats = self._stats[validator] = ValidatorStats()
+                span = tracing.begin(validator, 'validator')
+
+                digest = None
+                if cache is not None:
+                    digest = self.digest(validator, selection, references)
+                    cached = cache.get(validator, digest) if digest is not None else None
+                    if cached is not None:
+                        LOGGER.info('Restored %s from cache', self._validator)
+                        validator.restore(*cached)
+                        stats.cached = True
+                        self._count += 1
+                        tracing.end(span, {'cached': True})
+                        self._finished.add(validator)
+                        yield Event(EVENT_FINISH, validator, 0, validator.errors, validator.warnings)
+                        if not retain:
+                            validator.errors.discard(len(validator.errors))
+                            validator.warnings.discard(len(validator.warnings))
+                        if failfast and validator.errors:
+                            break
+                        continue
+
                 LOGGER.info('Validating %s', self._validator)
 
+                # -- Budgets count time spent in the validator, not in whoever consumes the events
+                budget = validator.BUDGET or None
+                validator.bind(self, budget)
+                memory = peakMemory()
+
+                profile = profiler.profile(validator) if profiler is not None else None
+                i = -1
+                sent = [0, 0]
+                nodes = None
+                if sampler is not None and validator.sampleable:
+                    nodes = sampler.nodes(validator, self._scope)
+                    self._sampled.add(validator)
+                    generator = sampleRun(validator, nodes)
+                else:
+                    chunks = validator.partition(self._scope)
+                    if chunks is not None:
+                        generator = mapReduce(validator, list(chunks))
+                    else:
+                        generator = validator.run(selection, references)
                 try:
-                    for i, r in enumerate(self._validator.run(selection, references)):
+                    while True:
+                        wall, cpu = timer(), cputime()
+                        self._resumed = wall
+                        step = tracing.begin(validator, 'step')
+                        if profile is not None:
+                            profile.enable()
+                        try:
+                            next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            if profile is not None:
+                                profile.disable()
+                            tracing.end(step)
+                            self._resumed = None
+                            stats.wall += timer() - wall
+                            stats.cpu += cputime() - cpu
+
+                        i += 1
+                        stats.yields += 1
                         if self._canceled:
                             raise StopValidating
+                        if budget is not None and stats.wall > budget:
+                            raise BudgetExceeded
 
                         self._count += 1
-                        yield self._validator, i
+                        errors, warnings = validator.errors, validator.warnings
+                        if len(errors) == sent[0] and len(warnings) == sent[1]:
+                            yield Event(EVENT_STEP, validator, i, (), ())
+                        else:
+                            yield Event(EVENT_STEP, validator, i, _since(errors, sent, 0), _since(warnings, sent, 1))
+                            # -- Sampled validators keep their results for the estimate
+                            if not retain and nodes is None:
+                                errors.discard(sent[0])
+                                warnings.discard(sent[1])
+                        if nodes is not None and stats.wall > sampler.budget:
+                            generator.close()
+                            break
                 except StopValidating:
+                    generator.close()
                     raise
+                except BudgetExceeded:
+                    generator.close()
+                    stats.timedout = True
+                    LOGGER.warning('%s exceeded its %ss budget', validator, budget)
+                    validator.errors.append(Validator.Result(None, 'Cancelled after exceeding its {}s budget'.format(budget)))
                 except Exception as err:
                     raise ValidatorError(err)
+                finally:
+                    stats.memory = max(0, peakMemory() - memory)
+                    validator.bind(None)
+                    if profiler is not None:
+                        profiler.save(validator)
+
+                if nodes is not None:
+                    sampler.record(validator, self._scope, nodes[:stats.yields])
+                tracing.end(span, {'yields': stats.yields, 'errors': len(validator.errors), 'warnings': len(validator.warnings)})
+                self._finished.add(validator)
+                yield Event(EVENT_FINISH, validator, max(i, 0), _since(validator.errors, sent, 0, True), _since(validator.warnings, sent, 1, True))
+
+                # -- Sampled results are partial, they must not stand in for a full run
+                complete = not stats.timedout and nodes is None
+                if digest is not None and complete and retain:
+                    cache.put(validator, digest, validator.errors, validator.warnings)
+                if costs is not None and complete:
+                    costs.record(validator, self._size, stats.wall, bool(validator.errors))
+                if not retain:
+                    validator.errors.discard(len(validator.errors))
+                    validator.warnings.discard(len(validator.warnings))
+                if failfast and validator.errors:
+                    LOGGER.info('Stopping at the first error, reported by %s', validator)
+                    break
         except StopValidating:
             # -- Just exit the loop
             pass
-
-        self._timeend = time.clock()
-        self._running = False
-        LOGGER.info('Validations took {:.2f}s'.format(self.duration))
-        raise StopIteration
+        finally:
+            if costs is not None:
+                costs.save()
+            # -- Also when a validator raised or the events were abandoned
+            self._timeend = timer()
+            self._running = False
+            LOGGER.info('Validations took {:.2f}s'.format(self.duration))
+
+    def digest(self, validator, selection=False, references=False):
+        """Returns the cache key of `validator` for the current scope, None if it can't be cached
+
+        The validator's own `digest` is combined with the nodes in scope, a run limited
+        to some nodes doesn't stand in for a run over the whole scene.
+        """
+        validator.bind(self)
+        try:
+            digest = validator.digest(selection, references)
+        except Exception as err:
+            raise ValidatorError(err)
+        finally:
+            validator.bind(None)
+        if digest is None:
+            return None
+
+        if self._scopedigest is None:
+            self._scopedigest = hashlib.sha1(repr(sorted(self._scope.nodes())).encode('utf-8')).hexdigest()
+
+        return hashlib.sha1('{}:{}'.format(self._scopedigest, digest).encode('utf-8')).hexdigest()
+
+    def elapsed(self):
+        """Returns the seconds the current validator spent in its own code, including the
+        step it is in
+        """
+        stats = self._stats.get(self._validator)
+        if stats is None:
+            return 0.0
+        if self._resumed is not None:
+            return stats.wall + timer() - self._resumed
+
+        return stats.wall
 
     def stop(self):
         """Stop running tests"""
         self._canceled = True
 
-    def discover(self, directories):
-        """Find classes in `directories` that are subclasses of Validator"""
-        self._validators = []
+    def discover(self, directories, manifest=None):
+        """Find classes in `directories` that are subclasses of Validator
 
+        Modules are parsed rather than imported, see `LazyValidator`.  Only modules
+        with a class deriving from a base none of the scanned files define, and
+        that isn't a builtin, are imported to check it.
+
+        :param manifest: A `Manifest`, defaults to one stored in `MANIFEST_PATH`
+        """
+        if manifest is None:
+            manifest = Manifest(MANIFEST_PATH)
+
+        found = []
         for dir_ in directories:
-            for pyfile in path.path(dir_).files('*.py'):
-                modname = pyfile.namebase
-                fp, pathname, description = imp.find_module(modname, [dir_])
-                if fp:
-                    LOGGER.debug('Found validation in %s', pathname)
-                    imp.load_module(modname, fp, pathname, description)
+            for pyfile in sorted(glob.glob(os.path.join(dir_, '*.py'))):
+                for cls in manifest.classes(pyfile):
+                    found.append((os.path.abspath(pyfile), cls))
 
-        self._validators = list(ValidationRegistry.plugins.values())
+        try:
+            manifest.save()
+        except (IOError, OSError) as err:
+            LOGGER.warning('Could not save manifest: %s', err)
+
+        # -- Classes with a base the scanned files don't define, like a shared base kept elsewhere
+        # -- or Validator imported under another name, are only known by importing their module
+        known = set(cls['name'] for pyfile, cls in found).union(BUILTIN_NAMES, ['Validator'])
+        for pyfile in sorted(set(pyfile for pyfile, cls in found if not known.issuperset(cls['bases']))):
+            checked = iter(importClasses(pyfile, [cls for f, cls in found if f == pyfile]))
+            found = [(f, next(checked) if f == pyfile else cls) for f, cls in found]
+
+        # -- Subclasses of validators are validators too, whichever file they are in
+        names = set(['Validator'])
+        while True:
+            count = len(names)
+            names.update(cls['name'] for pyfile, cls in found if names.intersection(cls['bases']))
+            if len(names) == count:
+                break
+
+        byname = {}
+        for pyfile, cls in found:
+            byname.setdefault(cls['name'], []).append((pyfile, cls))
+        self._validators = []
+        for pyfile, cls in found:
+            if cls['name'] != 'Validator' and cls['name'] in names and not cls['name'].startswith('_'):
+                LOGGER.debug('Found %s in %s', cls['name'], pyfile)
+                self._validators.append(
+                    LazyValidator(cls['name'], pyfile, cls['doc'], inheritedAttrs(pyfile, cls, byname)))
 
     @property
     def running(self):
@@ -246,302 +1244,194 @@ class Runner(object):
     def duration(self):
         return self._timeend - self._timestart
 
-##############################################################################
-# Window
-##############################################################################
-
-class ResultFrame(QtGui.QFrame):
-    def resizeEvent(self, event):
-        for child in self.children():
-            if isinstance(child, QtGui.QPushButton):
-                child.move((self.width() / 2) - (child.width() / 2), 40)
-                child.raise_()
-
-        return super(ResultFrame, self).resizeEvent(event)
-
-
-class ValidatorDelegate(QtGui.QStyledItemDelegate):
-    def paint(self, painter, option, index):
-        option = QtGui.QStyleOptionViewItemV4(option)
-        painter.setRenderHints(QtGui.QPainter.TextAntialiasing)
-
-        # -- Draw icon
-        if index.data(QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked:
-            pixmap = QtGui.QPixmap(':/ui/res/ic_check_box_white_24dp_1x.png')
-        else:
-            pixmap = QtGui.QPixmap(':/ui/res/ic_check_box_outline_blank_white_24dp_1x')
-        painter.drawPixmap(option.rect.left() + 16, option.rect.center().y() - 8, pixmap)
-
-        # -- Draw text
-        font = QtGui.QFont('Roboto', 12)
-        painter.setFont(font)
-        painter.drawText(
-            option.rect.left() + 48,
-            option.rect.center().y() + 8,
-            index.data(QtCore.Qt.DisplayRole)
-        )
-
-        # -- Draw progress        
-        progress = index.data(PROGRESS_ROLE)
-        if progress:
-            rect = option.rect
-            rect.setY(rect.y() + rect.height())
-            rect.setHeight(4)
-            
-            rect.setWidth(rect.width() * progress )
-            painter.fillRect(rect, PROGRESS_COLOR)
-
-    def sizeHint(self, option, index):
-        return QtCore.QSize(100, 48)
-
-
-class ResultModel(QtGui.QStandardItemModel):
-    DAG_ROLE = QtCore.Qt.UserRole + 1
-    MESSAGE_ROLE = DAG_ROLE + 1
-    def __init__(self, *args):
-        super(ResultModel, self).__init__(*args)
-
-        self._role = self.DAG_ROLE
-
-    def data(self, index, role):
-        if role == QtCore.Qt.DisplayRole and index.parent().isValid():
-            role = self._role
-
-        return super(ResultModel, self).data(index, role)
+    @property
+    def stats(self):
+        """`ValidatorStats` of the last run keyed by validator"""
+        return self._stats
 
+    @property
+    def finished(self):
+        """Validators that ran to the end in the last run, failed and stopped ones are left out"""
+        return self._finished
 
+    @property
+    def complete(self):
+        """True if every enabled validator finished in the last run
 
-class ValidationWindow(QtGui.QMainWindow):
-    itemSelected = QtCore.Signal(list)
+        Runs that were stopped, failed or ended early by `failfast` only vouch
+        for the validators they finished.
+        """
+        return not self._running and all(v in self._finished for v in self._validators if v.enabled)
 
-    def __init__(self, runner, parent=None):
-        super(ValidationWindow, self).__init__(parent)
+    @property
+    def scope(self):
+        """The `Scope` of the current or last run"""
+        return self._scope
 
-        self.setStyleSheet(STYLE)
+    @property
+    def queue(self):
+        """Validators in the order of the current or last run"""
+        return self._queue
 
-        self._runner = runner
-        self._validatormodel = QtGui.QStandardItemModel()
-        self._resultmodel = ResultModel()
-
-        self.build()
-
-        self.lvValidators.setModel(self._validatormodel)
-        self.lvValidators.setItemDelegate(ValidatorDelegate())
-        self.tvResults.setModel(self._resultmodel)
-
-        self.bRun.toggled.connect(self.toggleRun)
-        selectionmodel = self.tvResults.selectionModel()
-        selectionmodel.selectionChanged.connect(self.selectionChangedHandler)
-
-        for validator in runner.validators:
-            item = QtGui.QStandardItem(str(validator))
-            item.setData(validator, QtCore.Qt.UserRole)
-            item.setCheckable(True)
-            state = QtCore.Qt.Checked if validator.enabled else QtCore.Qt.Unchecked
-            item.setCheckState(state)
-            item.setEditable(False)
-            self._validatormodel.appendRow(item)
-
-        self.resize(800, 600)
-
-    def keyReleaseEvent(self, event):
-        event.accept()
-        self._resultmodel._role = ResultModel.DAG_ROLE
-        self.tvResults.update()
-
-    def keyPressEvent(self, event):
-        if event.modifiers() == QtCore.Qt.ControlModifier:
-            event.accept()
-            self._resultmodel._role = ResultModel.MESSAGE_ROLE
-            self.tvResults.update()
-
-    def build(self):
-        widget = QtGui.QWidget(self)
-        layout = QtGui.QHBoxLayout(widget)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(0)
-        self.setCentralWidget(widget)
-
-        # -- Validators
-        self.lvValidators = QtGui.QListView(widget)
-        self.lvValidators.setObjectName('ListValidators')
-        self.lvValidators.clicked.connect(self.checked)
-
-        # -- Results
-        self.fResults = ResultFrame(widget)
-        self.fResults.setObjectName('FrameResults')
-        resultlayout = QtGui.QVBoxLayout(self.fResults)
-        resultlayout.setContentsMargins(0, 0, 0, 0)
-        resultlayout.setSpacing(0)
-
-        resultlabels = QtGui.QWidget(self.fResults)
-        resultslabelslayout = QtGui.QHBoxLayout(resultlabels)
-        resultslabelslayout.setContentsMargins(0, 0, 0, 0)
-        resultslabelslayout.setSpacing(0)
-
-        self._labels = {
-            'ready': self.__labelWidget('Ready', 'transparent', '', resultlabels),
-            'success': self.__labelWidget('Success', '#64b5f6', ':/ui/res/ic_done_white_24dp_2x.png', resultlabels),
-            'errors': self.__labelWidget('Errors', '#f44336', ':/ui/res/ic_error_white_24dp_2x.png', resultlabels),
-            'warnings': self.__labelWidget('Warnings', '#ffb300', ':/ui/res/ic_warning_white_24dp_2x.png', resultlabels),
-        }
-        self._labels['ready'].show()
-        
-        self.lTiming = QtGui.QLabel(self.fResults)
-        self.lTiming.setObjectName('Timing')
-        self.tvResults = QtGui.QTreeView(self.fResults)
-        self.tvResults.setHeaderHidden(True)
-        self.tvResults.setSelectionMode(QtGui.QTreeView.ExtendedSelection)
-        self.tvResults.setFocusPolicy(QtCore.Qt.NoFocus)
-        self.tvResults.setIndentation(30)
-        for label in self._labels.values():
-            resultslabelslayout.addWidget(label)
-        resultlayout.addWidget(resultlabels)
-        resultlayout.addWidget(self.lTiming)
-        resultlayout.addWidget(self.tvResults)
-
-        # -- Run button
-        self.bRun = QtGui.QPushButton(self.fResults)
-        self.bRun.setCheckable(True)
-        self.bRun.setObjectName('bRun')
-        self.bRun.setMinimumSize(BUTTON_SIZE, BUTTON_SIZE)
-        self.bRun.setMaximumSize(self.minimumSize())
-        self.bRun.setAutoFillBackground(False)
-
-        layout.addWidget(self.lvValidators)
-        layout.addWidget(self.fResults)
-        layout.setStretch(1, 1)
-
-    def checked(self, index):
-        item = self._validatormodel.itemFromIndex(index)
-        state = QtCore.Qt.Checked if item.checkState() != QtCore.Qt.Checked else QtCore.Qt.Unchecked        
-        item.setCheckState(state)
-        self._runner.validators[item.row()].enabled = state
-
-    def toggleRun(self):
-        state = self.bRun.isChecked()
-        if state:
-            list(self.run())
-        else:
-            self._runner.stop()
-
-    def run(self):
-        self._resultmodel.clear()
-        loop = QtCore.QEventLoop(self)
-        for v, i in self._runner.start():
-            item = self._validatormodel.findItems(str(self._runner.validator))[0]
-            item.setData((i + 1) / float(v.count), PROGRESS_ROLE)
-            loop.processEvents()
-            yield v, (i + 1), v.count
-
-        for validator in self._runner.validators:
-            if not validator.errors and not validator.warnings:
+    @property
+    def eta(self):
+        """Predicted seconds until the run finishes, None without a cost model"""
+        if self._costs is None or not self._running:
+            return None
+
+        remaining = 0.0
+        for validator in self._queue[self._position:]:
+            if not validator.enabled:
                 continue
+            predicted = self._costs.predict(validator, self._size) or 0.0
+            if validator in self._sampled:
+                predicted = min(predicted, self._sampler.budget)
+            stats = self._stats.get(validator)
+            if stats is not None:
+                predicted = max(0.0, predicted - stats.wall)
+            remaining += predicted
+
+        return remaining
+
+    def progress(self, validator):
+        """Returns how much of `validator` has run from 0 to 1
+
+        Comes from its yields when it sets `count`, otherwise from how long it
+        is predicted to take.  Sampled validators also count their budget.
+        """
+        stats = self._stats.get(validator)
+        if stats is None:
+            return 0.0
+        if validator is not self._validator or not self._running:
+            return 1.0
+        if validator in self._sampled:
+            return min(1.0, max(stats.yields / float(validator.count), stats.wall / self._sampler.budget))
+        if validator.count > 1:
+            return min(1.0, stats.yields / float(validator.count))
+
+        predicted = self._costs.predict(validator, self._size) if self._costs is not None else None
+        if predicted:
+            return min(0.99, stats.wall / predicted)
+
+        return 0.0
 
-            parent = QtGui.QStandardItem(str(validator))
-            font = parent.font()
-            font.setPixelSize(18)
-            parent.setFont(font)
-            parent.setSizeHint(QtCore.QSize(100, 54))
-            parent.setEditable(False)
-            parent.setSelectable(False)
-            self._resultmodel.appendRow(parent)
-            for err in validator.errors:
-                item = QtGui.QStandardItem()
-                item.setData(err.message, ResultModel.MESSAGE_ROLE)
-                item.setEditable(False)
-                if err.node:
-                    item.setData(err.node, ResultModel.DAG_ROLE)
-                else:
-                    item.setData(err.message, ResultModel.DAG_ROLE)
-                parent.appendRow(item)
-
-            for err in validator.warnings:
-                item = QtGui.QStandardItem()
-                item.setData(err.message, ResultModel.MESSAGE_ROLE)
-                item.setIcon(QtGui.QPixmap(':/ui/res/ic_warning_white_24dp_2x.png'))
-                item.setEditable(False)
-                if err.node:
-                    item.setData(err.node, ResultModel.DAG_ROLE)
-                else:
-                    item.setData(err.message, ResultModel.DAG_ROLE)
-                
-
-                parent.appendRow(item)
-        self.tvResults.expandAll()
-        self.lTiming.setText('Duration: {:.2f}s'.format(self._runner.duration))
-
-        self.setStatus()
-        self.bRun.setChecked(False)
-
-    def selectionChangedHandler(self, selection, deselection):
-        selectionmodel = self.tvResults.selectionModel()
-        dags = [s.data(ResultModel.DAG_ROLE) for s in selectionmodel.selectedIndexes() if s.parent().isValid() and s.data(ResultModel.DAG_ROLE) != s.data(ResultModel.MESSAGE_ROLE)]
-        self.itemSelected.emit(dags)
-
-    def setStatus(self):
-        for widget in self._labels.values():
-            widget.hide()
-
-        if self._runner.errors:
-            self._labels['errors'].children()[1].setText('Errors {}'.format(self._runner.errors))
-            self._labels['errors'].show()
-
-        if self._runner.warnings:
-            self._labels['warnings'].children()[1].setText('Warnings {}'.format(self._runner.warnings))
-            self._labels['warnings'].show()
-        
-        if not self._runner.errors and not self._runner.warnings:
-            self._labels['success'].show()
-
-    def wasSuccess(self):
-        return self._runner.errors == 0
-
-    def __labelWidget(self, text, color, icon, parent):
-        frame = QtGui.QFrame(parent)
-        frame.setStyleSheet('background-color: {};'.format(color))
-        rowlayout = QtGui.QHBoxLayout(frame)
-        rowlayout.setContentsMargins(0, 0, 0, 0)
-        rowlayout.setSpacing(0)
-        label = QtGui.QLabel(text, frame)
-        icon = QtGui.QLabel(frame)
-        icon.setMaximumWidth(48)
-        icon.setStyleSheet("background-image: url('{}');background-repeat: no-repeat;".format(icon))
-        rowlayout.addWidget(label)
-        rowlayout.addWidget(icon)
-
-        frame.hide()
-        
-        return frame
-
-
-def main(dirs=(), callback=None, silent=False):
-    global WINDOW
-    if WINDOW:
-        WINDOW.close()
+    @property
+    def profiler(self):
+        """The `validation_profile.Profiler` of the last run, if any"""
+        return self._profiler
 
-    runner = Runner()
-    runner.discover(dirs)
-    WINDOW = ValidationWindow(runner, common.getMayaWindow())
-    if callback:
-        WINDOW.itemSelected.connect(callback)
-
-    if silent:
-        prog = QtGui.QProgressDialog(common.getMayaWindow())
-        for validator, i, total in WINDOW.run():
-            prog.setLabelText(str(validator))
-            prog.setMaximum(total)
-            prog.setValue(i)
-        prog.close()
-        if not WINDOW.wasSuccess():
-            WINDOW.show()
-            return False
-        return True
-    else:
-        WINDOW.show()
+    @property
+    def sampler(self):
+        """The `validation_sample.Sampler` of the last run, if any"""
+        return self._sampler
+
+
+def main(dirs=(), callback=None, silent=False, profile=None, failfast=False, remote=False, sample=None, cache=False):
+    """Shows the validation window, see `utools.maya.widgets.validationwindow.main`"""
+    from utools.maya.widgets import validationwindow
+
+    return validationwindow.main(dirs, callback, silent, profile, failfast, remote, sample, cache)
+
+
+def openScene(filename):
+    """Opens `filename` in a standalone Maya session, initializing it on first use"""
+    global _STANDALONE
+    if not _STANDALONE:
+        import maya.standalone
+        maya.standalone.initialize()
+        _STANDALONE = True
+    from maya import cmds
+
+    cmds.file(filename, open=True, force=True)
+
+
+def cli(argv=None):
+    """Runs validators without a UI, returns 1 if there were errors"""
+    import argparse
+    from utools.maya import validation_costs
+    from utools.maya import validation_cache
+    from utools.maya import validation_report
+
+    parser = argparse.ArgumentParser(prog='python -m utools.maya.validation', description='Run scene validators')
+    parser.add_argument('--dirs', nargs='+', default=[], help='Directories containing validators')
+    parser.add_argument('--builtin', action='store_true', help='Include the validators in BUILTIN_DIR')
+    parser.add_argument('--scene', help='Scene to open with maya.standalone before validating')
+    parser.add_argument('--format', choices=FORMATS, default='text')
+    parser.add_argument('--output', help='File to write results to, defaults to stdout')
+    parser.add_argument('--selection', action='store_true', help='Only validate the selection')
+    parser.add_argument('--references', action='store_true', help='Include referenced nodes')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='Validator manifest cache')
+    parser.add_argument('--profile', metavar='DIR', help='Write pstats and collapsed stacks per validator to DIR')
+    parser.add_argument('--costs', help='Record durations to this cost history, defaults to {} with --order'.format(
+        validation_costs.DEFAULT_PATH))
+    parser.add_argument('--order', choices=validation_costs.ORDERS, help='Order validators by their cost history')
+    parser.add_argument('--failfast', action='store_true', help='Stop after the first validator with errors')
+    parser.add_argument('--history', help='Record the run to this history database and compare it to the previous one')
+    parser.add_argument('--sample', type=float, metavar='SECONDS',
+                        help='Only check a sample of the scope for SECONDS per validator that supports it, and estimate the rest')
+    parser.add_argument('--trace', metavar='FILE', help='Write a Chrome trace of the run to FILE, gzipped for .gz')
+    parser.add_argument('--cache', nargs='?', const=validation_cache.DEFAULT_PATH, metavar='FILE',
+                        help='Restore unchanged validators from this result cache, defaults to {}'.format(
+                            validation_cache.DEFAULT_PATH))
+    args = parser.parse_args(argv)
+    if not args.dirs and not args.builtin:
+        parser.error('--dirs or --builtin is required')
+
+    if args.trace:
+        tracing.enable()
+    if args.scene:
+        openScene(args.scene)
 
-    
-    
-    
-    
-    
\ No newline at end of file
+    runner = Runner()
+    runner.discover(([BUILTIN_DIR] if args.builtin else []) + args.dirs, Manifest(args.manifest))
+
+    stream = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        profiler = None
+        if args.profile:
+            from utools.maya.validation_profile import Profiler
+            profiler = Profiler(args.profile)
+
+        costs = None
+        if args.costs or args.order:
+            costs = validation_costs.CostModel(args.costs or validation_costs.DEFAULT_PATH)
+        sampler = None
+        if args.sample:
+            from utools.maya.validation_sample import Sampler
+            sampler = Sampler(args.sample)
+        cache = validation_cache.ResultCache(args.cache) if args.cache else None
+        # -- Results only need to outlive their event when the history or the cache stores them
+        events = runner.start(
+            args.selection, args.references, cache=cache, profiler=profiler, costs=costs, order=args.order,
+            failfast=args.failfast, sampler=sampler, retain=bool(args.history or cache))
+        reporters = [validation_report.REPORTERS[args.format](stream)]
+        for event in validation_report.report(runner, events, reporters):
+            if event.type == EVENT_FINISH and sampler is not None and event.validator in sampler.estimates:
+                estimate = sampler.estimates[event.validator]
+                LOGGER.info('%s checked %d of %d nodes, about %.0f errors (%.0f to %.0f)', event.validator,
+                            estimate.checked, estimate.population, *estimate.errors)
+    except ValidatorError as err:
+        LOGGER.error('%s failed: %s', runner.validator, err)
+        return 2
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        if args.trace:
+            tracing.disable().save(args.trace)
+
+    # -- Issues of validators a stopped run never got to would all show up as fixed
+    if args.history and not args.sample and runner.complete:
+        from utools.maya import validation_history
+        history = validation_history.History(args.history)
+        run = history.record(runner, os.path.abspath(args.scene) if args.scene else None)
+        diff = history.diff(history.previous(run), run)
+        LOGGER.info('%d new, %d fixed, %d persisting issues', len(diff.new), len(diff.fixed), len(diff.persisting))
+        history.close()
+
+    return 1 if runner.errors else 0
+
+
+if __name__ == '__main__':
+    # -- Validators import utools.maya.validation, so run from that module rather than __main__
+    from utools.maya import validation
+    sys.exit(validation.cli())
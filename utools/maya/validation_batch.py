@@ -0,0 +1,298 @@
+"""Batch validation of many scene files
+
+Scenes are spread across a pool of long lived worker processes, each
+discovers the validators once from the manifest written up front and reuses
+its Runner for every scene it gets.  The results are merged into a single
+`BatchReport`.  A worker that crashes, as mayapy does on some corrupt scenes,
+is reported as an error of its scene and only that worker is replaced.
+`maxtasks` recycles workers after that many scenes, should state pile up in a
+long session.
+
+>>> from utools.maya import validation_batch
+>>> report = validation_batch.validate(scenes, ['path/to/tests'], processes=8)
+>>> report.write('report.json')
+
+From a shell:
+
+    mayapy -m utools.maya.validation_batch --dirs path/to/tests --scenes a.mb b.mb --output report.json
+
+`loader` opens a scene in the worker and defaults to `validation.openScene`,
+any picklable callable taking a filename can stand in for it when Maya isn't
+available.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import multiprocessing
+
+from utools.maya import validation
+
+POLL_INTERVAL = 0.05
+
+
+def _result(filename, pid, error=None):
+    return {
+        'scene': filename,
+        'pid': pid,
+        'load': 0.0,
+        'duration': 0.0,
+        'error': error,
+        'validators': {},
+    }
+
+
+def _validate(runner, loader, filename):
+    """Validates one scene in a worker, returns a plain dict so it pickles cheaply"""
+    result = _result(filename, os.getpid())
+
+    timestart = validation.timer()
+    try:
+        loader(filename)
+    except Exception as err:
+        result['error'] = 'Could not load scene: {}'.format(err)
+        return result
+    result['load'] = validation.timer() - timestart
+
+    timestart = validation.timer()
+    try:
+        for event in runner.start():
+            pass
+    except validation.ValidatorError as err:
+        result['error'] = '{} failed: {}'.format(runner.validator, err)
+    result['duration'] = validation.timer() - timestart
+
+    for validator, stats in runner.stats.items():
+        result['validators'][str(validator)] = {
+            'wall': stats.wall,
+            'cpu': stats.cpu,
+            'timedout': stats.timedout,
+            'errors': [list(r) for r in validator.errors],
+            'warnings': [list(r) for r in validator.warnings],
+        }
+
+    return result
+
+
+def _work(connection, directories, manifest, loader):
+    """Worker process, discovers once then validates every scene sent over `connection` until it gets None"""
+    runner = validation.Runner()
+    runner.discover(directories, validation.Manifest(manifest))
+
+    while True:
+        filename = connection.recv()
+        if filename is None:
+            break
+        try:
+            result = _validate(runner, loader, filename)
+        except Exception as err:
+            result = _result(filename, os.getpid(), 'Worker failed: {}'.format(err))
+        connection.send(result)
+
+
+class _Worker(object):
+    """Parent side of a worker process"""
+    def __init__(self, args):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_work, args=(child,) + args)
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+        self.scene = None
+        self.tasks = 0
+
+    def send(self, scene):
+        self.scene = scene
+        self.tasks += 1
+        self.connection.send(scene)
+
+    def receive(self):
+        """Returns the result of the current scene, None while it's running
+
+        A worker that died without sending its result, as mayapy does on some
+        corrupt scenes, gets its scene reported as an error.
+        """
+        # -- Checked before polling, a result sent right before exiting is still read from the pipe
+        alive = self.process.is_alive()
+        try:
+            if self.connection.poll():
+                result = self.connection.recv()
+            elif alive:
+                return None
+            else:
+                raise EOFError
+        except (EOFError, IOError, OSError):
+            result = _result(self.scene, self.process.pid, 'Worker {} died validating the scene'.format(self.process.pid))
+        self.scene = None
+        return result
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (IOError, OSError):
+            pass
+        self.process.join()
+        self.close()
+
+    def close(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+class BatchReport(object):
+    """Results of validating many scenes"""
+    def __init__(self):
+        self._scenes = []
+
+    def __len__(self):
+        return len(self._scenes)
+
+    def add(self, result):
+        """Adds the result of a single scene as returned by a worker"""
+        self._scenes.append(result)
+
+    @property
+    def scenes(self):
+        return self._scenes
+
+    @property
+    def errors(self):
+        return sum(len(v['errors']) for s in self._scenes for v in s['validators'].values())
+
+    @property
+    def warnings(self):
+        return sum(len(v['warnings']) for s in self._scenes for v in s['validators'].values())
+
+    @property
+    def failed(self):
+        """Scenes that had errors or could not be validated"""
+        return [
+            s['scene'] for s in self._scenes
+            if s['error'] or any(v['errors'] for v in s['validators'].values())
+        ]
+
+    def validatorTimings(self):
+        """Returns `{validator: {'scenes', 'total', 'mean', 'max', 'errors'}}` across all scenes"""
+        timings = {}
+        for scene in self._scenes:
+            for name, data in scene['validators'].items():
+                timing = timings.setdefault(name, {'scenes': 0, 'total': 0.0, 'max': 0.0, 'errors': 0})
+                timing['scenes'] += 1
+                timing['total'] += data['wall']
+                timing['max'] = max(timing['max'], data['wall'])
+                timing['errors'] += len(data['errors'])
+
+        for timing in timings.values():
+            timing['mean'] = timing['total'] / timing['scenes']
+
+        return timings
+
+    def toDict(self):
+        return {
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'failed': self.failed,
+            'validators': self.validatorTimings(),
+            'scenes': sorted(self._scenes, key=lambda s: s['scene']),
+        }
+
+    def write(self, filename):
+        with open(filename, 'w') as fh:
+            json.dump(self.toDict(), fh, indent=2)
+
+
+def validate(scenes, directories, processes=None, loader=validation.openScene, manifest=None, callback=None, maxtasks=None):
+    """Validates `scenes` in a pool of `processes` workers, returns a `BatchReport`
+
+    :param processes: Number of workers, defaults to the number of CPUs
+    :param loader: Picklable callable that opens a scene in a worker
+    :param manifest: Path of the validator manifest, see `validation.Manifest`
+    :param callback: Called with each scene's result as it completes
+    :param maxtasks: Scenes a worker validates before it's replaced, unlimited by default
+    """
+    manifest = manifest or validation.MANIFEST_PATH
+    # -- Discover once up front so workers find an up to date manifest and don't all write it
+    validation.Runner().discover(directories, validation.Manifest(manifest))
+
+    report = BatchReport()
+    scenes = list(reversed(scenes))
+    args = (directories, manifest, loader)
+    workers = [_Worker(args) for i in range(min(processes or multiprocessing.cpu_count(), len(scenes)))]
+    try:
+        while workers:
+            sent = False
+            for i, worker in enumerate(workers):
+                if worker.scene is not None:
+                    result = worker.receive()
+                    if result is None:
+                        continue
+                    report.add(result)
+                    if callback:
+                        callback(result)
+
+                # -- Only workers that died or served their share are replaced, the others keep their session
+                if not scenes:
+                    worker.stop()
+                    workers[i] = None
+                    continue
+                if not worker.alive or (maxtasks and worker.tasks >= maxtasks):
+                    worker.stop()
+                    worker = workers[i] = _Worker(args)
+                worker.send(scenes.pop())
+                sent = True
+
+            workers = [worker for worker in workers if worker]
+            if workers and not sent:
+                time.sleep(POLL_INTERVAL)
+    finally:
+        for worker in workers:
+            worker.close()
+
+    return report
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m utools.maya.validation_batch', description='Validate many scenes')
+    parser.add_argument('--dirs', nargs='+', required=True, help='Directories containing validators')
+    parser.add_argument('--scenes', nargs='*', default=[], help='Scene files to validate')
+    parser.add_argument('--list', help='File with one scene path per line')
+    parser.add_argument('--processes', type=int, help='Number of worker processes')
+    parser.add_argument('--maxtasks', type=int, help='Scenes a worker validates before it is replaced')
+    parser.add_argument('--manifest', default=validation.MANIFEST_PATH, help='Validator manifest cache')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    scenes = list(args.scenes)
+    if args.list:
+        with open(args.list) as fh:
+            scenes += [line.strip() for line in fh if line.strip()]
+
+    def progress(result):
+        state = 'ERROR' if result['error'] else 'ok'
+        errors = sum(len(v['errors']) for v in result['validators'].values())
+        print('{} {} errors in {:.2f}s {}'.format(result['scene'], errors, result['duration'], state))
+
+    report = validate(scenes, args.dirs, args.processes, manifest=args.manifest, callback=progress, maxtasks=args.maxtasks)
+    if args.output:
+        report.write(args.output)
+
+    for name, timing in sorted(report.validatorTimings().items()):
+        print('{:<40} total {:>8.2f}s mean {:>7.3f}s max {:>7.3f}s'.format(name, timing['total'], timing['mean'], timing['max']))
+    print('{} scenes, {} failed, {} errors, {} warnings'.format(len(report), len(report.failed), report.errors, report.warnings))
+
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""Framework overhead benchmarks
+
+Synthetic validators that do nothing but yield and report results measure
+what the Runner, and optionally the ValidationWindow, add on top of the
+validators' own work.  The overhead of a case is its time minus the time of
+iterating the same validator's generator directly.  Window cases also count
+the validator rows painted, how many of those only repainted the progress
+strip, and the seconds spent painting them.
+
+>>> from utools.maya import validation_bench
+>>> cases = validation_bench.suite(sizes=(10, 1000, 100000))
+>>> validation_bench.costs(cases)
+[Cost(target='runner', perYield=2.1e-06, perResult=1.4e-06)]
+
+Runs on Linux CI without Maya.  Window cases need PySide and a display, they
+use the offscreen platform where Qt has one, otherwise run them under Xvfb:
+
+    python -m utools.maya.validation_bench --window --save baseline.json
+    python -m utools.maya.validation_bench --window --baseline baseline.json
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import argparse
+from collections import namedtuple
+
+from utools.maya import validation
+
+SIZES = (10, 1000, 100000, 1000000)
+BASE_YIELDS = 10
+TOLERANCE = 1.25
+MIN_DELTA = 0.005
+TARGETS = ('runner', 'window')
+
+Case = namedtuple('Case', ['target', 'yields', 'results', 'seconds', 'overhead', 'paints', 'strips', 'paint'])
+Cost = namedtuple('Cost', ['target', 'perYield', 'perResult'])
+
+
+class _Synthetic(validation.Validator):
+    """Yields `yields` times and reports `results` errors spread evenly over them"""
+    def __init__(self, yields, results):
+        super(_Synthetic, self).__init__()
+
+        self._yields = yields
+        # -- Built up front so formatting node names isn't timed
+        self._results = [validation.Result('|node{}'.format(i), 'Synthetic error') for i in range(results)]
+
+    def __repr__(self):
+        return 'Synthetic{}x{}'.format(self._yields, len(self._results))
+
+    def run(self, selection=False, references=False):
+        self._count = self._yields
+        results = self._results
+        step = len(results) // self._yields
+        extra = len(results) % self._yields
+        end = 0
+        for i in range(self._yields):
+            start, end = end, end + step + (1 if i < extra else 0)
+            for result in results[start:end]:
+                self._errors.append(result)
+            yield
+
+
+def direct(validator):
+    """Returns the seconds iterating `validator.run` takes without a Runner"""
+    validator.reset()
+    timestart = validation.timer()
+    for step in validator.run():
+        pass
+    seconds = validation.timer() - timestart
+    validator.reset()
+
+    return seconds
+
+
+def runnerCase(yields, results):
+    """Returns the `Case` of a headless run"""
+    validator = _Synthetic(yields, results)
+    baseline = direct(validator)
+
+    runner = validation.Runner()
+    runner.validators = [validator]
+    timestart = validation.timer()
+    for event in runner.start():
+        pass
+    seconds = validation.timer() - timestart
+
+    return Case('runner', yields, results, seconds, max(0.0, seconds - baseline), 0, 0, 0.0)
+
+
+def application():
+    """Returns the QApplication, creating one on the offscreen platform if there is none"""
+    from PySide import QtGui
+
+    app = QtGui.QApplication.instance()
+    if app is None:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        app = QtGui.QApplication(['validation_bench'])
+
+    return app
+
+
+def windowCase(yields, results):
+    """Returns the `Case` of a run in a shown ValidationWindow, until its results are on screen"""
+    from PySide import QtCore
+    from utools.maya.widgets import validationwindow
+
+    app = application()
+    validator = _Synthetic(yields, results)
+    baseline = direct(validator)
+
+    runner = validation.Runner()
+    runner.validators = [validator]
+    window = validationwindow.ValidationWindow(runner)
+    window.show()
+    app.processEvents()
+    delegate = window.lvValidators.itemDelegate()
+    delegate.resetStats()
+
+    loop = QtCore.QEventLoop()
+    window.finished.connect(loop.quit)
+    timestart = validation.timer()
+    window.run()
+    loop.exec_()
+    app.processEvents()
+    seconds = validation.timer() - timestart
+
+    paints, strips, paint = delegate.paints, delegate.strips, delegate.paintTime
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+    return Case('window', yields, results, seconds, max(0.0, seconds - baseline), paints, strips, paint)
+
+
+def suite(sizes=SIZES, window=False):
+    """Returns the `Case`s of validators yielding `sizes` times without results, and
+    yielding `BASE_YIELDS` times with `sizes` results
+    """
+    shapes = [(size, 0) for size in sizes]
+    shapes += [(BASE_YIELDS, size) for size in sizes if (BASE_YIELDS, size) not in shapes]
+    if (BASE_YIELDS, 0) not in shapes:
+        shapes.append((BASE_YIELDS, 0))
+
+    cases = [runnerCase(yields, results) for yields, results in shapes]
+    if window:
+        cases += [windowCase(yields, results) for yields, results in shapes]
+
+    return cases
+
+
+def costs(cases):
+    """Returns the `Cost` per yield and per result of every target, from its largest cases"""
+    found = []
+    for target in TARGETS:
+        mine = [case for case in cases if case.target == target]
+        yielding = [case for case in mine if not case.results]
+        reporting = [case for case in mine if case.yields == BASE_YIELDS and case.results]
+        base = [case for case in yielding if case.yields == BASE_YIELDS]
+        if not yielding:
+            continue
+
+        largest = max(yielding, key=lambda case: case.yields)
+        perYield = largest.overhead / largest.yields
+        perResult = None
+        if reporting and base:
+            largest = max(reporting, key=lambda case: case.results)
+            perResult = max(0.0, largest.overhead - base[0].overhead) / largest.results
+        found.append(Cost(target, perYield, perResult))
+
+    return found
+
+
+def save(cases, filename):
+    with open(filename, 'w') as fh:
+        json.dump([case._asdict() for case in cases], fh, indent=1)
+
+
+def load(filename):
+    with open(filename) as fh:
+        cases = json.load(fh)
+
+    # -- Only window cases paint, and baselines saved before paints were counted lack them
+    for case in cases:
+        case.setdefault('paints', 0)
+        case.setdefault('strips', 0)
+        case.setdefault('paint', 0.0)
+
+    return [Case(**case) for case in cases]
+
+
+def compare(cases, baseline, tolerance=TOLERANCE):
+    """Returns `(case, base)` for every case whose overhead grew by more than `tolerance`
+    times that of the same case in `baseline`, ignoring differences below `MIN_DELTA`
+    """
+    bases = dict(((case.target, case.yields, case.results), case) for case in baseline)
+    regressions = []
+    for case in cases:
+        base = bases.get((case.target, case.yields, case.results))
+        if base is None:
+            continue
+        if case.overhead > base.overhead * tolerance and case.overhead - base.overhead > MIN_DELTA:
+            regressions.append((case, base))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m utools.maya.validation_bench', description='Time the framework overhead')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='Yields and results to time')
+    parser.add_argument('--window', action='store_true', help='Also time runs in the ValidationWindow, needs PySide')
+    parser.add_argument('--save', metavar='FILE', help='Write the cases to FILE to compare later runs with')
+    parser.add_argument('--baseline', metavar='FILE', help='Exit with 1 if a case got slower than in FILE')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    cases = suite(args.sizes, args.window)
+    for case in cases:
+        print('{:<7} {:>8} yields {:>8} results {:>9.4f}s overhead {:>9.4f}s'.format(*case[:5]) + (
+            ' {:>6} paints {:>6} strip only {:>9.4f}s'.format(case.paints, case.strips, case.paint)
+            if case.target == 'window' else ''))
+    for cost in costs(cases):
+        print('{:<7} {:.3f}us per yield, {} per result'.format(
+            cost.target, cost.perYield * 1e6, '{:.3f}us'.format(cost.perResult * 1e6) if cost.perResult is not None else '-'))
+
+    if args.save:
+        save(cases, args.save)
+
+    if args.baseline:
+        regressions = compare(cases, load(args.baseline), args.tolerance)
+        for case, base in regressions:
+            print('{} {} yields {} results: {:.4f}s overhead, {:.4f}s in the baseline'.format(
+                case.target, case.yields, case.results, case.overhead, base.overhead))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
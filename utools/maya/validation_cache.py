@@ -0,0 +1,223 @@
+"""Persistent validation result cache
+
+Results are stored in a SQLite database keyed on the validator name, a hash of
+the validator source and a hash of the content the validator looks at along
+with the nodes in scope.  When all three match a previous run the cached
+results are restored instead of running the validator again.  Only validators
+implementing `Validator.digest` are cached.
+
+>>> from utools.maya import validation, validation_cache
+>>> cache = validation_cache.ResultCache()
+>>> runner = validation.Runner()
+>>> runner.discover(['path/to/tests'])
+>>> list(runner.start(cache=cache))
+
+Hit rates can be inspected from a shell:
+
+    python -m utools.maya.validation_cache --stats
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import inspect
+import hashlib
+import sqlite3
+import argparse
+
+from utools.maya.validation import CACHE_DIR
+
+DEFAULT_PATH = os.path.join(CACHE_DIR, 'validation.db')
+MAX_ENTRIES = 10000
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    validator TEXT NOT NULL,
+    source TEXT NOT NULL,
+    content TEXT NOT NULL,
+    errors TEXT NOT NULL,
+    warnings TEXT NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (validator, source, content)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS stats (
+    validator TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_SOURCEHASHES = {}
+
+
+def moduleSource(module):
+    """Returns the source of `module` as bytes, empty if it has none"""
+    try:
+        filename = inspect.getsourcefile(module) or getattr(module, '__file__', None)
+    except TypeError:
+        return b''
+    if not filename or not os.path.isfile(filename):
+        return b''
+    with open(filename, 'rb') as fh:
+        return fh.read()
+
+
+def sourceHash(validator):
+    """Returns a hash of the source of the modules defining the validator's class and
+    every base class in its MRO
+
+    Whole modules are hashed so edits to helpers and constants next to a class
+    invalidate its results too.  The hash is computed once per class.
+    """
+    if hasattr(validator, 'load'):
+        validator = validator.load()
+    cls = validator if inspect.isclass(validator) else type(validator)
+    if cls not in _SOURCEHASHES:
+        sha = hashlib.sha1()
+        modules = []
+        for base in inspect.getmro(cls):
+            module = sys.modules.get(base.__module__)
+            if module is not None and module not in modules:
+                modules.append(module)
+                sha.update(base.__module__.encode('utf-8'))
+                sha.update(moduleSource(module))
+        _SOURCEHASHES[cls] = sha.hexdigest()
+
+    return _SOURCEHASHES[cls]
+
+
+def contentHash(*values):
+    """Returns a hash of `values`, useful for implementing `Validator.digest`
+
+    >>> contentHash(cmds.ls(type='mesh', long=True), cmds.polyEvaluate(meshes, face=True))
+    """
+    sha = hashlib.sha1()
+    for value in values:
+        sha.update(repr(value).encode('utf-8'))
+
+    return sha.hexdigest()
+
+
+class ResultCache(object):
+    """Stores validator results on disk
+
+    :param filename: Path to the database, the parent directory will be created
+    :param maxentries: Least recently used entries above this count are evicted
+    """
+    def __init__(self, filename=None, maxentries=MAX_ENTRIES):
+        self._filename = filename or DEFAULT_PATH
+        self._maxentries = maxentries
+
+        dirname = os.path.dirname(os.path.abspath(self._filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        self._db = sqlite3.connect(self._filename)
+        self._db.executescript(SCHEMA)
+
+    def __repr__(self):
+        return '<ResultCache {}>'.format(self._filename)
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def get(self, validator, digest):
+        """Returns the cached `(errors, warnings)` for `validator` or None
+
+        Each result is a `(node, message)` tuple.
+        """
+        key = (str(validator), sourceHash(validator), digest)
+        row = self._db.execute(
+            'SELECT errors, warnings FROM results WHERE validator=? AND source=? AND content=?',
+            key
+        ).fetchone()
+
+        with self._db:
+            self._db.execute('INSERT OR IGNORE INTO stats (validator) VALUES (?)', (key[0],))
+            if row is None:
+                self._db.execute('UPDATE stats SET misses=misses + 1 WHERE validator=?', (key[0],))
+                return None
+
+            self._db.execute('UPDATE stats SET hits=hits + 1 WHERE validator=?', (key[0],))
+            self._db.execute(
+                'UPDATE results SET used=? WHERE validator=? AND source=? AND content=?',
+                (time.time(),) + key
+            )
+
+        errors, warnings = row
+        return [tuple(r) for r in json.loads(errors)], [tuple(r) for r in json.loads(warnings)]
+
+    def put(self, validator, digest, errors, warnings):
+        """Stores the results of `validator` for the content `digest`"""
+        key = (str(validator), sourceHash(validator), digest)
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                key + (
+                    json.dumps([tuple(r) for r in errors]),
+                    json.dumps([tuple(r) for r in warnings]),
+                    time.time(),
+                )
+            )
+            self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries above `maxentries`"""
+        count = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        if count > self._maxentries:
+            self._db.execute(
+                'DELETE FROM results WHERE rowid IN '
+                '(SELECT rowid FROM results ORDER BY used ASC LIMIT ?)',
+                (count - self._maxentries,)
+            )
+
+    def stats(self):
+        """Returns a list of `(validator, hits, misses)` tuples"""
+        return self._db.execute(
+            'SELECT validator, hits, misses FROM stats ORDER BY validator'
+        ).fetchall()
+
+    def clear(self):
+        with self._db:
+            self._db.execute('DELETE FROM results')
+            self._db.execute('DELETE FROM stats')
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect the validation result cache')
+    parser.add_argument('--path', default=DEFAULT_PATH, help='Cache database')
+    parser.add_argument('--stats', action='store_true', help='Print hit rates per validator')
+    parser.add_argument('--clear', action='store_true', help='Remove all cached results')
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.path)
+    if args.clear:
+        cache.clear()
+
+    print('{} ({} entries)'.format(cache.filename, len(cache)))
+    if args.stats:
+        totalhits = totalmisses = 0
+        for name, hits, misses in cache.stats():
+            totalhits += hits
+            totalmisses += misses
+            print('{:<40} {:>8} hits {:>8} misses {:>6.1%}'.format(name, hits, misses, hits / float(hits + misses or 1)))
+        total = totalhits + totalmisses
+        print('{:<40} {:>8} hits {:>8} misses {:>6.1%}'.format('Total', totalhits, totalmisses, totalhits / float(total or 1)))
+
+    cache.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Validator cost model
+
+Every run records how long each validator took against the size of the
+scope and whether it reported errors.  A least squares line through that
+history predicts durations, which the Runner uses for an ETA, for progress
+of validators that don't set their `count` and to order validators.
+
+>>> from utools.maya import validation, validation_costs
+>>> costs = validation_costs.CostModel()
+>>> list(runner.start(costs=costs, order=validation_costs.ORDER_FAILING, failfast=True))
+
+Only sums are kept per validator, older runs weigh less by `DECAY` each run.
+"""
+
+import os
+import json
+
+from utools.maya.validation import CACHE_DIR, LOGGER
+
+DEFAULT_PATH = os.path.join(CACHE_DIR, 'costs.json')
+DECAY = 0.95
+MIN_COST = 1e-3
+ORDER_CHEAPEST = 'cheapest'
+ORDER_FAILING = 'failing'
+ORDERS = (ORDER_CHEAPEST, ORDER_FAILING)
+
+
+class CostModel(object):
+    """Duration and failure history per validator
+
+    :param filename: Where the history is stored, None keeps it in memory
+    """
+    VERSION = 1
+
+    def __init__(self, filename=DEFAULT_PATH):
+        self._filename = filename
+        self._validators = {}
+        self._dirty = False
+
+        if filename and os.path.isfile(filename):
+            try:
+                with open(filename) as fh:
+                    data = json.load(fh)
+                if data.get('version') == self.VERSION:
+                    self._validators = data['validators']
+            except (IOError, OSError, ValueError, KeyError):
+                LOGGER.warning('Ignoring unreadable cost history %s', filename)
+
+    def __repr__(self):
+        return '<CostModel {}>'.format(self._filename)
+
+    def __len__(self):
+        return len(self._validators)
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def record(self, validator, size, duration, failed):
+        """Adds a run of `validator` that took `duration` seconds on a scope of `size` nodes"""
+        sums = self._validators.setdefault(str(validator), [0.0] * 7)
+        sums[:] = [value * DECAY for value in sums]
+        weight, sx, sy, sxx, sxy, runs, failures = sums
+        sums[:] = [
+            weight + 1.0,
+            sx + size,
+            sy + duration,
+            sxx + size * size,
+            sxy + size * duration,
+            runs + 1.0,
+            failures + (1.0 if failed else 0.0),
+        ]
+        self._dirty = True
+
+    def fit(self, validator):
+        """Returns `(intercept, slope)` of the duration against scope size, None without history"""
+        sums = self._validators.get(str(validator))
+        if not sums or not sums[0]:
+            return None
+
+        weight, sx, sy, sxx, sxy = sums[:5]
+        denominator = weight * sxx - sx * sx
+        slope = (weight * sxy - sx * sy) / denominator if denominator > 1e-9 * weight * weight else 0.0
+        if slope < 0:
+            slope = 0.0
+        intercept = (sy - slope * sx) / weight
+
+        return intercept, slope
+
+    def predict(self, validator, size):
+        """Returns the expected seconds `validator` takes on a scope of `size` nodes, None if unknown"""
+        fit = self.fit(validator)
+        if fit is None:
+            return None
+
+        return max(0.0, fit[0] + fit[1] * size)
+
+    def failureRate(self, validator):
+        """Returns the smoothed fraction of runs that reported errors, 0.5 without history"""
+        sums = self._validators.get(str(validator))
+        runs, failures = (sums[5], sums[6]) if sums else (0.0, 0.0)
+
+        return (failures + 1.0) / (runs + 2.0)
+
+    def order(self, validators, size, order=ORDER_CHEAPEST):
+        """Returns `validators` sorted for `order`
+
+        `ORDER_CHEAPEST` runs the quickest first, `ORDER_FAILING` the ones most
+        likely to fail per second they take.  Validators without history count
+        as free so they are measured early.
+        """
+        if order not in ORDERS:
+            raise ValueError('Unknown order {}, expected one of {}'.format(order, ', '.join(ORDERS)))
+
+        def cost(validator):
+            return self.predict(validator, size) or 0.0
+
+        if order == ORDER_CHEAPEST:
+            return sorted(validators, key=cost)
+
+        return sorted(validators, key=lambda v: -self.failureRate(v) / max(cost(v), MIN_COST))
+
+    def save(self):
+        """Writes the history if anything changed"""
+        if not self._filename or not self._dirty:
+            return
+
+        dirname = os.path.dirname(os.path.abspath(self._filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        temp = '{}.{}.tmp'.format(self._filename, os.getpid())
+        with open(temp, 'w') as fh:
+            json.dump({'version': self.VERSION, 'validators': self._validators}, fh)
+        if os.path.exists(self._filename):
+            os.remove(self._filename)
+        os.rename(temp, self._filename)
+        self._dirty = False
@@ -0,0 +1,119 @@
+"""Bulk fixing of validation results
+
+Every fixable validator with results gets its `Validator.fix` called once
+per node type it reported, or its `Validator.action` called once if it only
+implements that, all inside a single undo chunk with viewport refresh
+suspended.  Only the affected nodes are validated again afterwards.
+
+>>> from utools.maya import validation_fix
+>>> validators, nodes = validation_fix.fixAll(runner.validators)
+>>> list(validation_fix.revalidate(validators, nodes).start(selection=True))
+"""
+
+from contextlib import contextmanager
+
+from utools.maya import validation
+
+UNDO_CHUNK = 'validationFixAll'
+
+
+def nodeName(result):
+    """Returns the node of `result` without any component"""
+    return result.node.split('.', 1)[0] if result.node else None
+
+
+def groupResults(results, nodeType):
+    """Groups `results` by the type of their node
+
+    :param nodeType: Callable returning the type of a node, such as `cmds.nodeType`
+    :returns: `{nodetype: [results]}`, results without a node are grouped under None
+    """
+    types = {}
+    groups = {}
+    for result in results:
+        node = nodeName(result)
+        if node not in types:
+            types[node] = nodeType(node) if node else None
+        groups.setdefault(types[node], []).append(result)
+
+    return groups
+
+
+@contextmanager
+def batch(name=UNDO_CHUNK):
+    """Wraps everything in one undo chunk and suspends viewport refreshes"""
+    from maya import cmds
+
+    cmds.undoInfo(openChunk=True, chunkName=name)
+    cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+        cmds.refresh()
+
+
+def fixAll(validators):
+    """Fixes the results of every fixable validator in `validators`
+
+    :returns: `(validators, nodes)`, the validators that were fixed and the nodes they touched
+    """
+    from maya import cmds
+
+    fixed = [v for v in validators if (v.errors or v.warnings) and v.fixable]
+    nodes = set()
+    with batch():
+        for validator in fixed:
+            nodes.update(fix(validator, cmds.nodeType))
+
+    return fixed, nodes
+
+
+def fix(validator, nodeType):
+    """Fixes the results of `validator`, returns the nodes they were reported on
+
+    :param nodeType: Callable returning the type of a node, such as `cmds.nodeType`
+    """
+    results = list(validator.errors) + list(validator.warnings)
+    if validator.fixesResults:
+        for nodetype, group in groupResults(results, nodeType).items():
+            validation.LOGGER.info('Fixing %d %s results of %s', len(group), nodetype, validator)
+            validator.fix(group)
+    else:
+        # -- An action fixes the whole scene, once is enough whatever types were reported
+        validation.LOGGER.info('Running the action of %s for %d results', validator, len(results))
+        validator.action()
+
+    return set(nodeName(r) for r in results if r.node)
+
+
+def revalidate(validators, nodes):
+    """Returns a Runner that validates `nodes` with `validators` again
+
+    The run's `Scope` is limited to `nodes`, and for validators that look at the
+    selection instead, `nodes` are selected while it runs and the previous selection
+    is restored afterwards.
+    """
+    return _Revalidator(validators, nodes)
+
+
+class _Revalidator(validation.Runner):
+    def __init__(self, validators, nodes):
+        super(_Revalidator, self).__init__()
+
+        self._validators = list(validators)
+        self._nodes = sorted(nodes)
+
+    def start(self, selection=True, references=False, **kwargs):
+        from maya import cmds
+
+        previous = cmds.ls(sl=True, long=True) or []
+        existing = cmds.ls(self._nodes, long=True) or []
+        cmds.select(existing, replace=True)
+        try:
+            scope = validation.Scope(True, references, nodes=self._nodes)
+            for event in super(_Revalidator, self).start(True, references, scope=scope, **kwargs):
+                yield event
+        finally:
+            cmds.select(cmds.ls(previous, long=True) or [], replace=True)
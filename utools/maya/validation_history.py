@@ -0,0 +1,280 @@
+"""Validation history
+
+Every recorded run stores its results and per validator timings in a SQLite
+database keyed by scene.  Runs of the same scene can be diffed into new,
+fixed and persisting issues, and validators that got slower can be found.
+
+>>> from utools.maya import validation_history
+>>> history = validation_history.History()
+>>> run = history.record(runner)
+>>> diff = history.diff(history.previous(run), run)
+>>> diff.new
+
+Node paths, messages, validators and scenes are interned into their own
+tables so results are rows of integers, every query is backed by an index.
+
+    python -m utools.maya.validation_history --scene file.mb --runs 10
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from collections import namedtuple
+
+from utools.maya.validation import CACHE_DIR
+
+DEFAULT_PATH = os.path.join(CACHE_DIR, 'history.db')
+ERROR = 0
+WARNING = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS validators (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS nodes (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scene INTEGER NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    label TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_scene ON runs (scene, started);
+CREATE TABLE IF NOT EXISTS timings (
+    run INTEGER NOT NULL,
+    validator INTEGER NOT NULL,
+    wall REAL NOT NULL,
+    cpu REAL NOT NULL,
+    errors INTEGER NOT NULL,
+    warnings INTEGER NOT NULL,
+    PRIMARY KEY (run, validator)
+);
+CREATE INDEX IF NOT EXISTS timings_validator ON timings (validator, run);
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER NOT NULL,
+    validator INTEGER NOT NULL,
+    severity INTEGER NOT NULL,
+    node INTEGER NOT NULL,
+    message INTEGER NOT NULL,
+    PRIMARY KEY (run, validator, severity, node, message)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_node ON results (node, run);
+"""
+
+Run = namedtuple('Run', ['id', 'scene', 'started', 'duration', 'label'])
+Issue = namedtuple('Issue', ['validator', 'severity', 'node', 'message'])
+Diff = namedtuple('Diff', ['new', 'fixed', 'persisting'])
+Regression = namedtuple('Regression', ['validator', 'wall', 'mean'])
+
+
+def currentScene():
+    """Returns the path of the open scene, `untitled` if it was never saved"""
+    from maya import cmds
+
+    return cmds.file(query=True, sceneName=True) or 'untitled'
+
+
+class History(object):
+    """Stores validation runs on disk
+
+    :param filename: Path to the database, the parent directory will be created
+    """
+    def __init__(self, filename=None):
+        self._filename = filename or DEFAULT_PATH
+
+        dirname = os.path.dirname(os.path.abspath(self._filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        self._db = sqlite3.connect(self._filename)
+        self._db.executescript(SCHEMA)
+        self._ids = {}
+
+    def __repr__(self):
+        return '<History {}>'.format(self._filename)
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def _intern(self, table, column, value):
+        """Returns the id of `value` in `table`, adding it if needed"""
+        key = (table, value)
+        id_ = self._ids.get(key)
+        if id_ is None:
+            self._db.execute('INSERT OR IGNORE INTO {0} ({1}) VALUES (?)'.format(table, column), (value,))
+            id_ = self._db.execute('SELECT id FROM {0} WHERE {1}=?'.format(table, column), (value,)).fetchone()[0]
+            self._ids[key] = id_
+
+        return id_
+
+    def _lookup(self, table, column, value):
+        """Returns the id of `value` in `table` or None, without adding it"""
+        row = self._db.execute('SELECT id FROM {0} WHERE {1}=?'.format(table, column), (value,)).fetchone()
+
+        return row[0] if row else None
+
+    def record(self, runner, scene=None, label=None):
+        """Stores the results and timings of `runner`'s last run, returns the run's id
+
+        Only validators that finished are stored, `diff` compares the validators
+        both runs finished.
+
+        :param scene: Key of the run, defaults to the path of the open scene
+        :param label: Optional note such as a publish version
+        """
+        scene = scene or currentScene()
+        with self._db:
+            cursor = self._db.execute(
+                'INSERT INTO runs (scene, started, duration, label) VALUES (?, ?, ?, ?)',
+                (self._intern('scenes', 'path', scene), time.time() - runner.duration, runner.duration, label)
+            )
+            run = cursor.lastrowid
+
+            for validator, stats in runner.stats.items():
+                if validator not in runner.finished:
+                    continue
+                validatorid = self._intern('validators', 'name', str(validator))
+                self._db.execute(
+                    'INSERT OR REPLACE INTO timings VALUES (?, ?, ?, ?, ?, ?)',
+                    (run, validatorid, stats.wall, stats.cpu, len(validator.errors), len(validator.warnings))
+                )
+                rows = []
+                for severity, results in ((ERROR, validator.errors), (WARNING, validator.warnings)):
+                    for node, message in results:
+                        rows.append((
+                            run, validatorid, severity,
+                            self._intern('nodes', 'path', node or ''),
+                            self._intern('messages', 'text', message or ''),
+                        ))
+                self._db.executemany('INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?)', rows)
+
+        return run
+
+    def runs(self, scene=None, limit=20):
+        """Returns the latest `Run`s, of `scene` only if given, newest first"""
+        query = (
+            'SELECT runs.id, scenes.path, runs.started, runs.duration, runs.label '
+            'FROM runs JOIN scenes ON scenes.id = runs.scene '
+        )
+        if scene is None:
+            rows = self._db.execute(query + 'ORDER BY runs.started DESC LIMIT ?', (limit,))
+        else:
+            sceneid = self._lookup('scenes', 'path', scene)
+            rows = self._db.execute(query + 'WHERE runs.scene=? ORDER BY runs.started DESC LIMIT ?', (sceneid, limit))
+
+        return [Run(*row) for row in rows]
+
+    def previous(self, run):
+        """Returns the id of the run of the same scene before `run`, None if there isn't one"""
+        row = self._db.execute(
+            'SELECT prev.id FROM runs AS prev JOIN runs AS cur ON prev.scene = cur.scene '
+            'WHERE cur.id=? AND (prev.started < cur.started OR (prev.started = cur.started AND prev.id < cur.id)) '
+            'ORDER BY prev.started DESC, prev.id DESC LIMIT 1',
+            (run,)
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def _issues(self, query, args):
+        rows = self._db.execute(
+            'SELECT validators.name, r.severity, nodes.path, messages.text FROM ({}) AS r '
+            'JOIN validators ON validators.id = r.validator '
+            'JOIN nodes ON nodes.id = r.node '
+            'JOIN messages ON messages.id = r.message '
+            'ORDER BY validators.name, r.severity, nodes.path'.format(query),
+            args
+        )
+
+        return [Issue(name, severity, node or None, message) for name, severity, node, message in rows]
+
+    def results(self, run):
+        """Returns the `Issue`s of `run`"""
+        return self._issues('SELECT validator, severity, node, message FROM results WHERE run=?', (run,))
+
+    def diff(self, old, new):
+        """Returns the `Diff` of the issues in run `new` against run `old`
+
+        Only validators that finished in both runs are compared.  Without an `old`
+        run every issue of `new` is new.
+        """
+        if old is None:
+            return Diff(self.results(new), [], [])
+
+        select = (
+            'SELECT validator, severity, node, message FROM results WHERE run=? AND validator IN ('
+            'SELECT validator FROM timings WHERE run=? INTERSECT SELECT validator FROM timings WHERE run=?)'
+        )
+        newargs, oldargs = (new, old, new), (old, old, new)
+        return Diff(
+            self._issues('{0} EXCEPT {0}'.format(select), newargs + oldargs),
+            self._issues('{0} EXCEPT {0}'.format(select), oldargs + newargs),
+            self._issues('{0} INTERSECT {0}'.format(select), newargs + oldargs),
+        )
+
+    def timings(self, validator, limit=50):
+        """Returns `(run, started, wall)` of the latest runs of `validator`, newest first"""
+        validatorid = self._lookup('validators', 'name', str(validator))
+        return self._db.execute(
+            'SELECT timings.run, runs.started, timings.wall FROM timings JOIN runs ON runs.id = timings.run '
+            'WHERE timings.validator=? ORDER BY timings.run DESC LIMIT ?',
+            (validatorid, limit)
+        ).fetchall()
+
+    def regressions(self, run, window=10, factor=1.5):
+        """Returns the `Regression`s of validators that took `factor` times longer in `run`
+        than on average over the previous `window` runs of the same scene
+        """
+        rows = self._db.execute(
+            'SELECT validators.name, cur.wall, ('
+            '    SELECT AVG(wall) FROM ('
+            '        SELECT t.wall FROM timings AS t JOIN runs AS r ON r.id = t.run '
+            '        WHERE t.validator = cur.validator AND r.scene = run.scene AND t.run < cur.run '
+            '        ORDER BY t.run DESC LIMIT ?'
+            '    )'
+            ') FROM timings AS cur '
+            'JOIN runs AS run ON run.id = cur.run '
+            'JOIN validators ON validators.id = cur.validator '
+            'WHERE cur.run=?',
+            (window, run)
+        ).fetchall()
+
+        return sorted(
+            (Regression(name, wall, mean) for name, wall, mean in rows if mean is not None and wall > mean * factor),
+            key=lambda r: r.wall / max(r.mean, 1e-9),
+            reverse=True
+        )
+
+    def close(self):
+        self._db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect the validation history')
+    parser.add_argument('--path', default=DEFAULT_PATH, help='History database')
+    parser.add_argument('--scene', help='Only runs of this scene')
+    parser.add_argument('--runs', type=int, default=10, help='Number of runs to list')
+    args = parser.parse_args(argv)
+
+    history = History(args.path)
+    for run in history.runs(args.scene, args.runs):
+        diff = history.diff(history.previous(run.id), run.id)
+        print('{:>6} {} {:<40} {:>7.2f}s {:>5} new {:>5} fixed {:>5} persisting {}'.format(
+            run.id, time.strftime('%Y-%m-%d %H:%M', time.localtime(run.started)), run.scene, run.duration,
+            len(diff.new), len(diff.fixed), len(diff.persisting), run.label or ''))
+        for regression in history.regressions(run.id):
+            print('         {} took {:.2f}s, {:.2f}s on average'.format(*regression))
+
+    history.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
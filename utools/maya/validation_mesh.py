@@ -0,0 +1,392 @@
+"""Vectorized mesh checks
+
+Every check is a NumPy pass over a mesh's face and edge arrays rather than a
+loop over components, the built-in validators in `utools.maya.validators`
+are thin wrappers around them.
+
+>>> from utools.maya import validation_mesh
+>>> data = validation_mesh.MeshData(counts, connects, points)
+>>> validation_mesh.components('|pCube1|pCubeShape1', 'f', validation_mesh.ngons(data))
+['|pCube1|pCubeShape1.f[4:7]']
+
+`MeshData` only needs the face vertex counts, the flattened face vertex
+indices and the points, `fromMaya` reads them from a mesh node.  Timings on a
+synthetic mesh can be printed from a shell, or on a real mesh including
+reading it from Maya:
+
+    python -m utools.maya.validation_mesh --faces 1000000
+    mayapy -m utools.maya.validation_mesh --scene file.mb --mesh '|body|bodyShape'
+"""
+
+from __future__ import print_function
+
+import sys
+import argparse
+
+import numpy as np
+
+from utools.maya.validation import timer
+
+SIDES = 4
+AREA_TOLERANCE = 1e-10
+LENGTH_TOLERANCE = 1e-6
+
+
+class MeshData(object):
+    """The face and edge arrays of a single mesh
+
+    Derived arrays are computed the first time a check needs them, so checks
+    sharing a `MeshData` only pay for them once.
+
+    :param counts: Number of vertices of every face
+    :param connects: Vertex indices of every face, flattened
+    :param points: `(n, 3)` vertex positions, only needed by checks measuring the mesh
+    """
+    def __init__(self, counts, connects, points=None):
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.connects = np.asarray(connects, dtype=np.int64)
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3) if points is not None else None
+        self._offsets = None
+        self._ends = None
+        self._faces = None
+        self._edges = None
+
+    def __repr__(self):
+        return '<MeshData faces={} vertices={}>'.format(len(self.counts), len(self.connects))
+
+    @property
+    def offsets(self):
+        """Index into `connects` of the first vertex of every face"""
+        if self._offsets is None:
+            self._offsets = np.zeros(len(self.counts), dtype=np.int64)
+            np.cumsum(self.counts[:-1], out=self._offsets[1:])
+
+        return self._offsets
+
+    @property
+    def ends(self):
+        """The vertex each face vertex's half edge points to"""
+        if self._ends is None:
+            following = np.arange(1, len(self.connects) + 1)
+            following[self.offsets + self.counts - 1] = self.offsets
+            self._ends = self.connects[following]
+
+        return self._ends
+
+    @property
+    def faces(self):
+        """The face of every face vertex"""
+        if self._faces is None:
+            self._faces = np.repeat(np.arange(len(self.counts)), self.counts)
+
+        return self._faces
+
+    @property
+    def edges(self):
+        """`(keys, inverse, faces)` of the mesh's undirected edges
+
+        Each key packs the lower vertex index in the high 32 bits, `inverse` maps
+        every half edge to its edge and `faces` counts the faces using an edge.
+        """
+        if self._edges is None:
+            low = np.minimum(self.connects, self.ends)
+            high = np.maximum(self.connects, self.ends)
+            self._edges = np.unique((low << 32) | high, return_inverse=True, return_counts=True)
+
+        return self._edges
+
+
+def unpack(keys):
+    """Returns the `(n, 2)` vertex pairs of packed edge `keys`"""
+    keys = np.asarray(keys, dtype=np.int64)
+
+    return np.column_stack((keys >> 32, keys & 0xffffffff))
+
+
+def nonManifoldEdges(data):
+    """Returns the vertex pairs of edges shared by more than two faces"""
+    keys, inverse, faces = data.edges
+
+    return unpack(keys[faces > 2])
+
+
+def flippedEdges(data):
+    """Returns the vertex pairs of edges whose two faces wind the same way
+
+    Consistently wound neighbours walk a shared edge in opposite directions, so
+    a directed edge appearing twice marks a flipped face on one side.
+    """
+    keys, inverse, faces = data.edges
+    directed, counts = np.unique((data.connects << 32) | data.ends, return_counts=True)
+    repeated = directed[counts > 1]
+    low = np.minimum(repeated >> 32, repeated & 0xffffffff)
+    high = np.maximum(repeated >> 32, repeated & 0xffffffff)
+    shared = np.unique((low << 32) | high)
+    # -- Only edges between exactly two faces, more is non-manifold
+    shared = shared[faces[np.searchsorted(keys, shared)] == 2]
+
+    return unpack(shared)
+
+
+def laminaFaces(data):
+    """Returns the faces sharing all of their vertices with another face"""
+    found = []
+    for sides in np.unique(data.counts):
+        faces = np.flatnonzero(data.counts == sides)
+        if len(faces) < 2:
+            continue
+        rows = np.sort(data.connects[data.offsets[faces, None] + np.arange(sides)], axis=1)
+        order = np.lexsort(rows.T[::-1])
+        rows = rows[order]
+        same = np.all(rows[1:] == rows[:-1], axis=1)
+        duplicate = np.zeros(len(faces), dtype=bool)
+        duplicate[1:] |= same
+        duplicate[:-1] |= same
+        found.append(faces[order[duplicate]])
+
+    if not found:
+        return np.zeros(0, dtype=np.int64)
+
+    return np.sort(np.concatenate(found))
+
+
+def faceAreas(data):
+    """Returns the area of every face using Newell's method"""
+    origin = np.repeat(data.points[data.connects[data.offsets]], data.counts, axis=0)
+    start = data.points[data.connects] - origin
+    end = data.points[data.ends] - origin
+    normals = np.add.reduceat(np.cross(start, end), data.offsets, axis=0) if len(data.counts) else np.zeros((0, 3))
+
+    return 0.5 * np.sqrt(np.einsum('ij,ij->i', normals, normals))
+
+
+def zeroAreaFaces(data, tolerance=AREA_TOLERANCE):
+    """Returns the faces with an area below `tolerance`"""
+    return np.flatnonzero(faceAreas(data) <= tolerance)
+
+
+def zeroLengthEdges(data, tolerance=LENGTH_TOLERANCE):
+    """Returns the vertex pairs of edges shorter than `tolerance`"""
+    pairs = unpack(data.edges[0])
+    delta = data.points[pairs[:, 0]] - data.points[pairs[:, 1]]
+
+    return pairs[np.einsum('ij,ij->i', delta, delta) <= tolerance * tolerance]
+
+
+def ngons(data, sides=SIDES):
+    """Returns the faces with more than `sides` vertices"""
+    return np.flatnonzero(data.counts > sides)
+
+
+def unlockedNormals(locked):
+    """Returns the indices of the False entries of the `locked` normal flags"""
+    return np.flatnonzero(~np.asarray(locked, dtype=bool))
+
+
+def ranges(indices):
+    """Returns `(first, last)` runs of consecutive `indices`
+
+    >>> ranges([3, 0, 1, 2, 7])
+    [(0, 3), (7, 7)]
+    """
+    indices = np.unique(np.asarray(indices, dtype=np.int64))
+    if not len(indices):
+        return []
+
+    breaks = np.flatnonzero(np.diff(indices) != 1)
+    firsts = np.concatenate((indices[:1], indices[breaks + 1]))
+    lasts = np.concatenate((indices[breaks], indices[-1:]))
+
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
+def components(node, kind, indices):
+    """Returns compact component names such as `mesh.f[0:99]` for `indices`"""
+    names = []
+    for first, last in ranges(indices):
+        if first == last:
+            names.append('{}.{}[{}]'.format(node, kind, first))
+        else:
+            names.append('{}.{}[{}:{}]'.format(node, kind, first, last))
+
+    return names
+
+
+def edgeIds(mesh, pairs):
+    """Returns Maya's edge ids of the edges joining the vertex `pairs` of `mesh`
+
+    Maya's edge ids aren't part of the face arrays, each pair is looked up among
+    the edges connected to its first vertex.  Pairs without an edge are skipped.
+    """
+    from maya.api import OpenMaya as om
+
+    selection = om.MSelectionList()
+    selection.add(mesh)
+    path = selection.getDagPath(0)
+    fn = om.MFnMesh(path)
+    vertices = om.MItMeshVertex(path)
+
+    ids = []
+    for first, second in np.asarray(pairs, dtype=np.int64).reshape(-1, 2).tolist():
+        vertices.setIndex(first)
+        for edge in vertices.getConnectedEdges():
+            if second in fn.getEdgeVertices(edge):
+                ids.append(edge)
+                break
+
+    return ids
+
+
+def edgeComponents(node, pairs):
+    """Returns the Maya edge components joining exactly the vertex `pairs` of `node`"""
+    if not len(pairs):
+        return []
+
+    return components(node, 'e', edgeIds(node, pairs))
+
+
+def fromSequence(values, dtype=np.int64):
+    """Returns an array of a Maya array such as an `MIntArray`
+
+    `np.array` probes every element of a sequence it doesn't know for nesting,
+    `np.fromiter` with the length known up front fills a preallocated array.
+    """
+    return np.fromiter(values, dtype, len(values))
+
+
+def rawPoints(mesh):
+    """Returns the object space points of `mesh` as an `(n, 3)` array, copied in one go
+    from the float buffer `MFnMesh.getRawPoints` exposes
+    """
+    import ctypes
+    from maya import OpenMaya as om1
+
+    selection = om1.MSelectionList()
+    selection.add(mesh)
+    path = om1.MDagPath()
+    selection.getDagPath(0, path)
+    fn = om1.MFnMesh(path)
+    count = fn.numVertices()
+    if not count:
+        return np.zeros((0, 3))
+    buffer_ = (ctypes.c_float * (count * 3)).from_address(int(fn.getRawPoints()))
+
+    return np.ctypeslib.as_array(buffer_).reshape(count, 3).astype(np.float64)
+
+
+def fromMaya(mesh, points=True):
+    """Returns the `MeshData` of the mesh node `mesh`
+
+    Converting Maya's arrays element by element in Python costs more than the
+    checks on large meshes, points are copied straight from Maya's buffer.
+    """
+    from maya.api import OpenMaya as om
+
+    selection = om.MSelectionList()
+    selection.add(mesh)
+    fn = om.MFnMesh(selection.getDagPath(0))
+    counts, connects = fn.getVertices()
+
+    return MeshData(fromSequence(counts), fromSequence(connects), rawPoints(mesh) if points else None)
+
+
+def meshData(mesh, scope=None):
+    """Returns the `MeshData` of `mesh`, shared with other validators through `scope.cache`"""
+    if scope is None:
+        return fromMaya(mesh)
+
+    key = ('MeshData', mesh)
+    if key not in scope.cache:
+        scope.cache[key] = fromMaya(mesh)
+
+    return scope.cache[key]
+
+
+def lockedNormals(mesh, scope=None):
+    """Returns whether the normal of each vertex of `mesh` is locked, shared through `scope.cache`"""
+    key = ('LockedNormals', mesh)
+    if scope is not None and key in scope.cache:
+        return scope.cache[key]
+
+    from maya import cmds
+
+    locked = np.asarray(cmds.polyNormalPerVertex(mesh + '.vtx[*]', query=True, freezeNormal=True) or [], dtype=bool)
+    if scope is not None:
+        scope.cache[key] = locked
+
+    return locked
+
+
+def grid(faces):
+    """Returns the `MeshData` of a flat grid of about `faces` quads"""
+    size = max(1, int(round(np.sqrt(faces))))
+    rows = np.arange(size)[:, None] * (size + 1)
+    corners = (rows + np.arange(size)).ravel()
+    connects = np.column_stack((corners, corners + 1, corners + size + 2, corners + size + 1)).ravel()
+    u, v = np.meshgrid(np.arange(size + 1, dtype=np.float64), np.arange(size + 1, dtype=np.float64))
+    points = np.column_stack((u.ravel(), v.ravel(), np.zeros(u.size)))
+
+    return MeshData(np.full(size * size, 4), connects, points)
+
+
+CHECKS = (
+    ('nonManifoldEdges', nonManifoldEdges),
+    ('flippedEdges', flippedEdges),
+    ('laminaFaces', laminaFaces),
+    ('zeroAreaFaces', zeroAreaFaces),
+    ('zeroLengthEdges', zeroLengthEdges),
+    ('ngons', ngons),
+)
+
+
+def benchmark(faces=1000000, mesh=None):
+    """Returns `[(check, seconds)]` of every check on a fresh `grid` of `faces` quads
+
+    Each check gets its own `MeshData`, so the timings include building the
+    edge arrays it needs.  With a `mesh` node the checks run on it instead and
+    reading it with `fromMaya` is timed too.
+    """
+    timings = []
+    if mesh is not None:
+        timestart = timer()
+        source = fromMaya(mesh)
+        timings.append(('fromMaya', timer() - timestart))
+        faces = len(source.counts)
+
+    for name, check in CHECKS:
+        data = grid(faces) if mesh is None else MeshData(source.counts, source.connects, source.points)
+        timestart = timer()
+        check(data)
+        timings.append((name, timer() - timestart))
+
+    locked = np.ones(faces, dtype=bool)
+    timestart = timer()
+    unlockedNormals(locked)
+    timings.append(('unlockedNormals', timer() - timestart))
+
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m utools.maya.validation_mesh', description='Time the mesh checks')
+    parser.add_argument('--faces', type=int, default=1000000, help='Faces of the synthetic mesh')
+    parser.add_argument('--scene', help='Scene to open with maya.standalone, for --mesh')
+    parser.add_argument('--mesh', help='Time a mesh node of the scene instead, including reading it')
+    args = parser.parse_args(argv)
+
+    if args.mesh:
+        if args.scene:
+            from utools.maya.validation import openScene
+            openScene(args.scene)
+        print(args.mesh)
+    else:
+        data = grid(args.faces)
+        print('{} faces, {} face vertices'.format(len(data.counts), len(data.connects)))
+    for name, seconds in benchmark(args.faces, args.mesh):
+        print('{:<20} {:>8.3f}s'.format(name, seconds))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Per validator profiling
+
+Each validator's `run` is profiled with its own `cProfile.Profile`, the
+profiler is only enabled while the validator's generator is executing so
+the Runner and UI don't show up in the results.
+
+>>> from utools.maya import validation, validation_profile
+>>> profiler = validation_profile.Profiler('path/to/reports')
+>>> list(runner.start(profiler=profiler))
+>>> profiler.hotspots(runner.validators[0])
+
+For every validator a `<name>.pstats` file and a `<name>.folded` file of
+collapsed stacks, which flamegraph.pl and speedscope read, are written.
+"""
+
+import os
+import pstats
+import cProfile
+from collections import namedtuple, defaultdict
+
+MAX_DEPTH = 64
+MIN_WEIGHT = 1e-6
+
+Hotspot = namedtuple('Hotspot', ['function', 'calls', 'tottime', 'cumtime'])
+
+
+def functionLabel(func):
+    """Returns a short label for a pstats function key"""
+    filename, line, name = func
+    if filename == '~':
+        return name.replace(';', ',')
+
+    return '{}:{}:{}'.format(os.path.basename(filename), line, name).replace(';', ',')
+
+
+def collapse(stats):
+    """Returns `{stack: seconds}` of collapsed stacks from a `pstats.Stats`
+
+    cProfile only keeps caller/callee pairs, so time is split between call
+    paths in proportion to the time each caller spent in the callee.
+    """
+    callees = defaultdict(dict)
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3] if isinstance(edge, tuple) else ct
+
+    stacks = defaultdict(float)
+
+    def walk(func, stack, fraction, path):
+        cc, nc, tt, ct, callers = stats.stats[func]
+        stack = stack + (functionLabel(func),)
+        if tt * fraction >= MIN_WEIGHT:
+            stacks[';'.join(stack)] += tt * fraction
+        if len(stack) >= MAX_DEPTH:
+            return
+
+        for callee, edgetime in callees[func].items():
+            calleetime = stats.stats[callee][3]
+            if not calleetime or callee in path:
+                continue
+            share = fraction * edgetime / calleetime
+            if share * calleetime < MIN_WEIGHT:
+                continue
+            walk(callee, stack, share, path | set([callee]))
+
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        if not callers:
+            walk(func, (), 1.0, set([func]))
+
+    return dict(stacks)
+
+
+class Profiler(object):
+    """Collects a separate profile for every validator
+
+    :param directory: Where reports are written when a validator finishes, None to keep
+        them in memory only
+    """
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._profiles = {}
+
+    def __repr__(self):
+        return '<Profiler {}>'.format(self._directory)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def profile(self, validator):
+        """Returns the `cProfile.Profile` collecting `validator`'s timings"""
+        profile = self._profiles.get(str(validator))
+        if profile is None:
+            profile = self._profiles[str(validator)] = cProfile.Profile()
+
+        return profile
+
+    def reset(self):
+        self._profiles = {}
+
+    def stats(self, validator):
+        """Returns the `pstats.Stats` of `validator` or None if it wasn't profiled"""
+        profile = self._profiles.get(str(validator))
+        if profile is None:
+            return None
+
+        return pstats.Stats(profile)
+
+    def hotspots(self, validator, count=10):
+        """Returns the `count` functions with the most time spent in them as `Hotspot` tuples"""
+        stats = self.stats(validator)
+        if stats is None:
+            return []
+
+        spots = [
+            Hotspot(functionLabel(func), nc, tt, ct)
+            for func, (cc, nc, tt, ct, callers) in stats.stats.items()
+        ]
+        spots.sort(key=lambda spot: spot.tottime, reverse=True)
+
+        return spots[:count]
+
+    def save(self, validator):
+        """Writes `<validator>.pstats` and `<validator>.folded`, returns their paths"""
+        stats = self.stats(validator)
+        if stats is None or not self._directory:
+            return None
+
+        if not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+
+        base = os.path.join(self._directory, str(validator))
+        stats.dump_stats(base + '.pstats')
+        with open(base + '.folded', 'w') as fh:
+            for stack, seconds in sorted(collapse(stats).items()):
+                fh.write('{} {}\n'.format(stack, int(round(seconds * 1e6))))
+
+        return base + '.pstats', base + '.folded'
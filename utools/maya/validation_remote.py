@@ -0,0 +1,388 @@
+"""Out of process validation
+
+The scene, or just the selection, is exported to a temporary snapshot that a
+background mayapy worker opens and validates.  The worker streams its events
+back as JSON lines over a pipe, so the artist's session stays free while it
+runs.
+
+>>> from utools.maya import validation_remote
+>>> runner = validation_remote.RemoteRunner()
+>>> runner.discover(['path/to/tests'])
+>>> list(runner.start())
+
+`RemoteRunner` yields the same events as `validation.Runner`, plus
+`EVENT_IDLE` events while it waits for the worker.  Results carry the UUID of
+their node so they are mapped back to the live node even when exporting the
+selection changed its DAG path.
+
+The worker can be run by hand:
+
+    mayapy -m utools.maya.validation_remote --scene snapshot.mb --dirs path/to/tests
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import tempfile
+import threading
+import subprocess
+
+from six.moves import queue
+
+from utools.maya import validation
+
+POLL_INTERVAL = 0.005
+STEP_INTERVAL = 0.05
+READER_TIMEOUT = 5.0
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def mayapy():
+    """Returns the mayapy executable of the running Maya, or just `mayapy`"""
+    location = os.environ.get('MAYA_LOCATION')
+    if location:
+        executable = os.path.join(location, 'bin', 'mayapy.exe' if sys.platform == 'win32' else 'mayapy')
+        if os.path.isfile(executable):
+            return executable
+
+    return 'mayapy'
+
+
+def exportSnapshot(nodes=None, directory=None):
+    """Writes the scene, or only `nodes`, to a temporary Maya binary file and returns its path
+
+    References are kept as references rather than imported.
+    """
+    from maya import cmds
+
+    handle, filename = tempfile.mkstemp('.mb', 'validation_', directory)
+    os.close(handle)
+    options = {'type': 'mayaBinary', 'force': True, 'preserveReferences': True}
+    if nodes is None:
+        cmds.file(filename, exportAll=True, **options)
+        return filename
+
+    previous = cmds.ls(sl=True, long=True) or []
+    try:
+        cmds.select(nodes, replace=True, noExpand=True)
+        cmds.file(filename, exportSelected=True, constructionHistory=True, shader=True, **options)
+    finally:
+        cmds.select(cmds.ls(previous, long=True) or [], replace=True)
+
+    return filename
+
+
+def liveNode(uuid, node):
+    """Returns `node` renamed to the live node with `uuid`, components included"""
+    if not uuid or not node:
+        return node
+
+    from maya import cmds
+
+    live = cmds.ls(uuid, long=True)
+    if not live:
+        return node
+
+    path, dot, component = node.partition('.')
+
+    return live[0] + dot + component
+
+
+class _RemoteValidator(validation.Validator):
+    """Stands in for a validator that runs in the worker, holds the results it sent back"""
+    def __init__(self, name, enabled=True, doc=''):
+        super(_RemoteValidator, self).__init__()
+
+        self._name = name
+        self._enabled = enabled
+        self._doc = doc
+
+    def __repr__(self):
+        return self._name
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def doc(self):
+        return self._doc
+
+    @property
+    def fixable(self):
+        # -- Fixes have to happen in the live scene
+        return False
+
+
+def _read(stream, lines):
+    """Reader thread, puts every line of `stream` on `lines` and None at the end"""
+    for line in iter(stream.readline, b''):
+        lines.put(line)
+    lines.put(None)
+
+
+class RemoteRunner(validation.Runner):
+    """Runs validators in a background worker process against a scene snapshot
+
+    :param command: Command starting the worker, arguments are appended to it,
+        defaults to running this module with `mayapy`
+    :param snapshot: Callable taking the nodes to export, or None for the whole
+        scene, and returning the snapshot's path, or None to validate without one
+    :param resolve: Callable mapping a result's `(uuid, node)` back to a live node
+    """
+    def __init__(self, command=None, snapshot=exportSnapshot, resolve=liveNode):
+        super(RemoteRunner, self).__init__()
+
+        self._command = list(command or [mayapy(), '-m', 'utools.maya.validation_remote'])
+        self._snapshot = snapshot
+        self._resolve = resolve
+        self._directories = []
+        self._manifest = None
+        self._process = None
+        self._reader = None
+
+    def discover(self, directories, manifest=None):
+        """Finds validators like `Runner.discover` without importing them, they only run in the worker"""
+        if manifest is None:
+            manifest = validation.Manifest(validation.MANIFEST_PATH)
+        super(RemoteRunner, self).discover(directories, manifest)
+
+        self._directories = list(directories)
+        self._manifest = manifest.filename
+        self._validators = [_RemoteValidator(v.name, v.enabled, v.doc) for v in self._validators]
+
+    def arguments(self, snapshot, references=False, profiler=None, costs=None, order=None, failfast=False):
+        """Returns the worker's command line"""
+        args = self._command + ['--dirs'] + self._directories + ['--manifest', self._manifest or '']
+        args += ['--validators'] + [str(v) for v in self._validators if v.enabled]
+        if snapshot:
+            args += ['--scene', snapshot]
+        if references:
+            args.append('--references')
+        if profiler is not None and profiler.directory:
+            args += ['--profile', profiler.directory]
+        if costs is not None and costs.filename:
+            args += ['--costs', costs.filename]
+        if order:
+            args += ['--order', order]
+        if failfast:
+            args.append('--failfast')
+
+        return args
+
+    def start(self, selection=False, references=False, cache=None, profiler=None, scope=None, costs=None, order=None, failfast=False, sampler=None, retain=True):
+        """Validates a snapshot in the worker, see `Runner.start`
+
+        Only the selection is exported when `selection` is set.  `cache`, `scope`
+        and `sampler` only apply to runs in this process and are ignored.
+        """
+        validators = dict((str(v), v) for v in self._validators)
+        self._queue = []
+        self._position = 0
+        self._count = 0
+        self._stats = {}
+        self._finished = set()
+        self._profiler = profiler
+        self._timeend = 0.0
+        self._timestart = validation.timer()
+        self._running = True
+        self._canceled = False
+        for validator in self._validators:
+            validator.reset()
+
+        nodes = None
+        if selection:
+            from maya import cmds
+            nodes = cmds.ls(sl=True, long=True) or []
+        filename = self._snapshot(nodes)
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([PACKAGE_ROOT] + [p for p in [env.get('PYTHONPATH')] if p])
+        args = self.arguments(filename, references, profiler, costs, order, failfast)
+        validation.LOGGER.info('Started worker %s', ' '.join(args))
+        self._process = subprocess.Popen(args, stdout=subprocess.PIPE, env=env)
+        lines = queue.Queue()
+        self._reader = threading.Thread(target=_read, args=(self._process.stdout, lines))
+        self._reader.daemon = True
+        self._reader.start()
+
+        error = None
+        try:
+            while True:
+                try:
+                    line = lines.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if self._canceled:
+                        break
+                    yield validation.Event(validation.EVENT_IDLE, None, 0, (), ())
+                    continue
+
+                if line is None:
+                    break
+                message = json.loads(line.decode('utf-8'))
+                if message['type'] == 'end':
+                    error = message.get('error')
+                    continue
+
+                validator = validators[message['validator']]
+                errors = [self.result(*r) for r in message.get('errors', ())]
+                warnings = [self.result(*r) for r in message.get('warnings', ())]
+                validator.errors.extend(errors)
+                validator.warnings.extend(warnings)
+
+                if message['type'] == validation.EVENT_START:
+                    self._validator = validator
+                    self._position = len(self._queue)
+                    self._queue.append(validator)
+                    self._stats[validator] = validation.ValidatorStats()
+                elif message['type'] == validation.EVENT_STEP:
+                    validator._count = message['count']
+                    self._stats[validator].yields = message['index'] + 1
+                    self._count += 1
+                elif message['type'] == validation.EVENT_FINISH:
+                    stats = self._stats[validator]
+                    for key, value in message['stats'].items():
+                        setattr(stats, key, value)
+                    self._finished.add(validator)
+                    self._count += 1
+
+                yield validation.Event(message['type'], validator, message.get('index', 0), errors, warnings)
+                if not retain:
+                    validator.errors.discard(len(validator.errors))
+                    validator.warnings.discard(len(validator.warnings))
+        finally:
+            self.close()
+            if filename and os.path.isfile(filename):
+                os.remove(filename)
+            self._timeend = validation.timer()
+            self._running = False
+
+        if error:
+            raise validation.ValidatorError(error)
+        validation.LOGGER.info('Validations took {:.2f}s'.format(self.duration))
+
+    def result(self, node, uuid, message):
+        return validation.Result(self._resolve(uuid, node), message)
+
+    def stop(self):
+        """Stops the worker"""
+        super(RemoteRunner, self).stop()
+        self.close()
+
+    def close(self):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.terminate()
+        self._process.wait()
+        # -- The reader ends at EOF once the worker is gone, closing the pipe under its readline isn't safe
+        self._reader.join(READER_TIMEOUT)
+        if self._reader.is_alive():
+            validation.LOGGER.warning('Worker output still open after it exited, leaving it to the reader thread')
+        else:
+            self._process.stdout.close()
+        self._process = None
+        self._reader = None
+
+
+def _uuids():
+    """Returns a function looking up the UUID of a result's node, None without Maya"""
+    try:
+        from maya import cmds
+    except ImportError:
+        return lambda node: None
+
+    found = {}
+
+    def uuid(node):
+        if not node:
+            return None
+        path = node.split('.', 1)[0]
+        if path not in found:
+            found[path] = (cmds.ls(path, uuid=True) or [None])[0]
+
+        return found[path]
+
+    return uuid
+
+
+def main(argv=None):
+    """The worker, writes one JSON line per event to stdout"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='mayapy -m utools.maya.validation_remote', description='Validation worker')
+    parser.add_argument('--dirs', nargs='+', required=True, help='Directories containing validators')
+    parser.add_argument('--scene', help='Snapshot to open before validating')
+    parser.add_argument('--manifest', default=validation.MANIFEST_PATH, help='Validator manifest cache')
+    parser.add_argument('--validators', nargs='*', help='Only run these validators')
+    parser.add_argument('--references', action='store_true', help='Include referenced nodes')
+    parser.add_argument('--profile', metavar='DIR', help='Write pstats and collapsed stacks per validator to DIR')
+    parser.add_argument('--costs', help='Cost history to record durations to')
+    parser.add_argument('--order', help='Order validators by their cost history')
+    parser.add_argument('--failfast', action='store_true', help='Stop after the first validator with errors')
+    args = parser.parse_args(argv)
+
+    # -- Keep anything validators print out of the event stream
+    stream = sys.stdout
+    sys.stdout = sys.stderr
+
+    def write(message):
+        stream.write(json.dumps(message) + '\n')
+        stream.flush()
+
+    def results(items):
+        return [[r.node, uuid(r.node), r.message] for r in items]
+
+    if args.scene:
+        validation.openScene(args.scene)
+    uuid = _uuids()
+
+    runner = validation.Runner()
+    runner.discover(args.dirs, validation.Manifest(args.manifest or None))
+    if args.validators is not None:
+        names = set(args.validators)
+        for validator in runner.validators:
+            validator.enabled = str(validator) in names
+
+    profiler = costs = None
+    if args.profile:
+        from utools.maya.validation_profile import Profiler
+        profiler = Profiler(args.profile)
+    if args.costs or args.order:
+        from utools.maya import validation_costs
+        costs = validation_costs.CostModel(args.costs or validation_costs.DEFAULT_PATH)
+
+    error = None
+    written = 0.0
+    try:
+        events = runner.start(
+            references=args.references, profiler=profiler, costs=costs, order=args.order, failfast=args.failfast, retain=False)
+        for event in events:
+            message = {'type': event.type, 'validator': str(event.validator), 'index': event.index}
+            if event.errors or event.warnings:
+                message['errors'] = results(event.errors)
+                message['warnings'] = results(event.warnings)
+            elif event.type == validation.EVENT_STEP and validation.timer() - written < STEP_INTERVAL:
+                # -- Progress only needs to reach the window a few times a second
+                continue
+            if event.type == validation.EVENT_STEP:
+                message['count'] = event.validator.count
+            if event.type == validation.EVENT_FINISH:
+                stats = runner.stats[event.validator]
+                message['stats'] = dict((key, getattr(stats, key)) for key in stats.__slots__)
+            write(message)
+            written = validation.timer()
+    except validation.ValidatorError as err:
+        error = '{} failed: {}'.format(runner.validator, err)
+
+    write({'type': 'end', 'duration': runner.duration, 'error': error})
+
+    return 1 if error else 0
+
+
+if __name__ == '__main__':
+    # -- Validators import utools.maya.validation, run the worker from the package module
+    from utools.maya import validation_remote
+    sys.exit(validation_remote.main())
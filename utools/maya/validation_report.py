@@ -0,0 +1,221 @@
+"""Streaming validation reports
+
+Reporters subscribe to a run's events and write every result as soon as it
+is reported, flushing as they go, so a crashed run still leaves the results
+found so far.  Combined with `Runner.start(retain=False)` memory stays flat
+however many results the run produces.
+
+>>> from utools.maya import validation_report
+>>> with open('results.jsonl', 'w') as stream:
+...     reporters = [validation_report.JsonLinesReporter(stream)]
+...     for event in validation_report.report(runner, runner.start(retain=False), reporters):
+...         pass
+
+JSON Lines output has one object per result, one per finished validator and
+a summary as the last line.  JUnit XML has a testcase per validator, each
+failure is spooled to a temporary file until the validator finishes and its
+time is known.
+"""
+
+import json
+import tempfile
+
+from utools.maya.validation import EVENT_START, EVENT_FINISH, ValidatorError
+
+SPOOL_SIZE = 1 << 20
+
+
+class Reporter(object):
+    """Writes a run's results to `stream` as they come in
+
+    Subclasses implement the callbacks, `handle` dispatches events to them.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, getattr(self._stream, 'name', self._stream))
+
+    def handle(self, runner, event):
+        if event.validator is None:
+            return
+        if event.type == EVENT_START:
+            self.started(event.validator)
+        if event.errors or event.warnings:
+            self.results(event.validator, event.errors, event.warnings)
+        if event.type == EVENT_FINISH:
+            stats = runner.stats.get(event.validator)
+            self.finished(event.validator, stats.wall if stats is not None else 0.0)
+
+    def begin(self, runner):
+        pass
+
+    def started(self, validator):
+        pass
+
+    def results(self, validator, errors, warnings):
+        pass
+
+    def finished(self, validator, duration):
+        pass
+
+    def failed(self, validator, error):
+        """Called when `validator` raised `error` and the run stops"""
+        pass
+
+    def end(self, runner):
+        self._stream.flush()
+
+
+class TextReporter(Reporter):
+    """Writes a line per result and a summary"""
+    def results(self, validator, errors, warnings):
+        for severity, results in (('ERROR', errors), ('WARNING', warnings)):
+            for result in results:
+                self._stream.write('{} {}: {} {}\n'.format(severity, validator, result.node or '', result.message))
+        self._stream.flush()
+
+    def end(self, runner):
+        self._stream.write('{} errors, {} warnings in {:.2f}s\n'.format(runner.errors, runner.warnings, runner.duration))
+        self._stream.flush()
+
+
+class JsonLinesReporter(Reporter):
+    """Writes one JSON object per line"""
+    def _write(self, data):
+        self._stream.write(json.dumps(data) + '\n')
+
+    def results(self, validator, errors, warnings):
+        for severity, results in (('error', errors), ('warning', warnings)):
+            for result in results:
+                self._write({
+                    'validator': str(validator),
+                    'severity': severity,
+                    'node': result.node,
+                    'message': result.message,
+                })
+        self._stream.flush()
+
+    def finished(self, validator, duration):
+        self._write({
+            'validator': str(validator),
+            'duration': duration,
+            'errors': len(validator.errors),
+            'warnings': len(validator.warnings),
+        })
+        self._stream.flush()
+
+    def end(self, runner):
+        self._write({
+            'errors': runner.errors,
+            'warnings': runner.warnings,
+            'duration': runner.duration,
+        })
+        self._stream.flush()
+
+
+class JUnitReporter(Reporter):
+    """Writes a testcase per validator as soon as it finishes
+
+    A testcase's failures are kept in a temporary file that only moves to disk
+    past `SPOOL_SIZE` bytes, so huge validators don't hold their XML in memory.
+    """
+    def __init__(self, stream):
+        super(JUnitReporter, self).__init__(stream)
+
+        self._validator = None
+        self._failures = None
+        self._warnings = None
+        self._error = None
+
+    def _spool(self):
+        return tempfile.SpooledTemporaryFile(SPOOL_SIZE, 'w+')
+
+    def begin(self, runner):
+        self._stream.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuite name="validation">\n')
+        self._stream.flush()
+
+    def started(self, validator):
+        self._validator = validator
+        self._failures = self._spool()
+        self._warnings = self._spool()
+
+    def results(self, validator, errors, warnings):
+        for result in errors:
+            self._failures.write('    <failure message={} type="error">{}</failure>\n'.format(
+                quoteattr(result.message or ''), escape(result.node or '')))
+        for result in warnings:
+            self._warnings.write(escape('WARNING: {} {}\n'.format(result.node or '', result.message or '')))
+
+    def finished(self, validator, duration):
+        self._stream.write('  <testcase classname="validation" name={} time="{:.3f}">\n'.format(
+            quoteattr(str(validator)), duration))
+        if self._error is not None:
+            self._stream.write('    <error message={} type={} />\n'.format(
+                quoteattr(str(self._error)), quoteattr(type(self._error).__name__)))
+        self._copy(self._failures)
+        if self._warnings.tell():
+            self._stream.write('    <system-out>')
+            self._copy(self._warnings)
+            self._stream.write('</system-out>\n')
+        self._stream.write('  </testcase>\n')
+        self._stream.flush()
+
+        self._failures.close()
+        self._warnings.close()
+        self._validator = self._failures = self._warnings = self._error = None
+
+    def failed(self, validator, error):
+        if self._validator is None:
+            self.started(validator)
+        self._error = error
+
+    def _copy(self, spool):
+        spool.seek(0)
+        for chunk in iter(lambda: spool.read(1 << 16), ''):
+            self._stream.write(chunk)
+
+    def end(self, runner):
+        # -- Keep what a validator that failed or was stopped reported so far
+        if self._validator is not None:
+            stats = runner.stats.get(self._validator)
+            self.finished(self._validator, stats.wall if stats is not None else 0.0)
+        self._stream.write('</testsuite>\n')
+        self._stream.flush()
+
+
+def escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def quoteattr(text):
+    return '"{}"'.format(escape(text))
+
+
+REPORTERS = {
+    'text': TextReporter,
+    'json': JsonLinesReporter,
+    'junit': JUnitReporter,
+}
+
+
+def report(runner, events, reporters):
+    """Passes `events` of `runner` through, handing each one to `reporters` first
+
+    Reporters are ended even if the run fails or is abandoned, a validator
+    raising is reported to them first.
+    """
+    for reporter in reporters:
+        reporter.begin(runner)
+    try:
+        for event in events:
+            for reporter in reporters:
+                reporter.handle(runner, event)
+            yield event
+    except ValidatorError as err:
+        for reporter in reporters:
+            reporter.failed(runner.validator, err)
+        raise
+    finally:
+        for reporter in reporters:
+            reporter.end(runner)
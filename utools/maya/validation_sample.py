@@ -0,0 +1,145 @@
+"""Sampled validation
+
+Gives quick, approximate feedback on scenes too large to validate while an
+artist waits.  Validators implementing `Validator.sample` check a random sample
+of the nodes in scope until a time budget runs out.  The issue counts of the
+whole scope are then estimated from what the sample found.  Publishing should
+still rely on a full run.
+
+>>> from utools.maya import validation_sample
+>>> sampler = validation_sample.Sampler(budget=2.0)
+>>> list(runner.start(sampler=sampler))
+>>> sampler.estimates[validator].errors
+Interval(value=120.0, low=84.2, high=155.8)
+
+The sample is stratified by node type, so every prefix of it holds each type
+in proportion to the scope, wherever the budget cuts it off.  Intervals are
+the normal approximation at `Z` standard errors of the stratified estimate.
+"""
+
+import math
+import random
+from collections import namedtuple
+
+DEFAULT_BUDGET = 2.0
+Z = 1.96
+
+Interval = namedtuple('Interval', ['value', 'low', 'high'])
+Estimate = namedtuple('Estimate', ['checked', 'population', 'errors', 'warnings'])
+
+
+def stratify(strata, rng=random):
+    """Returns the nodes of `strata`, `{type: nodes}`, in a random order keeping every
+    prefix proportionally stratified
+
+    Each stratum is shuffled and its nodes are spread evenly over 0 to 1 with a
+    random offset, sorting all of them by that position interleaves the strata.
+    """
+    keyed = []
+    for nodetype in sorted(strata):
+        nodes = list(strata[nodetype])
+        rng.shuffle(nodes)
+        size = float(len(nodes))
+        keyed.extend(((i + rng.random()) / size, node) for i, node in enumerate(nodes))
+    keyed.sort(key=lambda pair: pair[0])
+
+    return [node for position, node in keyed]
+
+
+def issues(results):
+    """Returns `{node: count}` of `results`, components count towards their node"""
+    counts = {}
+    for result in results:
+        if result.node:
+            node = result.node.split('.', 1)[0]
+            counts[node] = counts.get(node, 0) + 1
+
+    return counts
+
+
+def estimate(strata, checked, counts):
+    """Returns the `Interval` of the total issue count of `strata`, `{type: nodes}`
+
+    :param checked: The nodes that were checked
+    :param counts: `{node: count}` of the issues found on checked nodes
+
+    The interval never goes below the issues actually found, and has no upper
+    bound while a stratum wasn't checked at all.
+    """
+    checked = set(checked)
+    total = variance = 0.0
+    found = 0
+    unchecked = False
+    for nodes in strata.values():
+        values = [counts.get(node, 0) for node in nodes if node in checked]
+        if not values:
+            unchecked = unchecked or bool(nodes)
+            continue
+
+        size = len(values)
+        population = len(nodes)
+        mean = sum(values) / float(size)
+        total += population * mean
+        found += sum(values)
+        if size > 1:
+            deviation = sum((value - mean) ** 2 for value in values) / (size - 1)
+            variance += population * population * (1.0 - size / float(population)) * deviation / size
+
+    half = Z * math.sqrt(variance)
+    high = float('inf') if unchecked else total + half
+
+    return Interval(total, max(float(found), total - half), high)
+
+
+class Sampler(object):
+    """Picks the nodes sampled validators check and estimates their issues
+
+    :param budget: Seconds each sampled validator spends checking nodes, time between its steps doesn't count
+    :param seed: Seed of the sample, None for a different sample every run
+    """
+    def __init__(self, budget=DEFAULT_BUDGET, seed=None):
+        self._budget = budget
+        self._rng = random.Random(seed)
+        self._estimates = {}
+
+    def __repr__(self):
+        return '<Sampler budget={}s>'.format(self._budget)
+
+    @property
+    def budget(self):
+        return self._budget
+
+    @property
+    def estimates(self):
+        """`Estimate`s of the sampled validators of the last run"""
+        return self._estimates
+
+    def reset(self):
+        self._estimates = {}
+
+    def strata(self, validator, scope):
+        """Returns `{type: nodes}` of the nodes in `scope` that `validator` samples"""
+        strata = {}
+        for nodetype in validator.SAMPLE_TYPES or scope.types():
+            nodes = scope.nodes(nodetype)
+            if nodes:
+                strata[nodetype] = nodes
+
+        return strata
+
+    def nodes(self, validator, scope):
+        """Returns the nodes for `validator` to check, in the order to check them"""
+        return stratify(self.strata(validator, scope), self._rng)
+
+    def record(self, validator, scope, checked):
+        """Estimates the issues of `validator` over `scope` after it checked the nodes `checked`"""
+        strata = self.strata(validator, scope)
+        result = Estimate(
+            len(checked),
+            sum(len(nodes) for nodes in strata.values()),
+            estimate(strata, checked, issues(validator.errors)),
+            estimate(strata, checked, issues(validator.warnings)),
+        )
+        self._estimates[validator] = result
+
+        return result
@@ -0,0 +1,292 @@
+"""Vectorized UV checks
+
+Faces are fan triangulated in UV space and binned into a uniform grid sized
+after the triangles, only triangles sharing a cell are tested against each
+other with a separating axis test.  The work grows with the number of
+triangles rather than with the number of pairs.
+
+>>> from utools.maya import validation_uv
+>>> data = validation_uv.fromMaya('|pCube1|pCubeShape1')
+>>> validation_uv.overlappingFaces(data)
+array([2, 3])
+
+Timings on a synthetic layout can be printed from a shell:
+
+    python -m utools.maya.validation_uv --shells 100000
+"""
+
+from __future__ import print_function
+
+import sys
+import argparse
+
+import numpy as np
+
+from utools.maya.validation import timer
+from utools.maya.validation_mesh import fromSequence
+
+TOLERANCE = 1e-7
+MAX_CELLS = 1 << 22
+
+
+class UVData(object):
+    """The UVs of a single mesh
+
+    :param counts: Number of UVs of every face, 0 for faces without UVs
+    :param uvs: UV indices of every face, flattened
+    :param u: U coordinate of every UV
+    :param v: V coordinate of every UV
+    :param shells: Shell id of every UV, None if unknown
+    """
+    def __init__(self, counts, uvs, u, v, shells=None):
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.uvs = np.asarray(uvs, dtype=np.int64)
+        self.points = np.column_stack((np.asarray(u, dtype=np.float64), np.asarray(v, dtype=np.float64)))
+        self.shells = np.asarray(shells, dtype=np.int64) if shells is not None else None
+        self._triangles = None
+
+    def __repr__(self):
+        return '<UVData faces={} uvs={}>'.format(len(self.counts), len(self.points))
+
+    @property
+    def triangles(self):
+        """`(corners, faces)`, the `(n, 3)` UV indices of the fan triangles and their faces"""
+        if self._triangles is None:
+            offsets = np.zeros(len(self.counts), dtype=np.int64)
+            np.cumsum(self.counts[:-1], out=offsets[1:])
+            fans = np.maximum(self.counts - 2, 0)
+            faces = np.repeat(np.arange(len(self.counts)), fans)
+            first = np.repeat(offsets, fans)
+            # -- Position of every triangle within its face's fan
+            step = np.arange(len(faces)) - np.repeat(np.cumsum(fans) - fans, fans)
+            corners = np.column_stack((first, first + step + 1, first + step + 2))
+            self._triangles = self.uvs[corners], faces
+
+        return self._triangles
+
+    def faceShells(self):
+        """Returns the shell of every face, taken from its first UV"""
+        offsets = np.zeros(len(self.counts), dtype=np.int64)
+        np.cumsum(self.counts[:-1], out=offsets[1:])
+        shells = np.full(len(self.counts), -1, dtype=np.int64)
+        mapped = self.counts > 0
+        if self.shells is not None:
+            shells[mapped] = self.shells[self.uvs[offsets[mapped]]]
+
+        return shells
+
+
+def outOfBoundsFaces(data, low=0.0, high=1.0):
+    """Returns the faces with a UV outside `low` to `high`"""
+    outside = np.any((data.points < low) | (data.points > high), axis=1)
+    faces = np.repeat(np.arange(len(data.counts)), data.counts)
+
+    return np.unique(faces[outside[data.uvs]])
+
+
+def cellPairs(minimum, maximum, cell, groups=None):
+    """Returns the `(first, second)` indices of overlapping boxes that share a grid cell
+
+    Every box is added to each cell it covers.  A pair is only reported by the
+    cell holding the lower corner of its intersection, so pairs sharing several
+    cells don't need to be deduplicated.
+
+    :param minimum: `(n, 2)` lower corners of the boxes
+    :param maximum: `(n, 2)` upper corners of the boxes
+    :param cell: Size of a grid cell
+    :param groups: Group of every box, boxes in the same group aren't paired
+    """
+    low = np.floor(minimum / cell).astype(np.int64)
+    high = np.floor(maximum / cell).astype(np.int64)
+    span = high - low + 1
+    covered = span[:, 0] * span[:, 1]
+
+    # -- Expand every box to the cells it covers
+    boxes = np.repeat(np.arange(len(minimum)), covered)
+    step = np.arange(len(boxes)) - np.repeat(np.cumsum(covered) - covered, covered)
+    x = low[boxes, 0] + step % span[boxes, 0]
+    y = low[boxes, 1] + step // span[boxes, 0]
+    if not len(boxes):
+        return boxes, boxes
+    cells = (x - x.min()) * (y.max() - y.min() + 1) + (y - y.min())
+
+    order = np.argsort(cells, kind='mergesort')
+    cells, boxes, x, y = cells[order], boxes[order], x[order], y[order]
+
+    # -- Pair every entry with the ones after it in the same cell
+    starts = np.flatnonzero(np.concatenate(([True], cells[1:] != cells[:-1])))
+    sizes = np.diff(np.append(starts, len(cells)))
+    following = np.repeat(starts + sizes, sizes) - np.arange(len(cells)) - 1
+    entry = np.repeat(np.arange(len(cells)), following)
+    a = boxes[entry]
+    b = boxes[entry + 1 + np.arange(len(entry)) - np.repeat(np.cumsum(following) - following, following)]
+
+    keep = np.all((minimum[a] <= maximum[b]) & (minimum[b] <= maximum[a]), axis=1)
+    if groups is not None:
+        keep &= groups[a] != groups[b]
+    a, b, entry = a[keep], b[keep], entry[keep]
+
+    corner = np.floor(np.maximum(minimum[a], minimum[b]) / cell).astype(np.int64)
+    owner = (corner[:, 0] == x[entry]) & (corner[:, 1] == y[entry])
+
+    return a[owner], b[owner]
+
+
+def trianglesOverlap(a, b, tolerance=TOLERANCE):
+    """Returns True for every pair of `(n, 3, 2)` triangles in `a` and `b` that overlap
+
+    Uses the separating axis test with the edge normals of both triangles,
+    triangles only touching along an edge or at a corner don't overlap.
+    """
+    overlap = np.ones(len(a), dtype=bool)
+    for triangle in (a, b):
+        for i in range(3):
+            edge = triangle[:, (i + 1) % 3] - triangle[:, i]
+            axis = np.column_stack((-edge[:, 1], edge[:, 0]))
+            length = np.sqrt(np.einsum('ij,ij->i', axis, axis))
+            axis /= np.where(length > 0, length, 1.0)[:, None]
+            projecta = np.einsum('ijk,ik->ij', a, axis)
+            projectb = np.einsum('ijk,ik->ij', b, axis)
+            separated = (
+                (projecta.max(axis=1) <= projectb.min(axis=1) + tolerance)
+                | (projectb.max(axis=1) <= projecta.min(axis=1) + tolerance)
+            )
+            overlap &= ~separated
+
+    return overlap
+
+
+def overlappingTriangles(data, tolerance=TOLERANCE):
+    """Returns the `(first, second)` indices of overlapping triangles in `data.triangles`"""
+    corners, faces = data.triangles
+    empty = np.zeros(0, dtype=np.int64)
+    if len(corners) < 2:
+        return empty, empty
+
+    points = data.points[corners]
+    edgea = points[:, 1] - points[:, 0]
+    edgeb = points[:, 2] - points[:, 0]
+    area = np.abs(edgea[:, 0] * edgeb[:, 1] - edgea[:, 1] * edgeb[:, 0])
+    valid = np.flatnonzero(area > tolerance * tolerance)
+    if len(valid) < 2:
+        return empty, empty
+
+    minimum = points[valid].min(axis=1)
+    maximum = points[valid].max(axis=1)
+    extent = np.max(maximum - minimum, axis=1)
+    cell = max(np.median(extent), tolerance)
+    # -- Keep huge triangles from covering an unbounded number of cells
+    total = np.prod(np.max(maximum, axis=0) - np.min(minimum, axis=0)) / (cell * cell)
+    if total > MAX_CELLS:
+        cell *= np.sqrt(total / MAX_CELLS)
+
+    # -- Fan triangles of the same face share edges and can't overlap
+    first, second = cellPairs(minimum, maximum, cell, faces[valid])
+    first, second = valid[first], valid[second]
+    keep = trianglesOverlap(points[first], points[second], tolerance)
+
+    return first[keep], second[keep]
+
+
+def overlappingFaces(data, tolerance=TOLERANCE):
+    """Returns the faces with UVs overlapping another face"""
+    corners, faces = data.triangles
+    first, second = overlappingTriangles(data, tolerance)
+
+    return np.unique(np.concatenate((faces[first], faces[second])))
+
+
+def overlappingShells(data, tolerance=TOLERANCE):
+    """Returns `{shell: faces}` of the overlapping faces grouped by shell"""
+    found = overlappingFaces(data, tolerance)
+    if not len(found):
+        return {}
+
+    shells = data.faceShells()[found]
+    order = np.argsort(shells, kind='mergesort')
+    shells, found = shells[order], found[order]
+    starts = np.flatnonzero(np.concatenate(([True], shells[1:] != shells[:-1])))
+
+    return dict(zip(shells[starts].tolist(), np.split(found, starts[1:])))
+
+
+def fromMaya(mesh, uvSet=None):
+    """Returns the `UVData` of the mesh node `mesh`"""
+    from maya.api import OpenMaya as om
+
+    selection = om.MSelectionList()
+    selection.add(mesh)
+    fn = om.MFnMesh(selection.getDagPath(0))
+    uvSet = uvSet or fn.currentUVSetName()
+    counts, uvs = fn.getAssignedUVs(uvSet)
+    u, v = fn.getUVs(uvSet)
+    count, shells = fn.getUvShellsIds(uvSet)
+
+    return UVData(
+        fromSequence(counts),
+        fromSequence(uvs),
+        fromSequence(u, np.float64),
+        fromSequence(v, np.float64),
+        fromSequence(shells),
+    )
+
+
+def uvData(mesh, scope=None):
+    """Returns the `UVData` of `mesh`, shared with other validators through `scope.cache`"""
+    if scope is None:
+        return fromMaya(mesh)
+
+    key = ('UVData', mesh)
+    if key not in scope.cache:
+        scope.cache[key] = fromMaya(mesh)
+
+    return scope.cache[key]
+
+
+def layout(shells, overlapping=0.01):
+    """Returns `UVData` of `shells` single quad shells on a grid in 0 to 1
+
+    A fraction `overlapping` of them is moved onto its neighbour.
+    """
+    size = int(np.ceil(np.sqrt(shells)))
+    step = 1.0 / size
+    index = np.arange(shells)
+    x = (index % size) * step
+    y = (index // size) * step
+    moved = index[:int(shells * overlapping)] * 2
+    moved = moved[moved < shells - 1]
+    x[moved] += step * 0.5
+
+    corners = np.array([(0.1, 0.1), (0.9, 0.1), (0.9, 0.9), (0.1, 0.9)]) * step
+    u = (x[:, None] + corners[:, 0]).ravel()
+    v = (y[:, None] + corners[:, 1]).ravel()
+
+    return UVData(np.full(shells, 4), np.arange(shells * 4), u, v, np.repeat(index, 4))
+
+
+def benchmark(shells=100000):
+    """Returns `[(check, seconds)]` for a `layout` of `shells` shells"""
+    timings = []
+    for name, check in (('outOfBoundsFaces', outOfBoundsFaces), ('overlappingShells', overlappingShells)):
+        data = layout(shells)
+        timestart = timer()
+        check(data)
+        timings.append((name, timer() - timestart))
+
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m utools.maya.validation_uv', description='Time the UV checks')
+    parser.add_argument('--shells', type=int, nargs='+', default=[10000, 100000], help='Shells of the synthetic layouts')
+    args = parser.parse_args(argv)
+
+    for shells in args.shells:
+        for name, seconds in benchmark(shells):
+            print('{:>8} shells {:<20} {:>8.3f}s'.format(shells, name, seconds))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Validators shipped with utools, discover `utools.maya.validation.BUILTIN_DIR` to use them"""
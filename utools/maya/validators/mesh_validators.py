@@ -0,0 +1,124 @@
+"""Built-in mesh validators
+
+Each one reads the meshes in the run's scope once as arrays, see
+`utools.maya.validation_mesh`, and reports compact component ranges.
+"""
+
+from utools.maya import validation
+from utools.maya import validation_mesh
+
+
+class _MeshValidator(validation.Validator):
+    """Runs `check` on every mesh in scope and reports what it returns"""
+    MESSAGE = ''
+    COMPONENT = 'f'
+    SAMPLE_TYPES = ('mesh',)
+
+    def check(self, data):
+        """Returns the offending component indices, or vertex pairs for edges"""
+        raise NotImplementedError
+
+    def find(self, mesh, scope):
+        """Returns what `check` finds in `mesh`, override to check something other than its `MeshData`"""
+        return self.check(validation_mesh.meshData(mesh, scope))
+
+    def report(self, mesh, found):
+        if self.COMPONENT == 'e':
+            for component in validation_mesh.edgeComponents(mesh, found):
+                self._errors.append(self.Result(component, self.MESSAGE))
+            return
+
+        for first, last in validation_mesh.ranges(found):
+            self._errors.appendRange(mesh, self.COMPONENT, first, last, self.MESSAGE)
+
+    def run(self, selection=False, references=False):
+        scope = self.scope if self.scope is not None else validation.Scope(selection, references)
+        meshes = scope.nodes('mesh')
+        self._count = max(1, len(meshes))
+        for mesh in meshes:
+            self.report(mesh, self.find(mesh, scope))
+            yield
+
+    def sample(self, nodes):
+        for mesh in nodes:
+            self.report(mesh, self.find(mesh, self.scope))
+            yield
+
+
+class NonManifoldEdges(_MeshValidator):
+    """Edges shared by more than two faces"""
+    MESSAGE = 'Non-manifold edge'
+    COMPONENT = 'e'
+
+    def check(self, data):
+        return validation_mesh.nonManifoldEdges(data)
+
+
+class FlippedWinding(_MeshValidator):
+    """Neighbouring faces with opposite winding"""
+    MESSAGE = 'Faces on either side wind in the same direction'
+    COMPONENT = 'e'
+
+    def check(self, data):
+        return validation_mesh.flippedEdges(data)
+
+
+class LaminaFaces(_MeshValidator):
+    """Faces sharing all of their vertices with another face"""
+    MESSAGE = 'Lamina face'
+
+    def check(self, data):
+        return validation_mesh.laminaFaces(data)
+
+
+class ZeroAreaFaces(_MeshValidator):
+    """Faces without area"""
+    MESSAGE = 'Zero area face'
+    TOLERANCE = validation_mesh.AREA_TOLERANCE
+
+    def check(self, data):
+        return validation_mesh.zeroAreaFaces(data, self.TOLERANCE)
+
+
+class ZeroLengthEdges(_MeshValidator):
+    """Edges without length"""
+    MESSAGE = 'Zero length edge'
+    COMPONENT = 'e'
+    TOLERANCE = validation_mesh.LENGTH_TOLERANCE
+
+    def check(self, data):
+        return validation_mesh.zeroLengthEdges(data, self.TOLERANCE)
+
+    def fix(self, results):
+        from maya import cmds
+
+        vertices = cmds.polyListComponentConversion([r.node for r in results], fromEdge=True, toVertex=True)
+        cmds.polyMergeVertex(vertices, distance=self.TOLERANCE)
+
+
+class NGons(_MeshValidator):
+    """Faces with more than four sides"""
+    MESSAGE = 'N-gon'
+    SIDES = validation_mesh.SIDES
+
+    def check(self, data):
+        return validation_mesh.ngons(data, self.SIDES)
+
+    def fix(self, results):
+        from maya import cmds
+
+        cmds.polyTriangulate([r.node for r in results])
+
+
+class UnlockedNormals(_MeshValidator):
+    """Vertices whose normals aren't locked"""
+    MESSAGE = 'Unlocked normal'
+    COMPONENT = 'vtx'
+
+    def find(self, mesh, scope):
+        return validation_mesh.unlockedNormals(validation_mesh.lockedNormals(mesh, scope))
+
+    def fix(self, results):
+        from maya import cmds
+
+        cmds.polyNormalPerVertex([r.node for r in results], freezeNormal=True)
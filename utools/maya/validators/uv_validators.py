@@ -0,0 +1,49 @@
+"""Built-in UV validators
+
+See `utools.maya.validation_uv` for the checks, results are reported as
+compact face ranges.
+"""
+
+from utools.maya import validation
+from utools.maya import validation_mesh
+from utools.maya import validation_uv
+
+
+class _UVValidator(validation.Validator):
+    """Runs `check` on the current UV set of every mesh in scope"""
+    SAMPLE_TYPES = ('mesh',)
+
+    def check(self, mesh, data):
+        """Adds the results for `mesh`"""
+        raise NotImplementedError
+
+    def run(self, selection=False, references=False):
+        scope = self.scope if self.scope is not None else validation.Scope(selection, references)
+        meshes = scope.nodes('mesh')
+        self._count = max(1, len(meshes))
+        for mesh in meshes:
+            self.check(mesh, validation_uv.uvData(mesh, scope))
+            yield
+
+    def sample(self, nodes):
+        for mesh in nodes:
+            self.check(mesh, validation_uv.uvData(mesh, self.scope))
+            yield
+
+
+class UVOverlap(_UVValidator):
+    """Faces whose UVs overlap other faces"""
+    TOLERANCE = validation_uv.TOLERANCE
+
+    def check(self, mesh, data):
+        for shell, faces in sorted(validation_uv.overlappingShells(data, self.TOLERANCE).items()):
+            message = 'Overlapping UVs in shell {}'.format(shell)
+            for first, last in validation_mesh.ranges(faces):
+                self._errors.appendRange(mesh, 'f', first, last, message)
+
+
+class UVOutOfBounds(_UVValidator):
+    """Faces with UVs outside 0 to 1"""
+    def check(self, mesh, data):
+        for first, last in validation_mesh.ranges(validation_uv.outOfBoundsFaces(data)):
+            self._warnings.appendRange(mesh, 'f', first, last, 'UVs outside 0 to 1')
@@ -0,0 +1,973 @@
+##################################################################################################
+# Copyright (c) 2014 Brett Dixon
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the "Software"), to deal in 
+# the Software without restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the 
+# Software, and to permit persons to whom the Software is furnished to do so, 
+# subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all 
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS 
+# FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR 
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER 
+# IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION 
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##################################################################################################
+
+"""Validation Window
+
+>>> from utools.maya.widgets import validationwindow
+>>> validationwindow.main(['path/to/tests'])
+"""
+
+from __future__ import print_function
+
+from PySide import QtGui, QtCore
+
+from utools.maya import common
+from utools.maya import tracing
+from utools.maya import validation_fix
+from utools.maya import validation_cache
+from utools.maya import validation_costs
+from utools.maya import validation_history
+from utools.maya import validation_sample
+from utools.maya.validation import Runner, Result, ValidatorError, EVENT_STEP, EVENT_FINISH, LOGGER, timer, timeSlice
+
+TIME_ROLE = QtCore.Qt.UserRole + 1
+PROGRESS_COLOR = QtGui.QColor('#64b5f6')
+BUTTON_SIZE = 56
+RESULT_INTERVAL = 0.1
+FRAME_INTERVAL = 1.0 / 30
+TIME_SLICE = 0.015
+DIFF_MODES = ('All results', 'New', 'Fixed', 'Persisting')
+WINDOW = None
+STYLE = """
+QWidget {
+    color: #fff;
+    font-family: Roboto;
+    font-size: 14px;
+}
+QWidget:focus {
+    border: none;
+}
+QAbstractItemView::indicator {
+    width: 24px;
+    height: 24px;
+    background-image: url(':/ui/res/ic_check_box_white_24dp_1x.png');
+}
+QAbstractItemView::indicator:unchecked {
+    background-image: url(':/ui/res/ic_check_box_outline_blank_white_24dp_1x.png');
+}
+QAbstractItemView::branch:open:has-children {
+    image: url(':/ui/res/ic_expand_more_white_24dp_2x.png');
+}
+QAbstractItemView::branch:closed:has-children {
+    image: url(':/ui/res/ic_closed_white_24dp_2x.png');
+}
+#ListValidators {background-color: #373737}
+QFrame {background-color: #303030 }
+#FrameResults QPushButton {
+    border: none;
+    background-color: transparent;
+    background-image: url(':/ui/res/ic_play_arrow_color_24dp_2x.png');
+}
+#FrameResults QPushButton:hover {
+    background-image: url(':/ui/res/ic_play_arrow_color_hover_24dp_2x.png');
+}
+#FrameResults QPushButton:checked {
+    background-image: url(':/ui/res/ic_stop_color_24dp_2x.png');
+}
+#FrameResults QLabel {
+    padding: 12px;
+    font-size: 30px;
+    background-color: #484848;
+}
+#FrameResults QPushButton#bFixAll {
+    background-image: none;
+    background-color: #484848;
+    padding: 4px 12px;
+}
+#FrameResults QPushButton#bFixAll:disabled {
+    color: #777;
+}
+#FrameResults QLabel#Timing {
+    font-size: 10px;
+    padding: 0 0 0 20px;
+    background-color: transparent;
+}
+"""
+
+
+def registerResources():
+    """Registers the icons used by the window, deferred until a window is created as the
+    resource module is large
+    """
+    # -- Importing the module registers the resources once
+    from utools.maya.widgets import validator_res
+
+
+class ResultFrame(QtGui.QFrame):
+    def resizeEvent(self, event):
+        for child in self.children():
+            if isinstance(child, QtGui.QPushButton):
+                child.move((self.width() / 2) - (child.width() / 2), 40)
+                child.raise_()
+
+        return super(ResultFrame, self).resizeEvent(event)
+
+
+class ValidatorDelegate(QtGui.QStyledItemDelegate):
+    """Paints a validator row with a progress strip along its bottom
+
+    Pixmaps, the font and text layouts are made once per delegate.  Progress is
+    kept here rather than in the model, so a change only repaints the strip, see
+    `setProgress`.  The delegate watches the paint events of the view it is
+    given as parent, rows whose exposed part lies within their strip only get
+    the strip painted.  `paints`, `strips` and `paintTime` count the work for
+    benchmarks.
+    """
+    STRIP = 4
+
+    def __init__(self, parent=None):
+        super(ValidatorDelegate, self).__init__(parent)
+
+        # -- Item views paint with an unclipped painter, the exposed region is only in the paint event
+        self._region = None
+        if isinstance(parent, QtGui.QAbstractItemView):
+            parent.viewport().installEventFilter(self)
+
+        self._checked = QtGui.QPixmap(':/ui/res/ic_check_box_white_24dp_1x.png')
+        self._unchecked = QtGui.QPixmap(':/ui/res/ic_check_box_outline_blank_white_24dp_1x')
+        self._font = QtGui.QFont('Roboto', 12)
+        self._texts = {}
+        self._progress = {}
+        self.paints = 0
+        self.strips = 0
+        self.paintTime = 0.0
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint:
+            self._region = QtGui.QRegion(event.region())
+
+        return False
+
+    def staticText(self, text):
+        """Returns the laid out `QStaticText` of `text`"""
+        static = self._texts.get(text)
+        if static is None:
+            static = self._texts[text] = QtGui.QStaticText(text)
+            static.setPerformanceHint(QtGui.QStaticText.AggressiveCaching)
+            static.prepare(QtGui.QTransform(), self._font)
+
+        return static
+
+    def progressRect(self, rect):
+        """Returns the strip of the row `rect` the progress is drawn in"""
+        return QtCore.QRect(rect.left(), rect.bottom() - self.STRIP + 1, rect.width(), self.STRIP)
+
+    def setProgress(self, row, progress):
+        """Sets the progress of `row` from 0 to 1, returns True if it changed"""
+        if self._progress.get(row) == progress:
+            return False
+        self._progress[row] = progress
+
+        return True
+
+    def clearProgress(self):
+        self._progress = {}
+
+    def resetStats(self):
+        self.paints = 0
+        self.strips = 0
+        self.paintTime = 0.0
+
+    def stripOnly(self, rect):
+        """True if only the progress strip of the row `rect` is being repainted"""
+        if self._region is None:
+            return False
+        exposed = self._region.intersected(QtGui.QRegion(rect)).boundingRect()
+
+        return not exposed.isEmpty() and self.progressRect(rect).contains(exposed)
+
+    def paint(self, painter, option, index):
+        timestart = timer()
+        rect = option.rect
+        strip = self.progressRect(rect)
+
+        # -- Progress updates only expose the strip, the rest of the row is unchanged
+        if self.stripOnly(rect):
+            self.strips += 1
+        else:
+            painter.setRenderHints(QtGui.QPainter.TextAntialiasing)
+            painter.setFont(self._font)
+
+            # -- Draw icon
+            checked = index.data(QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked
+            painter.drawPixmap(rect.left() + 16, rect.center().y() - 8, self._checked if checked else self._unchecked)
+
+            # -- Draw text
+            text = self.staticText(index.data(QtCore.Qt.DisplayRole) or '')
+            painter.drawStaticText(QtCore.QPointF(rect.left() + 48, rect.center().y() - text.size().height() / 2), text)
+
+            # -- Draw timing
+            timing = index.data(TIME_ROLE)
+            if timing:
+                text = self.staticText(timing)
+                painter.drawStaticText(QtCore.QPointF(
+                    rect.right() - 16 - text.size().width(), rect.center().y() - text.size().height() / 2), text)
+
+        # -- Draw progress
+        progress = self._progress.get(index.row())
+        if progress:
+            painter.fillRect(strip.left(), strip.top(), int(strip.width() * progress), self.STRIP, PROGRESS_COLOR)
+
+        self.paints += 1
+        self.paintTime += timer() - timestart
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(100, 48)
+
+
+class _Group(object):
+    """A top level row of the ResultModel
+
+    Its rows index into the validator's own errors and warnings, errors first,
+    results are never copied.
+    """
+    __slots__ = ('label', 'row', 'errors', 'warnings', 'fetchederrors', 'fetchedwarnings', 'sampled')
+
+    def __init__(self, label, row):
+        self.label = label
+        self.row = row
+        self.errors = ()
+        self.warnings = ()
+        self.fetchederrors = 0
+        self.fetchedwarnings = 0
+        self.sampled = None
+
+    @property
+    def fetched(self):
+        return self.fetchederrors + self.fetchedwarnings
+
+    def result(self, row):
+        """Returns `(result, warning)` of `row`"""
+        if row < self.fetchederrors:
+            return self.errors[row], False
+
+        return self.warnings[row - self.fetchederrors], True
+
+
+class ResultModel(QtCore.QAbstractItemModel):
+    """Lazy model of validation results
+
+    Top level rows are validators, their results are exposed to the view in
+    chunks of `FETCH_SIZE` as it scrolls, so only the visible rows are ever
+    turned into data for painting.  Results of sampled validators are shown in
+    italics under a row with their estimate.
+    """
+    DAG_ROLE = QtCore.Qt.UserRole + 1
+    MESSAGE_ROLE = DAG_ROLE + 1
+    FETCH_SIZE = 1000
+
+    def __init__(self, parent=None):
+        super(ResultModel, self).__init__(parent)
+
+        self._role = self.DAG_ROLE
+        self._root = object()
+        self._groups = []
+        self._groupmap = {}
+        self._sampled = {}
+        self._font = QtGui.QFont()
+        self._font.setPixelSize(18)
+        self._italic = QtGui.QFont()
+        self._italic.setItalic(True)
+        self._warningicon = None
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+        if parent.isValid():
+            return self.createIndex(row, column, self._groups[parent.row()])
+
+        return self.createIndex(row, column, self._root)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        group = index.internalPointer()
+        if group is self._root:
+            return QtCore.QModelIndex()
+
+        return self.createIndex(group.row, 0, self._root)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return len(self._groups)
+        if parent.internalPointer() is self._root:
+            return self._groups[parent.row()].fetched
+
+        return 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return bool(self._groups)
+        if parent.internalPointer() is self._root:
+            group = self._groups[parent.row()]
+            return bool(len(group.errors) or len(group.warnings))
+
+        return False
+
+    def canFetchMore(self, parent):
+        if parent.isValid() and parent.internalPointer() is self._root:
+            group = self._groups[parent.row()]
+            return group.fetchederrors < len(group.errors) or group.fetchedwarnings < len(group.warnings)
+
+        return False
+
+    def fetchMore(self, parent):
+        if not parent.isValid() or parent.internalPointer() is not self._root:
+            return
+        group = self._groups[parent.row()]
+
+        # -- Errors stay above warnings, new errors are inserted before the fetched warnings
+        count = min(self.FETCH_SIZE, len(group.errors) - group.fetchederrors)
+        if count > 0:
+            self.beginInsertRows(parent, group.fetchederrors, group.fetchederrors + count - 1)
+            group.fetchederrors += count
+            self.endInsertRows()
+            return
+
+        count = min(self.FETCH_SIZE, len(group.warnings) - group.fetchedwarnings)
+        if count > 0:
+            self.beginInsertRows(parent, group.fetched, group.fetched + count - 1)
+            group.fetchedwarnings += count
+            self.endInsertRows()
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        if index.internalPointer() is self._root:
+            return QtCore.Qt.ItemIsEnabled
+
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        group = index.internalPointer()
+        if group is self._root:
+            group = self._groups[index.row()]
+            if role == QtCore.Qt.DisplayRole:
+                if group.sampled:
+                    return '{} (sampled, {})'.format(group.label, group.sampled)
+                return group.label
+            elif role == QtCore.Qt.FontRole:
+                return self._font
+            elif role == QtCore.Qt.SizeHintRole:
+                return QtCore.QSize(100, 54)
+            elif role == QtCore.Qt.ToolTipRole and group.sampled:
+                return 'Only a sample of the scope was checked, run a full validation before publishing'
+            return None
+
+        if role == QtCore.Qt.DisplayRole:
+            role = self._role
+        elif role == QtCore.Qt.FontRole and group.sampled:
+            return self._italic
+
+        result, warning = group.result(index.row())
+        if role == self.DAG_ROLE:
+            return result.node or result.message
+        elif role == self.MESSAGE_ROLE:
+            return result.message
+        elif role == QtCore.Qt.DecorationRole and warning:
+            if self._warningicon is None:
+                self._warningicon = QtGui.QPixmap(':/ui/res/ic_warning_white_24dp_2x.png')
+            return self._warningicon
+
+        return None
+
+    def result(self, index):
+        """Returns the `Result` shown at `index`, None for validator rows"""
+        if not index.isValid() or index.internalPointer() is self._root:
+            return None
+
+        return index.internalPointer().result(index.row())[0]
+
+    def clear(self):
+        self.beginResetModel()
+        self._groups = []
+        self._groupmap = {}
+        self.endResetModel()
+
+    def setSampled(self, validator, text):
+        """Marks the results of `validator` as found by sampling, `text` describes the estimate"""
+        self._sampled[validator] = text
+        group = self._groupmap.get(validator)
+        if group is not None:
+            group.sampled = text
+            index = self.index(group.row, 0)
+            self.dataChanged.emit(index, index)
+
+    def clearSampled(self):
+        self._sampled = {}
+
+    def setResults(self, validator, errors, warnings):
+        """Shows `errors` and `warnings` under the row for `validator`, adding the row if needed
+
+        They are referenced rather than copied, call again when they grow.
+        Returns the index of the validator row.
+        """
+        group = self._groupmap.get(validator)
+        if group is None:
+            row = len(self._groups)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            group = _Group(str(validator), row)
+            group.sampled = self._sampled.get(validator)
+            self._groups.append(group)
+            self._groupmap[validator] = group
+            self.endInsertRows()
+
+        group.errors = errors
+        group.warnings = warnings
+
+        index = self.index(group.row, 0)
+        # -- A ResultStore extends its last component range in place
+        for row in (group.fetchederrors - 1, group.fetched - 1):
+            if row >= 0:
+                child = self.index(row, 0, index)
+                self.dataChanged.emit(child, child)
+        # -- Show new results straight away until the first chunk is full, the rest is
+        # -- fetched by the view when scrolled to
+        while group.fetched < self.FETCH_SIZE and self.canFetchMore(index):
+            self.fetchMore(index)
+
+        return index
+
+
+class RunScheduler(QtCore.QObject):
+    """Drives a run's events from the Qt event loop
+
+    A zero interval timer pulls events for `TIME_SLICE` seconds at a time and
+    hands them over in one batch, Maya handles its own events between slices.
+    """
+    events = QtCore.Signal(list)
+    finished = QtCore.Signal()
+
+    def __init__(self, parent=None, seconds=TIME_SLICE):
+        super(RunScheduler, self).__init__(parent)
+
+        self._seconds = seconds
+        self._events = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.step)
+
+    @property
+    def running(self):
+        return self._events is not None
+
+    def start(self, events):
+        """Starts pulling from the iterator `events`"""
+        self._events = iter(events)
+        self._timer.start()
+
+    def step(self):
+        try:
+            batch, done = timeSlice(self._events, self._seconds)
+        except ValidatorError as err:
+            LOGGER.error('Validation failed: %s', err)
+            batch, done = [], True
+
+        if batch:
+            self.events.emit(batch)
+        if done:
+            self._timer.stop()
+            self._events = None
+            self.finished.emit()
+
+
+class ValidationWindow(QtGui.QMainWindow):
+    itemSelected = QtCore.Signal(list)
+    progressed = QtCore.Signal(str, int, int)
+    finished = QtCore.Signal()
+
+    def __init__(self, runner, parent=None, profiler=None, costs=None, history=None, sample=None, cache=None):
+        super(ValidationWindow, self).__init__(parent)
+
+        registerResources()
+
+        self.setStyleSheet(STYLE)
+
+        self._runner = runner
+        self._profiler = profiler
+        self._costs = costs
+        self._history = history
+        self._cache = cache
+        self._sample = sample
+        self._sampler = None
+        self._diff = None
+        self._scheduler = RunScheduler(self)
+        self._scheduler.events.connect(self.handleEvents)
+        self._scheduler.finished.connect(self.runFinished)
+        self._revalidator = None
+        self._fixscheduler = RunScheduler(self)
+        self._fixscheduler.finished.connect(self.fixFinished)
+        self._pending = []
+        self._progress = {}
+        self._flushed = 0.0
+        self._painted = 0.0
+        self._validatormodel = QtGui.QStandardItemModel()
+        self._resultmodel = ResultModel()
+        self._validatoritems = {}
+
+        self.build()
+
+        self.lvValidators.setModel(self._validatormodel)
+        self._delegate = ValidatorDelegate(self.lvValidators)
+        self.lvValidators.setItemDelegate(self._delegate)
+        self.tvResults.setModel(self._resultmodel)
+
+        self.bRun.toggled.connect(self.toggleRun)
+        selectionmodel = self.tvResults.selectionModel()
+        selectionmodel.selectionChanged.connect(self.selectionChangedHandler)
+
+        for validator in runner.validators:
+            item = QtGui.QStandardItem(str(validator))
+            item.setData(validator, QtCore.Qt.UserRole)
+            item.setCheckable(True)
+            state = QtCore.Qt.Checked if validator.enabled else QtCore.Qt.Unchecked
+            item.setCheckState(state)
+            item.setEditable(False)
+            self._validatormodel.appendRow(item)
+            self._validatoritems[validator] = item
+
+        self.resize(800, 600)
+
+    def keyReleaseEvent(self, event):
+        event.accept()
+        self._resultmodel._role = ResultModel.DAG_ROLE
+        self.tvResults.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.modifiers() == QtCore.Qt.ControlModifier:
+            event.accept()
+            self._resultmodel._role = ResultModel.MESSAGE_ROLE
+            self.tvResults.viewport().update()
+
+    def build(self):
+        widget = QtGui.QWidget(self)
+        layout = QtGui.QHBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        self.setCentralWidget(widget)
+
+        # -- Validators
+        self.lvValidators = QtGui.QListView(widget)
+        self.lvValidators.setObjectName('ListValidators')
+        self.lvValidators.clicked.connect(self.checked)
+
+        # -- Results
+        self.fResults = ResultFrame(widget)
+        self.fResults.setObjectName('FrameResults')
+        resultlayout = QtGui.QVBoxLayout(self.fResults)
+        resultlayout.setContentsMargins(0, 0, 0, 0)
+        resultlayout.setSpacing(0)
+
+        resultlabels = QtGui.QWidget(self.fResults)
+        resultslabelslayout = QtGui.QHBoxLayout(resultlabels)
+        resultslabelslayout.setContentsMargins(0, 0, 0, 0)
+        resultslabelslayout.setSpacing(0)
+
+        self._labels = {
+            'ready': self.__labelWidget('Ready', 'transparent', '', resultlabels),
+            'success': self.__labelWidget('Success', '#64b5f6', ':/ui/res/ic_done_white_24dp_2x.png', resultlabels),
+            'errors': self.__labelWidget('Errors', '#f44336', ':/ui/res/ic_error_white_24dp_2x.png', resultlabels),
+            'warnings': self.__labelWidget('Warnings', '#ffb300', ':/ui/res/ic_warning_white_24dp_2x.png', resultlabels),
+        }
+        self._labels['ready'].show()
+        
+        self.lTiming = QtGui.QLabel(self.fResults)
+        self.lTiming.setObjectName('Timing')
+        self.tvResults = QtGui.QTreeView(self.fResults)
+        self.tvResults.setHeaderHidden(True)
+        self.tvResults.setSelectionMode(QtGui.QTreeView.ExtendedSelection)
+        self.tvResults.setFocusPolicy(QtCore.Qt.NoFocus)
+        self.tvResults.setIndentation(30)
+        for label in self._labels.values():
+            resultslabelslayout.addWidget(label)
+        resultlayout.addWidget(resultlabels)
+
+        # -- Timing and actions, in their own widget so ResultFrame doesn't move the button
+        actions = QtGui.QWidget(self.fResults)
+        actionslayout = QtGui.QHBoxLayout(actions)
+        actionslayout.setContentsMargins(0, 0, 8, 0)
+        actionslayout.setSpacing(0)
+        self.bFixAll = QtGui.QPushButton('Fix All', actions)
+        self.bFixAll.setObjectName('bFixAll')
+        self.bFixAll.setEnabled(False)
+        self.bFixAll.clicked.connect(self.fixAll)
+        self.cbDiff = QtGui.QComboBox(actions)
+        self.cbDiff.addItems(DIFF_MODES)
+        self.cbDiff.setEnabled(False)
+        self.cbDiff.setToolTip('Compare with the previous run of this scene')
+        self.cbDiff.currentIndexChanged.connect(self.showDiff)
+        actionslayout.addWidget(self.lTiming)
+        actionslayout.addStretch()
+        actionslayout.addWidget(self.cbDiff)
+        actionslayout.addWidget(self.bFixAll)
+        resultlayout.addWidget(actions)
+        resultlayout.addWidget(self.tvResults)
+
+        # -- Run button
+        self.bRun = QtGui.QPushButton(self.fResults)
+        self.bRun.setCheckable(True)
+        self.bRun.setObjectName('bRun')
+        self.bRun.setMinimumSize(BUTTON_SIZE, BUTTON_SIZE)
+        self.bRun.setMaximumSize(self.minimumSize())
+        self.bRun.setAutoFillBackground(False)
+
+        layout.addWidget(self.lvValidators)
+        layout.addWidget(self.fResults)
+        layout.setStretch(1, 1)
+
+    def checked(self, index):
+        item = self._validatormodel.itemFromIndex(index)
+        state = QtCore.Qt.Checked if item.checkState() != QtCore.Qt.Checked else QtCore.Qt.Unchecked        
+        item.setCheckState(state)
+        self._runner.validators[item.row()].enabled = state
+
+    def toggleRun(self):
+        state = self.bRun.isChecked()
+        if state:
+            if not self._scheduler.running:
+                self.run()
+        else:
+            self._runner.stop()
+
+    def run(self, failfast=False, sample=None):
+        """Starts validating without blocking, `finished` is emitted when done
+
+        :param failfast: Stop after the first validator that reports an error
+        :param sample: Seconds validators supporting it check a sample of the scope for,
+            defaults to the window's `sample`, 0 for a full run
+        """
+        sample = self._sample if sample is None else sample
+        self._sampler = validation_sample.Sampler(sample) if sample else None
+        self._resultmodel.clear()
+        self._resultmodel.clearSampled()
+        self._delegate.clearProgress()
+        self.lvValidators.viewport().update()
+        self._pending = []
+        self._progress = {}
+        self._flushed = 0.0
+        self._painted = 0.0
+        self.bFixAll.setEnabled(False)
+        self.cbDiff.blockSignals(True)
+        self.cbDiff.setCurrentIndex(0)
+        self.cbDiff.blockSignals(False)
+        self.cbDiff.setEnabled(False)
+        # -- Pre-save checks want the first error quickly, full runs want results streaming in early
+        order = None
+        if self._costs is not None:
+            order = validation_costs.ORDER_FAILING if failfast else validation_costs.ORDER_CHEAPEST
+        self._scheduler.start(self._runner.start(
+            cache=self._cache, profiler=self._profiler, costs=self._costs, order=order, failfast=failfast,
+            sampler=self._sampler))
+
+    @property
+    def running(self):
+        return self._scheduler.running or self._fixscheduler.running
+
+    def handleEvents(self, events):
+        """Takes in a slice of the run's events"""
+        span = tracing.begin('handleEvents', 'ui', {'events': len(events)})
+        for event in events:
+            v = event.validator
+            if v is None:
+                continue
+            if (event.errors or event.warnings) and v not in self._pending:
+                self._pending.append(v)
+
+            if event.type == EVENT_STEP:
+                self._progress[v] = self._runner.progress(v)
+            elif event.type == EVENT_FINISH:
+                self._progress[v] = 1.0
+                self.setStats(v)
+                self.setEstimate(v)
+
+        # -- Only repaint at FRAME_INTERVAL, slices can end far more often than that
+        now = timer()
+        if now - self._painted >= FRAME_INTERVAL:
+            progress = tracing.begin('progress', 'ui', {'rows': len(self._progress)})
+            for validator, value in self._progress.items():
+                self.setProgress(validator, value)
+            self._progress.clear()
+            tracing.end(progress)
+            eta = self._runner.eta
+            if eta is not None:
+                self.lTiming.setText('About {:.0f}s left'.format(eta))
+            if self._pending and now - self._flushed > RESULT_INTERVAL:
+                self.flushResults()
+            self._painted = timer()
+
+        event = events[-1]
+        if event.validator is not None:
+            self.progressed.emit(str(event.validator), event.index + 1, event.validator.count)
+        tracing.end(span)
+
+    def runFinished(self):
+        for validator, value in self._progress.items():
+            self.setProgress(validator, value)
+        self._progress.clear()
+        self.flushResults()
+        self.lTiming.setText('Duration: {:.2f}s'.format(self._runner.duration))
+        # -- Sampled and stopped runs would show every issue they didn't get to as fixed
+        if (self._sampler is None or not self._sampler.estimates) and self._runner.complete:
+            self.recordHistory()
+
+        self.setStatus()
+        self.bRun.setChecked(False)
+        self.finished.emit()
+
+    def setProgress(self, validator, value):
+        """Shows the progress of `validator`, repainting only the progress strip of its row"""
+        item = self._validatoritems[validator]
+        if self._delegate.setProgress(item.row(), value):
+            rect = self._delegate.progressRect(self.lvValidators.visualRect(item.index()))
+            self.lvValidators.viewport().update(rect)
+
+    def recordHistory(self):
+        """Stores the run in the history and diffs it against the previous run of the scene"""
+        if self._history is None:
+            return
+
+        run = self._history.record(self._runner, validation_history.currentScene())
+        self._diff = self._history.diff(self._history.previous(run), run)
+        self.cbDiff.blockSignals(True)
+        self.cbDiff.setCurrentIndex(0)
+        for i, issues in enumerate(self._diff, 1):
+            self.cbDiff.setItemText(i, '{} ({})'.format(DIFF_MODES[i], len(issues)))
+        self.cbDiff.blockSignals(False)
+        self.cbDiff.setEnabled(True)
+
+    def showDiff(self, mode):
+        """Shows all results, or only the new, fixed or persisting ones for `mode` 1 to 3"""
+        if not mode or self._diff is None:
+            self.showResults()
+            return
+
+        self._resultmodel.clear()
+        groups = {}
+        order = []
+        for issue in self._diff[mode - 1]:
+            if issue.validator not in groups:
+                groups[issue.validator] = ([], [])
+                order.append(issue.validator)
+            result = Result(issue.node, issue.message)
+            groups[issue.validator][issue.severity == validation_history.WARNING].append(result)
+
+        for name in order:
+            index = self._resultmodel.setResults(name, *groups[name])
+            self.tvResults.expand(index)
+
+    def setStats(self, validator):
+        """Shows the timings of `validator` on its row"""
+        stats = self._runner.stats.get(validator)
+        if stats is None:
+            return
+
+        item = self._validatoritems[validator]
+        if stats.cached:
+            item.setData('cached', TIME_ROLE)
+            item.setToolTip('Restored from the result cache')
+            return
+
+        item.setData('{:.2f}s'.format(stats.wall), TIME_ROLE)
+        tooltip = 'Wall {:.3f}s\nCPU {:.3f}s\n{} yields\nPeak memory +{:.1f} MB'.format(
+            stats.wall, stats.cpu, stats.yields, stats.memory / 1024.0)
+        if stats.timedout:
+            tooltip += '\nCancelled, exceeded its {}s budget'.format(validator.BUDGET)
+        if self._profiler is not None:
+            hotspots = self._profiler.hotspots(validator, 5)
+            if hotspots:
+                tooltip += '\n\nHotspots\n' + '\n'.join(
+                    '{:.3f}s  {} ({} calls)'.format(spot.tottime, spot.function, spot.calls) for spot in hotspots)
+        item.setToolTip(tooltip)
+
+    def setEstimate(self, validator):
+        """Marks `validator` and its results as sampled if it only checked a sample"""
+        if self._sampler is None or validator not in self._sampler.estimates:
+            return
+
+        estimate = self._sampler.estimates[validator]
+        errors = estimate.errors
+        if errors.high == float('inf'):
+            text = 'at least {:.0f} errors'.format(errors.low)
+        else:
+            text = '~{:.0f} errors, {:.0f} to {:.0f}'.format(*errors)
+        text = '{} in {} of {} nodes'.format(text, estimate.checked, estimate.population)
+        self._resultmodel.setSampled(validator, text)
+
+        item = self._validatoritems[validator]
+        item.setData('sampled', TIME_ROLE)
+        item.setToolTip('Checked {} of {} nodes\nEstimated errors {:.0f}, {:.0f} to {:.0f}\n'
+                        'Estimated warnings {:.0f}, {:.0f} to {:.0f}'.format(
+                            estimate.checked, estimate.population, *(estimate.errors + estimate.warnings)))
+
+    def flushResults(self):
+        """Shows the results of validators that reported new ones since the last flush"""
+        span = tracing.begin('flushResults', 'ui', {'validators': len(self._pending)})
+        for validator in self._pending:
+            index = self._resultmodel.setResults(validator, validator.errors, validator.warnings)
+            self.tvResults.expand(index)
+
+        self._pending = []
+        self._flushed = timer()
+        tracing.end(span)
+
+    def selectionChangedHandler(self, selection, deselection):
+        selectionmodel = self.tvResults.selectionModel()
+        results = [self._resultmodel.result(index) for index in selectionmodel.selectedIndexes()]
+        self.itemSelected.emit([r.node for r in results if r is not None and r.node])
+
+    def fixAll(self):
+        """Fixes every fixable result and validates the affected nodes again without blocking"""
+        validators, nodes = validation_fix.fixAll(self._runner.validators)
+        if not validators:
+            self.fixFinished()
+            return
+
+        self.bFixAll.setEnabled(False)
+        self.bRun.setEnabled(False)
+        self._revalidator = validation_fix.revalidate(validators, nodes)
+        self._fixscheduler.start(self._revalidator.start())
+
+    def fixFinished(self):
+        self._revalidator = None
+        self.bRun.setEnabled(True)
+        self.showResults()
+        self.setStatus()
+
+    def showResults(self):
+        """Shows the current results of every validator"""
+        self._resultmodel.clear()
+        for validator in self._runner.validators:
+            if validator.errors or validator.warnings:
+                index = self._resultmodel.setResults(validator, validator.errors, validator.warnings)
+                self.tvResults.expand(index)
+
+    def setStatus(self):
+        self.bFixAll.setEnabled(any((v.errors or v.warnings) and v.fixable for v in self._runner.validators))
+
+        for widget in self._labels.values():
+            widget.hide()
+
+        # -- Sampled runs only vouch for the nodes they checked
+        suffix = ' in a sample' if self._sampler is not None and self._sampler.estimates else ''
+        if self._runner.errors:
+            self._labels['errors'].children()[1].setText('Errors {}{}'.format(self._runner.errors, suffix))
+            self._labels['errors'].show()
+
+        if self._runner.warnings:
+            self._labels['warnings'].children()[1].setText('Warnings {}{}'.format(self._runner.warnings, suffix))
+            self._labels['warnings'].show()
+        
+        if not self._runner.errors and not self._runner.warnings:
+            self._labels['success'].children()[1].setText('Success' + suffix)
+            self._labels['success'].show()
+
+    def wasSuccess(self):
+        return self._runner.errors == 0
+
+    def __labelWidget(self, text, color, icon, parent):
+        frame = QtGui.QFrame(parent)
+        frame.setStyleSheet('background-color: {};'.format(color))
+        rowlayout = QtGui.QHBoxLayout(frame)
+        rowlayout.setContentsMargins(0, 0, 0, 0)
+        rowlayout.setSpacing(0)
+        label = QtGui.QLabel(text, frame)
+        icon = QtGui.QLabel(frame)
+        icon.setMaximumWidth(48)
+        icon.setStyleSheet("background-image: url('{}');background-repeat: no-repeat;".format(icon))
+        rowlayout.addWidget(label)
+        rowlayout.addWidget(icon)
+
+        frame.hide()
+        
+        return frame
+
+
+def selectNodes(nodes):
+    """Selects `nodes` with a single `select` call, component ranges included"""
+    from maya import cmds
+
+    if nodes:
+        cmds.select(nodes, replace=True)
+    else:
+        cmds.select(clear=True)
+
+
+def main(dirs=(), callback=None, silent=False, profile=None, failfast=False, remote=False, sample=None, cache=False):
+    """Shows the validation window
+
+    :param callback: Called with the nodes of the selected results, defaults to `selectNodes`
+    :param profile: Directory to write per validator profiles to, profiling is off when None
+    :param failfast: Stop at the first validator with errors, for quick checks before saving
+    :param remote: Validate a snapshot of the scene in a background mayapy, see
+        `utools.maya.validation_remote`
+    :param sample: Seconds validators supporting it check a sample of the scope for, for quick
+        approximate feedback, see `utools.maya.validation_sample`
+    :param cache: Restore validators whose `digest` is unchanged from the result cache, see
+        `utools.maya.validation_cache`
+    """
+    global WINDOW
+    if WINDOW:
+        WINDOW.close()
+
+    if remote:
+        from utools.maya.validation_remote import RemoteRunner
+        runner = RemoteRunner()
+    else:
+        runner = Runner()
+    runner.discover(dirs)
+    profiler = None
+    if profile:
+        from utools.maya.validation_profile import Profiler
+        profiler = Profiler(profile)
+    WINDOW = ValidationWindow(
+        runner, common.getMayaWindow(), profiler, validation_costs.CostModel(), validation_history.History(), sample,
+        validation_cache.ResultCache() if cache else None)
+    WINDOW.itemSelected.connect(callback or selectNodes)
+
+    if silent:
+        prog = QtGui.QProgressDialog(common.getMayaWindow())
+        prog.canceled.connect(runner.stop)
+
+        def progressed(validator, i, total):
+            prog.setLabelText(validator)
+            prog.setMaximum(total)
+            prog.setValue(i)
+
+        # -- Wait in a local event loop, the run itself still happens in time slices
+        loop = QtCore.QEventLoop()
+        WINDOW.progressed.connect(progressed)
+        WINDOW.finished.connect(loop.quit)
+        WINDOW.run(failfast)
+        loop.exec_()
+        WINDOW.progressed.disconnect(progressed)
+        prog.close()
+        if not WINDOW.wasSuccess():
+            WINDOW.show()
+            return False
+        return True
+    else:
+        WINDOW.show()